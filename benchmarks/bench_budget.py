@@ -0,0 +1,99 @@
+"""Unique emails per county budget: former up-front allocation versus the budget scheduler.
+
+A synthetic county: search results point at OPG sites (benchmarks/sites.py),
+several results per site, and at large portals without any address. The
+former plan reserved ``max(5, min(remaining, 50))`` pages for each of the
+first two results of a host before crawling and crawled each result with a
+fresh frontier. The scheduler merges a host's results into one crawl and
+charges the county budget only for pages actually fetched.
+
+    python benchmarks/bench_budget.py --sites 40 --max-pages 200 --stop-after-idle 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from typing import Dict, List, Set
+
+from sites import MemoryCrawler, generate_site, generate_sites
+
+from opg_scraper_pkg.crawl import Crawler, HostCrawlState, SaturationPolicy
+from opg_scraper_pkg.scheduler import PageBudget, host_page_cap
+from opg_scraper_pkg.utils import site_host
+
+
+def county(n_sites: int, seed: int = 11):
+    rng = random.Random(seed)
+    pages: Dict[str, str] = {}
+    seeds: List[str] = []
+    for host, site in generate_sites(n_sites, seed=seed).items():
+        pages.update(site)
+        inner = [u for u in site if u != f"https://{host}/"]
+        seeds += [f"https://{host}/"] + rng.sample(inner, rng.randint(0, 3))
+    for i in range(n_sites // 5):
+        host = f"portal-{i}.hr"
+        portal = generate_site(rng, host, products=150, news=100)
+        # Portals carry no addresses of their own
+        pages.update({u: html.replace("mailto:", "").replace("@", " ") for u, html in portal.items()})
+        seeds.insert(rng.randrange(len(seeds) // 2), f"https://{host}/")
+    return pages, seeds
+
+
+def by_host(seeds: List[str]) -> Dict[str, List[str]]:
+    out: Dict[str, List[str]] = {}
+    for s in seeds:
+        out.setdefault(site_host(s), []).append(s)
+    return out
+
+
+async def legacy(crawler: Crawler, seeds: List[str], max_pages: int) -> Set[str]:
+    plan = []
+    remaining = max_pages
+    for host_seeds in by_host(seeds).values():
+        if remaining <= 0:
+            break
+        per_host = max(5, min(remaining, 50))
+        for seed in host_seeds[:2]:
+            plan.append((seed, per_host))
+            remaining -= per_host
+            if remaining <= 0:
+                break
+    budget = PageBudget(max_pages)
+    emails: Set[str] = set()
+    for seed, limit in plan:
+        records, _ = await crawler.crawl_host(seed, "bench", max_pages=limit, budget=budget)
+        emails |= {r.email.lower() for r in records}
+    return emails
+
+
+async def scheduled(crawler: Crawler, seeds: List[str], max_pages: int) -> Set[str]:
+    budget = PageBudget(max_pages)
+    emails: Set[str] = set()
+    for host_seeds in by_host(seeds).values():
+        if budget.exhausted:
+            break
+        state = HostCrawlState.start(host_seeds[0], host_seeds[1:])
+        records, _ = await crawler.crawl_host(state.seed_url, "bench", max_pages=host_page_cap(1.0), budget=budget, state=state)
+        emails |= {r.email.lower() for r in records}
+    return emails
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sites", type=int, default=40)
+    p.add_argument("--max-pages", type=int, default=200)
+    p.add_argument("--stop-after-idle", type=int, default=0)
+    args = p.parse_args()
+
+    pages, seeds = county(args.sites)
+    saturation = SaturationPolicy(idle_pages=args.stop_after_idle)
+    print(f"{len(by_host(seeds))} hosts, {len(seeds)} seeds, {args.max_pages} pages, stop-after-idle {args.stop_after_idle}")
+    for name, strategy in (("legacy", legacy), ("scheduler", scheduled)):
+        emails = asyncio.run(strategy(MemoryCrawler(pages, saturation=saturation), seeds, args.max_pages))
+        print(f"{name:>10}: {len(emails):4d} unique emails")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Fetches a recorded crawl would have saved with URL canonicalization and content fingerprints.
+
+Replays the pages of a crawl in fetch order and counts those whose
+``url_key`` was already fetched (http/https, ``www.``, trailing slash,
+tracking or reordered query parameters) and, when bodies are available,
+near-identical copies of an earlier page of the same host (print views and
+the like). Skipped copies also stop link expansion, so the real saving is
+at least the reported one.
+
+    python benchmarks/bench_dedup.py                       # synthetic crawl recorded with the old URL handling
+    python benchmarks/bench_dedup.py --audit opg_emails.jsonl
+    python benchmarks/bench_dedup.py --cache-dir .cache    # bodies from the HTTP cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from sites import generate_sites
+
+from opg_scraper_pkg.fingerprint import ContentFingerprints
+from opg_scraper_pkg.http_cache import HttpCache
+from opg_scraper_pkg.page import scan_links
+from opg_scraper_pkg.utils import site_host, url_key
+
+Recorded = List[Tuple[str, Optional[str]]]
+
+
+def legacy_canonical(url: str) -> str:
+    p = urlparse(url)
+    return f"{p.scheme or 'http'}://{p.netloc}{p.path or '/'}{'?' + p.query if p.query else ''}"
+
+
+def decorate_site(host: str, pages: Dict[str, str]) -> Dict[str, str]:
+    """Add the URL variants and print views real OPG sites link to."""
+    base = f"https://{host}"
+    out = dict(pages)
+    home = out[base + "/"]
+    extra = []
+    for url in sorted(pages):
+        path = urlparse(url).path + (f"?{urlparse(url).query}" if urlparse(url).query else "")
+        if "/novosti/n-" in path:
+            out[url] = out[url].replace("</body>", f"<a href='{path}?print=1'>Ispis</a></body>")
+            body = out[url].split("<body>", 1)[1]
+            out[url + "?print=1"] = f"<html><body>{body.split('<a ', 1)[0]}</body></html>"
+        if "kontakt" in path or "page_id" in path:
+            sep = "&" if "?" in path else "?"
+            extra += [
+                f"<a href='{path}{sep}utm_source=facebook&utm_medium=social'>Kontakt</a>",
+                f"<a href='https://www.{host}{path}'>Kontakt</a>",
+                f"<a href='http://{host}{path}'>Kontakt</a>",
+            ]
+    out[base + "/"] = home.replace("</body>", " ".join(extra) + "</body>")
+    return out
+
+
+def record_crawl(pages: Dict[str, str], seed: str, max_pages: int) -> Recorded:
+    """BFS with the former URL handling (only the fragment removed)."""
+    by_key = {url_key(u): u for u in pages}
+    visited = set()
+    queue = [legacy_canonical(seed)]
+    recorded: Recorded = []
+    while queue and len(recorded) < max_pages:
+        url = queue.pop(0)
+        if url in visited:
+            continue
+        visited.add(url)
+        html = pages.get(url) or pages.get(by_key.get(url_key(url), ""), "")
+        recorded.append((url, html))
+        for nxt, _, _ in scan_links(html, url):
+            nxt = legacy_canonical(urljoin(url, nxt))
+            if site_host(nxt) == site_host(seed) and nxt not in visited:
+                queue.append(nxt)
+    return recorded
+
+
+def from_audit(path: str) -> Recorded:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [(json.loads(line)["url"], None) for line in f if line.strip()]
+
+
+def from_cache(cache_dir: str) -> Recorded:
+    db = sqlite3.connect(os.path.join(cache_dir, HttpCache.FILENAME))
+    try:
+        return list(db.execute("SELECT url, body FROM responses ORDER BY fetched_at"))
+    finally:
+        db.close()
+
+
+def analyse(recorded: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, int]:
+    keys = set()
+    fingerprints: Dict[str, ContentFingerprints] = defaultdict(ContentFingerprints)
+    totals = {"pages": 0, "url_variants": 0, "content_copies": 0}
+    for url, body in recorded:
+        totals["pages"] += 1
+        key = url_key(url)
+        if key in keys:
+            totals["url_variants"] += 1
+            continue
+        keys.add(key)
+        if body and fingerprints[site_host(url)].duplicate_of(url, body):
+            totals["content_copies"] += 1
+    return totals
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--audit", help="JSON Lines audit crawla (.jsonl ili .jsonl.gz); samo URL-ovi")
+    p.add_argument("--cache-dir", help="--cache-dir crawla; URL-ovi i tijela stranica")
+    p.add_argument("--sites", type=int, default=30)
+    p.add_argument("--max-pages", type=int, default=80)
+    args = p.parse_args()
+
+    if args.audit:
+        recorded, label = from_audit(args.audit), args.audit
+    elif args.cache_dir:
+        recorded, label = from_cache(args.cache_dir), args.cache_dir
+    else:
+        recorded = []
+        for host, pages in generate_sites(args.sites).items():
+            recorded += record_crawl(decorate_site(host, pages), f"https://{host}/", args.max_pages)
+        label = f"synthetic crawl of {args.sites} sites, max {args.max_pages} pages/site"
+
+    t = analyse(recorded)
+    saved = t["url_variants"] + t["content_copies"]
+    print(label)
+    print(f"{t['pages']:6d} pages fetched")
+    print(f"{t['url_variants']:6d} URL variants of an already fetched page")
+    print(f"{t['content_copies']:6d} near-identical copies (print views, duplicates)")
+    print(f"{saved:6d} fetches saved ({saved / max(1, t['pages']):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""End-to-end run of the scraper against a local synthetic web.
+
+A separate process serves every generated OPG site (benchmarks/sites.py) and
+a stand-in for the DuckDuckGo HTML endpoint from one local aiohttp server;
+the scraper's resolver sends every host name there. Some hosts are slow,
+some answer only with 500 and some throttle with 429 + ``Retry-After``.
+``main_async`` runs unchanged otherwise, so robots.txt, the rate limiter,
+search pagination, the budget and the output writers are all measured.
+
+Reports wall time, pages/sec, emails/sec, CPU per page and peak RSS of the
+scraper process (the server's CPU is not included). ``--json FILE`` appends
+the result with the current commit for comparisons across commits. Options
+the harness does not know are passed on to the scraper:
+
+    python benchmarks/bench_e2e.py --hosts 120 --counties 3
+    python benchmarks/bench_e2e.py --json e2e.jsonl -- --sitemaps --concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import html
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+
+from corpus import _paragraphs
+from sites import generate_sites
+
+from opg_scraper_pkg.cli import main_async, parse_args
+from opg_scraper_pkg.config import DEFAULT_COUNTIES
+from opg_scraper_pkg.output import CSVWriter
+
+SEARCH_HOST = "duckduckgo.local"
+RESULTS_PER_PAGE = 10
+
+
+class LocalResolver(AbstractResolver):
+    """Resolves every host name to 127.0.0.1."""
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET):
+        return [{"hostname": host, "host": "127.0.0.1", "port": port, "family": socket.AF_INET, "proto": 0, "flags": socket.AI_NUMERICHOST}]
+
+    async def close(self):
+        pass
+
+
+class SyntheticWeb:
+    def __init__(self, hosts: int, counties: List[str], page_kb: int, slow: float, failing: float, throttled: float, seed: int = 7):
+        rng = random.Random(seed)
+        self.sites: Dict[str, Dict[str, str]] = {
+            host: {_path(url): page for url, page in pages.items()} for host, pages in generate_sites(hosts, seed=seed).items()
+        }
+        names = sorted(self.sites, key=lambda h: int(h.split("-")[1].split(".")[0]))
+        self.latency = {h: rng.uniform(0.3, 1.5) for h in names if rng.random() < slow}
+        self.failing = {h for h in names if rng.random() < failing}
+        self.throttled = {h for h in names if rng.random() < throttled}
+        # Search results: hosts are split across counties; some hosts show up with an inner page too
+        self.results: Dict[str, List[Tuple[str, str]]] = {c: [] for c in counties}
+        for i, host in enumerate(names):
+            paths = ["/"] + rng.sample(sorted(p for p in self.sites[host] if p != "/"), rng.randint(0, 2))
+            self.results[counties[i % len(counties)]] += [(host, p) for p in paths]
+        self.filler = [_paragraphs(rng, 1) for _ in range(300)]
+        self.page_kb = page_kb
+        self.stats: Counter = Counter()
+        self.per_host: Counter = Counter()
+
+    def _pad(self, url: str, page: str) -> str:
+        # Per-page filler, so padded pages of one host do not look like near-duplicates
+        rng = random.Random(zlib.crc32(url.encode()))
+        filler = []
+        size = len(page)
+        while size < self.page_kb * 1024:
+            filler.append(rng.choice(self.filler))
+            size += len(filler[-1])
+        return page.replace("</body>", "".join(filler) + "</body>")
+
+    def search(self, request: web.Request) -> web.Response:
+        query = request.query.get("q", "")
+        county = next((c for c in self.results if c.lower() in query.lower()), None)
+        hits = self.results.get(county, [])
+        # Each query of a county ranks its hosts differently
+        shift = zlib.crc32(query.encode()) % max(1, len(hits))
+        hits = hits[shift:] + hits[:shift]
+        start = int(request.query.get("s", 0))
+        port = request.host.rsplit(":", 1)[-1]
+        body = "".join(
+            f"<div class='result'><a class='result__a' href='http://{host}:{port}{path}'>OPG {host}</a></div>"
+            for host, path in hits[start : start + RESULTS_PER_PAGE]
+        )
+        if start + RESULTS_PER_PAGE < len(hits):
+            body += (
+                "<div class='nav-link'><form action='/html/' method='post'>"
+                f"<input type='hidden' name='q' value='{html.escape(query, quote=True)}'>"
+                f"<input type='hidden' name='s' value='{start + RESULTS_PER_PAGE}'>"
+                "<input type='submit' value='Next'></form></div>"
+            )
+        return web.Response(text=f"<html><body>{body}</body></html>", content_type="text/html")
+
+    async def handle(self, request: web.Request) -> web.Response:
+        host = request.host.rsplit(":", 1)[0]
+        self.stats["requests"] += 1
+        if host == SEARCH_HOST:
+            return self.search(request)
+        if request.path == "/__stats":
+            return web.json_response(dict(self.stats))
+        site = self.sites.get(host)
+        if site is None:
+            return web.Response(status=404)
+        if host in self.latency:
+            await asyncio.sleep(self.latency[host])
+        if host in self.failing:
+            self.stats["500"] += 1
+            return web.Response(status=500)
+        self.per_host[host] += 1
+        if host in self.throttled and self.per_host[host] % 3 == 0:
+            self.stats["429"] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if request.path == "/robots.txt":
+            return web.Response(text="User-agent: *\nAllow: /\n")
+        path = request.path_qs
+        page = site.get(path) or site.get(path.rstrip("/") + "/")
+        if page is None:
+            return web.Response(status=404)
+        self.stats["pages"] += 1
+        return web.Response(text=self._pad(path, page), content_type="text/html")
+
+    async def serve(self, conn):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        conn.send(runner.addresses[0][1])
+        while True:
+            await asyncio.sleep(3600)
+
+
+def _path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def _serve(options: dict, conn):
+    asyncio.run(SyntheticWeb(**options).serve(conn))
+
+
+def _server_stats(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/__stats") as resp:
+        return json.load(resp)
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--hosts", type=int, default=60, help="Number of generated OPG sites")
+    p.add_argument("--counties", type=int, default=2)
+    p.add_argument("--page-kb", type=int, default=30, help="Pages are padded with text to about this size")
+    p.add_argument("--slow", type=float, default=0.1, help="Share of hosts answering after 0.3-1.5 s")
+    p.add_argument("--failing", type=float, default=0.05, help="Share of hosts answering 500")
+    p.add_argument("--throttled", type=float, default=0.1, help="Share of hosts answering every third request with 429")
+    p.add_argument("--json", help="Append the result as a JSON line to this file")
+    p.add_argument("--verbose", action="store_true", help="Show the scraper's log")
+    args, scraper_argv = p.parse_known_args()
+    if scraper_argv[:1] == ["--"]:
+        scraper_argv = scraper_argv[1:]
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    counties = list(DEFAULT_COUNTIES[: args.counties])
+    options = dict(
+        hosts=args.hosts, counties=counties, page_kb=args.page_kb, slow=args.slow, failing=args.failing, throttled=args.throttled
+    )
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    server = ctx.Process(target=_serve, args=(options, child), daemon=True)
+    server.start()
+    port = parent.recv()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "opg_emails.csv")
+        scraper_args = parse_args(
+            [
+                *counties,
+                "--output", output,
+                "--log-file", os.path.join(tmp, "opg_scraper.log"),
+                "--search-url", f"http://{SEARCH_HOST}:{port}/html/",
+                "--rate-limit", "0.05",
+                "--max-results-per-county", "40",
+                "--max-pages-per-county", "300",
+                "--no-progress",
+                *scraper_argv,
+            ]
+        )
+        cpu_before = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+        started = time.perf_counter()
+        asyncio.run(main_async(scraper_args, resolver=LocalResolver()))
+        wall = time.perf_counter() - started
+        # Parse workers are joined by now and count as children; the server is not reaped yet
+        cpu = sum(
+            (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+            for before, after in zip(cpu_before, (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)))
+        )
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        with open(output, newline="", encoding="utf-8") as f:
+            emails = sum(1 for _ in csv.DictReader(f))
+        with open(CSVWriter.audit_path_from_csv(output), encoding="utf-8") as f:
+            pages = sum(1 for line in f if line.strip())
+    stats = _server_stats(port)
+    server.terminate()
+    server.join()
+
+    result = {
+        "commit": _commit(),
+        "hosts": args.hosts,
+        "counties": args.counties,
+        "scraper_args": scraper_argv,
+        "wall_s": round(wall, 2),
+        "pages": pages,
+        "emails": emails,
+        "requests": stats.get("requests", 0),
+        "throttled_429": stats.get("429", 0),
+        "pages_per_s": round(pages / wall, 2) if wall else 0.0,
+        "emails_per_s": round(emails / wall, 2) if wall else 0.0,
+        "cpu_ms_per_page": round(1000 * cpu / pages, 2) if pages else 0.0,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+    for key, value in result.items():
+        print(f"{key:>16}: {value}")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Pages fetched per email: legacy list queue versus the priority frontier.
+
+Crawls synthetic site graphs (benchmarks/sites.py) with the real
+``Crawler.crawl_host`` (fetches served from memory, no rate limit) and
+replays the former ``pop(0)``/``insert(0)`` queue on the same graphs.
+
+    python benchmarks/bench_frontier.py --sites 30 --max-pages 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Dict, List, Tuple
+from urllib.parse import urljoin
+
+from sites import MemoryCrawler, generate_sites
+
+from opg_scraper_pkg.analysis import analyze_page
+from opg_scraper_pkg.utils import canonicalize_url, same_host
+
+
+def pages_until_last_email(found_per_page: List[List[str]]) -> Tuple[int, int]:
+    seen = set()
+    last = 0
+    for i, emails in enumerate(found_per_page, 1):
+        new = {e.lower() for e in emails} - seen
+        if new:
+            seen |= new
+            last = i
+    return last, len(seen)
+
+
+def legacy_order(pages: Dict[str, str], seed: str, depth_limit: int, max_pages: int) -> List[List[str]]:
+    visited = set()
+    queue = [(canonicalize_url(seed), 0)]
+    found = []
+    while queue and len(visited) < max_pages:
+        url, depth = queue.pop(0)
+        if url in visited:
+            continue
+        visited.add(url)
+        html = pages.get(url, "")
+        if not html:
+            found.append([])
+            continue
+        res = analyze_page(html, url)
+        found.append([e for e, _ in res.emails])
+        if depth < depth_limit:
+            for nxt, href, _ in res.links:
+                nxt = canonicalize_url(urljoin(url, nxt))
+                if not same_host(seed, nxt) or nxt in visited:
+                    continue
+                if any(k in href.lower() for k in ("kontakt", "contact", "email", "onama", "o-nama", "about", "opg")):
+                    queue.insert(0, (nxt, depth + 1))
+                else:
+                    queue.append((nxt, depth + 1))
+    return found
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sites", type=int, default=30)
+    p.add_argument("--max-pages", type=int, default=50)
+    p.add_argument("--depth", type=int, default=3)
+    args = p.parse_args()
+
+    sites = generate_sites(args.sites)
+    totals = {"legacy": [0, 0], "frontier": [0, 0]}
+    for host, pages in sites.items():
+        seed = f"https://{host}/"
+        last, n = pages_until_last_email(legacy_order(pages, seed, args.depth, args.max_pages))
+        totals["legacy"][0] += last
+        totals["legacy"][1] += n
+
+        crawler = MemoryCrawler(pages, depth=args.depth)
+        _, audit = asyncio.run(crawler.crawl_host(seed, "bench", max_pages=args.max_pages))
+        last, n = pages_until_last_email([page["found_emails"] for page in audit])
+        totals["frontier"][0] += last
+        totals["frontier"][1] += n
+
+    print(f"{args.sites} sites, max {args.max_pages} pages/site, depth {args.depth}")
+    for name, (pages_needed, emails) in totals.items():
+        per_email = pages_needed / emails if emails else float("nan")
+        print(f"{name:>9}: {emails:4d} emails, {pages_needed:5d} pages to reach them, {per_email:5.2f} pages/email")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Pages/sec of page analysis inline versus in a process pool.
+
+    python benchmarks/bench_parse_workers.py --pages 400 --workers 0 1 2 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus import corpus_from_args
+
+from opg_scraper_pkg.analysis import analyze_page
+
+
+async def run(pages, workers: int) -> float:
+    start = time.perf_counter()
+    if workers == 0:
+        for url, html in pages:
+            analyze_page(html, url)
+    else:
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            await asyncio.gather(*(loop.run_in_executor(ex, analyze_page, html, url) for url, html in pages))
+    return time.perf_counter() - start
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--corpus", help="Direktorij sa spremljenim .html stranicama")
+    p.add_argument("--pages", type=int, default=400)
+    p.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = p.parse_args()
+
+    pages = corpus_from_args(args.corpus, args.pages)
+    mb = sum(len(h) for _, h in pages) / 1e6
+    print(f"{len(pages)} pages, {mb:.1f} MB, {os.cpu_count()} CPUs")
+    for w in args.workers:
+        elapsed = asyncio.run(run(pages, w))
+        label = "inline" if w == 0 else f"{w} workers"
+        print(f"{label:>10}: {len(pages) / elapsed:8.1f} pages/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Pages/sec of the HTML parser backends (page.PARSERS) on a page corpus.
+
+For each backend, ``tree`` times building the document alone, ``views``
+adds everything the crawler reads from a page (title, name, text, links,
+JSON-LD) and ``analyze`` is ``analyze_page`` with the prefilter off, as for
+pages with contact details. The views of every backend are checked against
+BeautifulSoup's and any page where they differ is counted.
+
+    python benchmarks/bench_parser.py --pages 400
+    python benchmarks/bench_parser.py --corpus ~/spremljene-stranice
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from corpus import corpus_from_args
+
+from opg_scraper_pkg.analysis import analyze_page
+from opg_scraper_pkg.extractor import EmailExtractor
+from opg_scraper_pkg.page import PARSERS, parse_page
+
+VIEWS = ("title", "name_hint", "text", "anchors", "json_ld", "links")
+
+
+def tree(pages, parser: str):
+    for url, html in pages:
+        parse_page(html, url, parser).tree
+
+
+def views(pages, parser: str):
+    for url, html in pages:
+        page = parse_page(html, url, parser)
+        for view in VIEWS:
+            getattr(page, view)
+
+
+def analyze(pages, parser: str):
+    extractor = EmailExtractor(parser)
+    for url, html in pages:
+        analyze_page(html, url, extractor, prefilter=False)
+
+
+def best_of(fn, pages, parser: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(pages, parser)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def mismatches(pages, parser: str) -> int:
+    return sum(
+        any(getattr(parse_page(html, url, parser), v) != getattr(parse_page(html, url, "bs4"), v) for v in VIEWS) for url, html in pages
+    )
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--corpus", help="Direktorij sa spremljenim .html stranicama")
+    p.add_argument("--pages", type=int, default=400)
+    p.add_argument("--repeat", type=int, default=3, help="Best of this many runs")
+    p.add_argument("--parsers", nargs="+", default=list(PARSERS), choices=list(PARSERS))
+    args = p.parse_args()
+
+    pages = corpus_from_args(args.corpus, args.pages)
+    mb = sum(len(h) for _, h in pages) / 1e6
+    print(f"{len(pages)} pages, {mb:.1f} MB")
+    print(f"{'parser':>8} {'tree p/s':>10} {'views p/s':>10} {'analyze p/s':>12} {'mismatches':>11}")
+    for parser in args.parsers:
+        rates = [len(pages) / best_of(fn, pages, parser, args.repeat) for fn in (tree, views, analyze)]
+        print(f"{parser:>8} {rates[0]:10.1f} {rates[1]:10.1f} {rates[2]:12.1f} {mismatches(pages, parser):11d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Skip ratio and CPU saved by the raw-HTML email pre-filter.
+
+    python benchmarks/bench_prefilter.py --corpus saved_pages/
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from corpus import corpus_from_args
+
+from opg_scraper_pkg.analysis import analyze_page
+
+
+def cpu_time(pages, prefilter: bool):
+    start = time.process_time()
+    results = [analyze_page(html, url, prefilter=prefilter) for url, html in pages]
+    return time.process_time() - start, results
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--corpus", help="Direktorij sa spremljenim .html stranicama")
+    p.add_argument("--pages", type=int, default=500)
+    args = p.parse_args()
+
+    pages = corpus_from_args(args.corpus, args.pages)
+    full_cpu, full = cpu_time(pages, prefilter=False)
+    fast_cpu, fast = cpu_time(pages, prefilter=True)
+
+    skipped = sum(r.prefiltered for r in fast)
+    lost = sum(1 for a, b in zip(full, fast) if b.prefiltered and a.emails)
+    print(f"{len(pages)} pages, skipped {skipped} ({skipped / len(pages):.0%}), pages with emails wrongly skipped: {lost}")
+    print(f"full parse: {full_cpu:.2f}s CPU, pre-filter: {fast_cpu:.2f}s CPU, saved {1 - fast_cpu / full_cpu:.0%}")
+
+
+if __name__ == "__main__":
+    main()
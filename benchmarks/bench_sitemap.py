@@ -0,0 +1,54 @@
+"""Fetches until the first email: link BFS from the seed versus sitemap-seeded frontier.
+
+Crawls synthetic site graphs (benchmarks/sites.py) with the real
+``Crawler.crawl_host``; every site serves a ``/sitemap.xml`` listing all its
+pages. Sitemap documents count as fetches. Sites with opaque ``/?page_id=N``
+URLs gain nothing from the sitemap (the URL carries no hint), so they are
+reported separately.
+
+    python benchmarks/bench_sitemap.py --sites 30 --max-pages 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import List
+
+from sites import MemoryCrawler, generate_sites, site_sitemap
+
+
+def fetches_to_first_email(crawler: MemoryCrawler, audit: List[dict]) -> int:
+    for page in audit:
+        if page["found_emails"]:
+            return crawler.fetched.index(page["url"]) + 1
+    return len(crawler.fetched)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sites", type=int, default=30)
+    p.add_argument("--max-pages", type=int, default=50)
+    p.add_argument("--depth", type=int, default=3)
+    args = p.parse_args()
+
+    sites = generate_sites(args.sites)
+    totals = {(kind, mode): [0, 0] for kind in ("readable", "opaque") for mode in ("bfs", "sitemap")}
+    for host, pages in sites.items():
+        seed = f"https://{host}/"
+        kind = "opaque" if any("page_id=" in url for url in pages) else "readable"
+        files = {f"https://{host}/sitemap.xml": site_sitemap(pages).encode()}
+        for mode in ("bfs", "sitemap"):
+            crawler = MemoryCrawler(pages, files, depth=args.depth, sitemaps=mode == "sitemap")
+            _, audit = asyncio.run(crawler.crawl_host(seed, "bench", max_pages=args.max_pages))
+            totals[kind, mode][0] += fetches_to_first_email(crawler, audit)
+            totals[kind, mode][1] += 1
+
+    print(f"{args.sites} sites, max {args.max_pages} pages/site, depth {args.depth}")
+    for (kind, mode), (fetches, n) in totals.items():
+        if n:
+            print(f"{kind:>8} {mode:>7}: {n:3d} sites, {fetches / n:5.2f} fetches to first email")
+
+
+if __name__ == "__main__":
+    main()
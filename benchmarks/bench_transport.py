@@ -0,0 +1,180 @@
+"""Fetch latency (p50/p99) of the former session setup versus the tuned transport.
+
+A local HTTPS server (self-signed certificate made with ``openssl``) serves
+generated pages for many host names, sending bodies at a limited rate per
+connection and gzip-compressing them when the client asks. Name lookups
+cost ``--dns-ms`` each. Every host is crawled like the crawler does it:
+robots.txt, then pages one after another, ``--concurrency`` hosts at once.
+Latency is measured per request, from the call to the last body byte, so it
+includes waiting for a pooled connection, DNS and TLS handshakes.
+
+    python benchmarks/bench_transport.py --hosts 64 --pages 8 --concurrency 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import multiprocessing
+import os
+import random
+import ssl
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Dict, List
+
+import aiohttp
+from aiohttp import web
+
+from bench_e2e import LocalResolver
+from corpus import generate_page
+
+from opg_scraper_pkg.transport import TransportOptions, create_session
+
+
+class SlowResolver(LocalResolver):
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lookups = 0
+
+    async def resolve(self, host: str, port: int = 0, family: int = 0):
+        self.lookups += 1
+        await asyncio.sleep(self.delay)
+        return await super().resolve(host, port, family)
+
+
+def _serve(cert: str, key: str, bandwidth: int, conn):
+    rng = random.Random(3)
+    pages = [generate_page(rng, i).encode() for i in range(50)]
+    ratios = [len(gzip.compress(page)) / len(page) for page in pages]
+    peers = set()
+
+    async def handle(request: web.Request) -> web.StreamResponse:
+        if request.path == "/__stats":
+            return web.json_response({"connections": len(peers)})
+        peers.add(request.transport.get_extra_info("peername"))
+        if request.path == "/robots.txt":
+            return web.Response(text="User-agent: *\nAllow: /\n")
+        n = sum(map(ord, request.path)) % len(pages)
+        body = pages[n]
+        compressed = "gzip" in request.headers.get("Accept-Encoding", "")
+        resp = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+        if compressed:
+            resp.enable_compression(web.ContentCoding.gzip)
+        await resp.prepare(request)
+        # A link of ``bandwidth`` bytes/s per connection, paced by the bytes actually sent
+        chunk = 8192
+        for i in range(0, len(body), chunk):
+            await resp.write(body[i : i + chunk])
+            await asyncio.sleep(chunk * (ratios[n] if compressed else 1) / bandwidth)
+        await resp.write_eof()
+        return resp
+
+    async def main():
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=context)
+        await site.start()
+        conn.send(runner.addresses[0][1])
+        while True:
+            await asyncio.sleep(3600)
+
+    asyncio.run(main())
+
+
+def legacy_session(resolver) -> aiohttp.ClientSession:
+    # main_async before the transport options
+    connector = aiohttp.TCPConnector(limit=10, resolver=resolver, ssl=False)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=20))
+
+
+async def crawl(session: aiohttp.ClientSession, port: int, hosts: int, pages: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def get(url: str):
+        started = time.perf_counter()
+        async with session.get(url) as resp:
+            await resp.read()
+        latencies.append(time.perf_counter() - started)
+
+    async def host(i: int):
+        async with sem:
+            base = f"https://opg-{i}.hr:{port}"
+            await get(f"{base}/robots.txt")
+            for p in range(pages):
+                await get(f"{base}/stranica-{p}")
+
+    await asyncio.gather(*(host(i) for i in range(hosts)))
+    return latencies
+
+
+async def run_config(name: str, port: int, args) -> Dict[str, float]:
+    resolver = SlowResolver(args.dns_ms / 1000)
+    if name == "legacy":
+        session = legacy_session(resolver)
+    else:
+        options = TransportOptions(compression=name != "tuned-no-compression")
+        session = create_session(options, resolver=resolver, ssl=False)
+    async with session:
+        started = time.perf_counter()
+        latencies = await crawl(session, port, args.hosts, args.pages, args.concurrency)
+        wall = time.perf_counter() - started
+        async with session.get(f"https://stats.local:{port}/__stats") as resp:
+            connections = (await resp.json())["connections"]
+    latencies.sort()
+    return {
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p99_ms": 1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "wall_s": wall,
+        "dns_lookups": resolver.lookups,
+        "connections": connections,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--hosts", type=int, default=64)
+    p.add_argument("--pages", type=int, default=8, help="Pages per host, fetched one after another")
+    p.add_argument("--concurrency", type=int, default=32, help="Hosts crawled at once (--concurrency of the scraper)")
+    p.add_argument("--dns-ms", type=float, default=20.0, help="Cost of one name lookup")
+    p.add_argument("--bandwidth-kb", type=int, default=512, help="Bytes per second per connection, in KiB")
+    p.add_argument("--configs", nargs="+", default=["legacy", "tuned", "tuned-no-compression"])
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+            check=True,
+            capture_output=True,
+        )
+        ctx = multiprocessing.get_context("spawn")
+        parent, child = ctx.Pipe()
+        server = ctx.Process(target=_serve, args=(cert, key, args.bandwidth_kb * 1024, child), daemon=True)
+        server.start()
+        port = parent.recv()
+
+    requests = args.hosts * (args.pages + 1)
+    print(f"{args.hosts} hosts x {args.pages + 1} requests, {args.concurrency} hosts at once, DNS {args.dns_ms:g} ms")
+    print(f"{'config':>22} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>7} {'DNS':>5} {'TLS':>5}")
+    connections = 0
+    try:
+        for name in args.configs:
+            r = asyncio.run(run_config(name, port, args))
+            new, connections = r["connections"] - connections, r["connections"]
+            print(f"{name:>22} {r['p50_ms']:8.1f} {r['p99_ms']:8.1f} {requests / r['wall_s']:7.1f} {r['dns_lookups']:5d} {new:5d}")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
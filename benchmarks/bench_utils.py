@@ -0,0 +1,83 @@
+"""Microbenchmarks for the hot-path helpers in opg_scraper_pkg.utils.
+
+The functions follow the pytest-benchmark fixture convention, so with that
+plugin installed the suite can be run and compared across commits:
+
+    pytest benchmarks/bench_utils.py --benchmark-autosave
+    pytest benchmarks/bench_utils.py --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Without it, ``python benchmarks/bench_utils.py`` times each one with timeit.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import synthetic_corpus  # noqa: E402
+
+from opg_scraper_pkg.page import ParsedPage  # noqa: E402
+from opg_scraper_pkg.utils import (  # noqa: E402
+    contains_opt_out,
+    guess_name_from_page,
+    is_role_based,
+    is_valid_email,
+    normalize_email,
+    score_link,
+)
+
+_rng = random.Random(3)
+EMAILS = [f"{p}{i}@opg-{i % 17}.hr" for i, p in enumerate(_rng.choices(["info", "ana.", "kontakt", "prodaja", "opg."], k=500))]
+PAGES = [ParsedPage(html, url) for url, html in synthetic_corpus(40)]
+TEXTS = [p.text for p in PAGES]
+LOWER_TEXTS = [p.text_lower for p in PAGES]
+HREFS = [("/kontakt", "Kontakt"), ("/proizvodi/med", "Med"), ("/?page_id=12", "O nama"), ("/galerija/", "Galerija")] * 50
+for page in PAGES:
+    page.soup  # parse up front; only the helpers are measured
+
+
+def test_is_valid_email(benchmark):
+    benchmark(lambda: [is_valid_email(e) for e in EMAILS])
+
+
+def test_normalize_email(benchmark):
+    benchmark(lambda: [normalize_email(" " + e + ".") for e in EMAILS])
+
+
+def test_is_role_based(benchmark):
+    benchmark(lambda: [is_role_based(e) for e in EMAILS])
+
+
+def test_contains_opt_out(benchmark):
+    benchmark(lambda: [contains_opt_out(t) for t in TEXTS])
+
+
+def test_contains_opt_out_lowered(benchmark):
+    benchmark(lambda: [contains_opt_out(t, already_lower=True) for t in LOWER_TEXTS])
+
+
+def test_guess_name_from_page(benchmark):
+    benchmark(lambda: [guess_name_from_page(p.soup, p.title) for p in PAGES])
+
+
+def test_score_link(benchmark):
+    benchmark(lambda: [score_link(h, t, 1) for h, t in HREFS])
+
+
+def _timeit_benchmark(func):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=5, number=number)) / number
+    return best
+
+
+if __name__ == "__main__":
+    for name, fn in sorted(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            timings = []
+            fn(lambda f: timings.append(_timeit_benchmark(f)))
+            print(f"{name[5:]:>22}: {timings[0] * 1e6:10.1f} µs/call")
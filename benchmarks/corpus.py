@@ -0,0 +1,73 @@
+"""Page corpus shared by the benchmark scripts.
+
+Pages come either from a directory of saved ``.html`` files (``--corpus``) or
+from a deterministic generator that imitates typical OPG sites: navigation,
+long product descriptions, galleries and, on some pages, contact details.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+WORDS = (
+    "domaći med jabuke krumpir vino bučino ulje sir vrhnje povrće voće tržnica "
+    "ekološki uzgoj obitelj tradicija polje vrt berba sezona dostava narudžba "
+    "Međimurje Zagorje Podravina kvaliteta proizvod okus priroda"
+).split()
+
+NAV = ("pocetna", "o-nama", "proizvodi", "galerija", "novosti", "kontakt")
+
+
+def _paragraphs(rng: random.Random, n: int) -> str:
+    return "".join("<p>" + " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + "</p>" for _ in range(n))
+
+
+def generate_page(rng: random.Random, index: int, host: str = "opg-primjer.hr", with_email: Optional[bool] = None) -> str:
+    if with_email is None:
+        with_email = rng.random() < 0.2
+    nav = "".join(f"<li><a href='/{slug}'>{slug.replace('-', ' ').title()}</a></li>" for slug in NAV)
+    links = "".join(f"<a href='/proizvodi/{index}-{k}'>Proizvod {k}</a> " for k in range(rng.randint(5, 30)))
+    gallery = "".join(f"<img src='/slike/{index}-{k}.jpg' alt='slika {k}'>" for k in range(rng.randint(0, 20)))
+    contact = ""
+    if with_email:
+        contact = (
+            f"<div class='kontakt'><a href='mailto:opg{index}@{host}'>Pišite nam</a>"
+            f"<p>Telefon: 040 {index:03d} 123, email: prodaja{index}@{host}</p></div>"
+            "<script type='application/ld+json'>"
+            f"{{\"@type\": \"LocalBusiness\", \"email\": \"info@{host}\"}}</script>"
+        )
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>OPG Primjer {index} | Domaći proizvodi</title>"
+        "<meta property='og:site_name' content='OPG Primjer'>"
+        "<style>@media (max-width: 600px) { .nav { display: none } }</style>"
+        "</head><body>"
+        f"<nav class='nav'><ul>{nav}</ul></nav><h1>OPG Primjer {index}</h1>"
+        f"{_paragraphs(rng, rng.randint(3, 25))}{links}{gallery}{contact}"
+        "<footer>&copy; OPG Primjer</footer></body></html>"
+    )
+
+
+def synthetic_corpus(n: int, seed: int = 1) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    return [(f"https://opg-primjer.hr/stranica-{i}", generate_page(rng, i)) for i in range(n)]
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    pages = []
+    for path in sorted(Path(directory).rglob("*.htm*")):
+        pages.append((f"https://{path.parent.name or 'corpus'}/{path.name}", path.read_text(encoding="utf-8", errors="ignore")))
+    return pages
+
+
+def corpus_from_args(corpus_dir: Optional[str], n: int) -> List[Tuple[str, str]]:
+    if corpus_dir:
+        return load_corpus(corpus_dir)
+    return synthetic_corpus(n)
@@ -0,0 +1,128 @@
+"""Synthetic OPG site graphs for crawl-order benchmarks.
+
+Each site has a home page, a navigation menu, product and news pages, and a
+contact page reachable at a configurable depth. Only the contact page (and
+occasionally an "o nama" page) carries email addresses. Like many WordPress
+sites, some use opaque ``/?page_id=N`` URLs, so only the anchor text says
+which link leads to the contact page. ``MemoryCrawler`` crawls them with
+the real ``Crawler.crawl_host``, fetches served from memory.
+"""
+
+from __future__ import annotations
+
+import html
+import random
+from typing import Dict, List, Optional
+
+from corpus import _paragraphs
+
+from opg_scraper_pkg.crawl import Crawler
+from opg_scraper_pkg.extractor import EmailExtractor
+from opg_scraper_pkg.rate_limiter import HostRateLimiter
+
+
+def generate_site(
+    rng: random.Random,
+    host: str,
+    products: int = 60,
+    news: int = 30,
+    contact_depth: int = 1,
+    opaque_urls: bool = False,
+) -> Dict[str, str]:
+    base = f"https://{host}"
+    pages: Dict[str, List[str]] = {}
+    ids = iter(rng.sample(range(2, 999), 10))
+    contact = f"/?page_id={next(ids)}" if opaque_urls else "/kontakt/"
+    about = f"/?page_id={next(ids)}" if opaque_urls else "/o-nama/"
+
+    def link(path: str, label: str) -> str:
+        return f"<a href='{path}'>{label}</a>"
+
+    nav = [("/proizvodi/", "Proizvodi"), ("/novosti/", "Novosti"), ("/galerija/", "Galerija")]
+    # The contact page hangs off a chain of intermediate pages when contact_depth > 1
+    chain = [f"/?page_id={next(ids)}" if opaque_urls else f"/info-{k}/" for k in range(1, contact_depth)]
+    contact_parent = chain[-1] if chain else "/"
+    home_links = [link(p, l) for p, l in nav] + [link(f"/proizvodi/p-{i}/", f"Proizvod {i}") for i in range(products)]
+    if chain:
+        home_links.append(link(chain[0], "O nama i kontakt"))
+    pages["/"] = home_links
+    for i, path in enumerate(chain):
+        nxt = chain[i + 1] if i + 1 < len(chain) else None
+        pages[path] = [link(nxt, "Kontakt podaci")] if nxt else []
+    pages.setdefault(contact_parent, []).append(link(contact, "Kontakt"))
+    pages[contact] = [link("/", "Početna")]
+    pages[about] = [link("/", "Početna")]
+    pages["/proizvodi/"] = [link(f"/proizvodi/p-{i}/", f"Proizvod {i}") for i in range(products)]
+    pages["/novosti/"] = [link(f"/novosti/n-{i}/", f"Vijest {i}") for i in range(news)]
+    pages["/galerija/"] = [link(f"/proizvodi/p-{rng.randrange(products)}/", "Slika") for _ in range(10)]
+    for i in range(products):
+        pages[f"/proizvodi/p-{i}/"] = [link(f"/proizvodi/p-{rng.randrange(products)}/", "Slično") for _ in range(3)]
+    for i in range(news):
+        pages[f"/novosti/n-{i}/"] = [link(about, "O nama")] if i % 5 == 0 else []
+
+    out: Dict[str, str] = {}
+    for path, links in pages.items():
+        body = _paragraphs(rng, 2) + " ".join(links)
+        if path == contact:
+            body += f"<a href='mailto:opg@{host}'>Email</a> <p>Prodaja: prodaja@{host}</p>"
+        elif path == about and rng.random() < 0.5:
+            body += f"<p>Vlasnik: vlasnik@{host}</p>"
+        out[base + path] = f"<html><head><title>OPG {host}</title></head><body>{body}</body></html>"
+    return out
+
+
+def generate_sites(n: int, seed: int = 7) -> Dict[str, Dict[str, str]]:
+    rng = random.Random(seed)
+    return {
+        f"opg-{i}.hr": generate_site(
+            rng,
+            f"opg-{i}.hr",
+            products=rng.randint(20, 80),
+            news=rng.randint(5, 40),
+            contact_depth=rng.randint(1, 3),
+            opaque_urls=rng.random() < 0.5,
+        )
+        for i in range(n)
+    }
+
+
+def site_sitemap(pages: Dict[str, str]) -> str:
+    """``sitemap.xml`` listing every page of a generated site, in URL order like most generators."""
+    body = "".join(f"<url><loc>{html.escape(url)}</loc></url>" for url in sorted(pages))
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</urlset>'
+
+
+class MemoryCrawler(Crawler):
+    """``Crawler`` over generated pages (and sitemap ``files``), without a rate limit; every fetch is logged in ``fetched``."""
+
+    def __init__(
+        self,
+        pages: Dict[str, str],
+        files: Optional[Dict[str, bytes]] = None,
+        depth: int = 3,
+        include_role_emails: bool = True,
+        **kw,
+    ):
+        super().__init__(
+            session=None,
+            limiter=HostRateLimiter(0),
+            extractor=EmailExtractor(),
+            depth=depth,
+            timeout=1,
+            dry_run=False,
+            respect_opt_out=False,
+            include_role_emails=include_role_emails,
+            **kw,
+        )
+        self.pages = pages
+        self.files = files or {}
+        self.fetched: List[str] = []
+
+    async def _fetch_html(self, url: str) -> str:
+        self.fetched.append(url)
+        return self.pages.get(url, "")
+
+    async def _fetch_chunks(self, url: str):
+        self.fetched.append(url)
+        if url in self.files:
+            yield self.files[url]
@@ -10,7 +10,7 @@ import asyncio
 import logging
 from typing import Optional, List
 
-from opg_scraper_pkg.cli import parse_args, setup_logging, main_async, run_tests
+from opg_scraper_pkg.cli import parse_args, setup_logging, main_async, run_profiled, run_tests
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -19,7 +19,10 @@ def main(argv: Optional[List[str]] = None) -> int:
     if args.run_tests:
         return run_tests()
     try:
-        asyncio.run(main_async(args))
+        if args.profile:
+            run_profiled(args)
+        else:
+            asyncio.run(main_async(args))
         return 0
     except KeyboardInterrupt:
         logging.warning("Prekinuto od strane korisnika.")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .extractor import EmailExtractor
+from .page import parse_page, scan_links, scan_title
+from .utils import contains_opt_out
+
+
+_DEFAULT_EXTRACTOR = EmailExtractor()
+
+
+@dataclass
+class PageResult:
+    """Compact, picklable outcome of analysing one page.
+
+    This is all the crawler needs from a page, so it is what parse workers
+    send back instead of the parsed document.
+    """
+
+    url: str
+    title: str
+    name_hint: str = ""
+    opt_out: bool = False
+    mentions_opg: bool = False
+    emails: List[Tuple[str, str]] = field(default_factory=list)
+    links: List[Tuple[str, str, str]] = field(default_factory=list)
+    prefiltered: bool = False
+    # Worker-side timings, so they survive the trip back from a parse process
+    parse_seconds: float = field(default=0.0, compare=False)
+    extract_seconds: float = field(default=0.0, compare=False)
+
+
+def analyze_page(html: str, url: str, extractor: Optional[EmailExtractor] = None, prefilter: bool = True) -> PageResult:
+    """Parse ``html`` once and return everything the crawler uses.
+
+    Pages without any email signal in the raw HTML are not parsed at all;
+    their title and links come from a regex scan and opt-out is not evaluated.
+    The rest are parsed with the extractor's parser backend.
+    Module-level so it can run in a ``ProcessPoolExecutor`` worker.
+    """
+    extractor = extractor or _DEFAULT_EXTRACTOR
+    started = time.perf_counter()
+    if prefilter and not extractor.has_email_signal(html):
+        result = PageResult(url=url, title=scan_title(html), links=scan_links(html, url), prefiltered=True)
+        result.parse_seconds = time.perf_counter() - started
+        return result
+    page = parse_page(html, url, extractor.parser)
+    page.tree  # parse up front so the extract timing covers extraction only
+    extract_started = time.perf_counter()
+    emails = extractor.extract(page, url)
+    extract_seconds = time.perf_counter() - extract_started
+    title = page.title
+    result = PageResult(
+        url=url,
+        title=title,
+        opt_out=contains_opt_out(page.text_lower, already_lower=True),
+        emails=emails,
+        links=page.links,
+    )
+    if emails:
+        result.name_hint = page.name_hint
+        result.mentions_opg = "opg" in (title or "").lower() or "opg" in page.text_lower
+    result.extract_seconds = extract_seconds
+    result.parse_seconds = time.perf_counter() - started - extract_seconds
+    return result
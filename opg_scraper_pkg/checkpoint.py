@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+from .crawl import HostCrawlState
+from .scheduler import HostRegistry, PageBudget
+
+
+# 2: one crawl state per host (seeds of a host share a frontier)
+CHECKPOINT_VERSION = 2
+
+
+@dataclass
+class CountyProgress:
+    seeds: Optional[List[str]] = None
+    budget: Optional[PageBudget] = None
+    hosts_done: Set[str] = field(default_factory=set)
+    active: Dict[str, HostCrawlState] = field(default_factory=dict)
+    done: bool = False
+
+    def to_dict(self) -> dict:
+        budget = None
+        if self.budget is not None:
+            # Pages popped but not processed yet go back into the budget
+            in_flight = sum(1 for st in self.active.values() if st.in_flight is not None)
+            budget = {"total": self.budget.total, "remaining": self.budget.remaining + in_flight}
+        return {
+            "seeds": self.seeds,
+            "budget": budget,
+            "hosts_done": sorted(self.hosts_done),
+            "active": {host: st.to_dict() for host, st in self.active.items()},
+            "done": self.done,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CountyProgress":
+        budget = None
+        if data.get("budget"):
+            budget = PageBudget(data["budget"]["total"])
+            budget.remaining = data["budget"]["remaining"]
+        return cls(
+            seeds=data.get("seeds"),
+            budget=budget,
+            hosts_done=set(data.get("hosts_done", [])),
+            active={host: HostCrawlState.from_dict(st) for host, st in data.get("active", {}).items()},
+            done=data.get("done", False),
+        )
+
+
+class Checkpoint:
+    """Crawl state of a whole run, periodically written to a JSON file.
+
+    Records of finished hosts are already in the streamed CSV/audit output;
+    the checkpoint keeps what is not: seeds, remaining county budgets, the
+    frontier and records of every unfinished host, and the host registry.
+    """
+
+    def __init__(self, path: str, args: argparse.Namespace):
+        self.path = path
+        self.args = vars(args).copy()
+        self.counties: Dict[str, CountyProgress] = {}
+        self.registry: Optional[HostRegistry] = None
+        self.run_id: Optional[int] = None
+        self.before_save: Optional[Callable[[], None]] = None
+
+    def county(self, name: str) -> CountyProgress:
+        return self.counties.setdefault(name, CountyProgress())
+
+    def to_dict(self) -> dict:
+        return {
+            "version": CHECKPOINT_VERSION,
+            "args": self.args,
+            "run_id": self.run_id,
+            "registry": self.registry.to_dict() if self.registry is not None else None,
+            "counties": {name: cp.to_dict() for name, cp in self.counties.items()},
+        }
+
+    def save(self):
+        if self.before_save is not None:
+            self.before_save()
+        tmp_path = self.path + ".tmp"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        logging.debug("Checkpoint saved to %s", self.path)
+
+    async def run_periodic(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.save()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Nepodržana verzija checkpointa: {data.get('version')}")
+        cp = cls(path, argparse.Namespace(**data["args"]))
+        cp.run_id = data.get("run_id")
+        if data.get("registry"):
+            cp.registry = HostRegistry.from_dict(data["registry"])
+        cp.counties = {name: CountyProgress.from_dict(c) for name, c in data["counties"].items()}
+        return cp
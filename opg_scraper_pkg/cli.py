@@ -2,20 +2,39 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import functools
 import logging
 import os
+import socket
 import sys
-from typing import List, Optional, Tuple
-from urllib.parse import urlparse
+from dataclasses import dataclass
+from typing import Any, List, Optional
 
 from .config import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_CONNECTIONS_PER_HOST,
+    DEFAULT_BLOCKED_DOMAINS,
+    DEFAULT_CACHE_TTL_HOURS,
     DEFAULT_COUNTIES,
     DEFAULT_DEPTH,
+    DEFAULT_DNS_TTL,
+    DEFAULT_KEEPALIVE,
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_MAX_HOST_DELAY,
+    DEFAULT_MAX_PAGE_BYTES,
     DEFAULT_MAX_RESULTS_PER_COUNTY,
+    DEFAULT_PARSER,
     DEFAULT_RATE_LIMIT_SECONDS,
+    DEFAULT_READ_TIMEOUT,
     DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_ROBOTS_TTL_HOURS,
+    DEFAULT_SEARCH_TTL_HOURS,
+    MAX_SEEDS_PER_HOST,
     USER_AGENT,
 )
+from .utils import is_role_based, site_host
 
 
 def setup_logging(log_file: Optional[str] = None, verbose: bool = True):
@@ -33,16 +52,66 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p.add_argument("--counties-file", help="Put do datoteke s jednom županijom po liniji")
     p.add_argument("--max-results-per-county", type=int, default=DEFAULT_MAX_RESULTS_PER_COUNTY, help="Maksimalan broj seed rezultata pretrage po županiji")
     p.add_argument("--max-pages-per-county", type=int, default=200, help="Maksimalan broj stranica za crawl po županiji (ukupno preko hostova)")
+    p.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Broj hostova koji se crawlaju istovremeno (per-host razmak određuje --rate-limit)")
+    p.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT_SECONDS, help="Najmanji razmak između zahtjeva istom hostu u sekundama; raste kod grešaka, 429/503 i sporih odgovora")
+    p.add_argument("--max-host-delay", type=float, default=DEFAULT_MAX_HOST_DELAY, help="Najveći razmak između zahtjeva istom hostu nakon usporavanja")
+    p.add_argument("--parallel-counties", action="store_true", help="Obradi sve županije istovremeno; host koji se pojavi u više županija crawla se samo jednom")
+    p.add_argument("--parse-workers", type=int, default=0, help="Broj procesa za parsiranje HTML-a (0 = parsiranje u glavnom procesu)")
+    p.add_argument("--parser", choices=("lxml", "bs4"), default=DEFAULT_PARSER, help="HTML parser: lxml izravno (brže) ili BeautifulSoup (prijašnje ponašanje); isti rezultati")
+    p.add_argument("--stop-after-idle", type=int, default=0, help="Prekini crawl hosta nakon N stranica bez nove adrese, kad je već nađena ne-role adresa (0 = isključeno)")
+    p.add_argument("--stop-after-contact-pages", action="store_true", help="Prekini crawl hosta kad je nađena ne-role adresa i više nema kontakt linkova u redu")
+    p.add_argument("--sitemaps", action="store_true", help="Prije crawla pročitaj sitemap.xml (i sitemape iz robots.txt) i kontakt stranice stavi na početak reda")
+    p.add_argument("--no-dedup", action="store_true", help="Ne preskači stranice (gotovo) istog sadržaja kao već obrađena stranica hosta (npr. verzije za ispis)")
     p.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="Maksimalna dubina internih linkova")
     p.add_argument("--output", default="opg_emails.csv", help="Put do izlaznog CSV-a")
     p.add_argument("--dry-run", action="store_true", help="Ne dohvaćaj, samo ispiši planirane zahtjeve")
     p.add_argument("--respect-opt-out", action="store_true", help="Filtriraj adrese s web-stranica s eksplicitnom napomenom o nekontaktiranju/privatnosti")
+    p.add_argument("--ignore-robots", action="store_true", help="Ne provjeravaj robots.txt (zadano se poštuju Disallow i Crawl-delay)")
     p.add_argument("--include-role-emails", action="store_true", help="Uključi role-based adrese (npr. info@)")
+    p.add_argument("--audit-gzip", action="store_true", help="Zapiši audit kao gzip JSON Lines (.jsonl.gz)")
+    p.add_argument("--flush-interval", type=float, default=10.0, help="Koliko često (u sekundama) se izlazne datoteke spremaju na disk tijekom crawla")
     p.add_argument("--log-file", default="opg_scraper.log", help="Put do log datoteke")
-    p.add_argument("--timeout", type=int, default=DEFAULT_REQUEST_TIMEOUT, help="HTTP timeout u sekundama")
+    p.add_argument("--max-page-bytes", type=int, default=DEFAULT_MAX_PAGE_BYTES, help="Najviše bajtova koji se čitaju po stranici; veće stranice se skraćuju, a one s većim Content-Length preskaču")
+    p.add_argument("--timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT, help="Ukupni HTTP timeout zahtjeva u sekundama (0 = bez ograničenja)")
+    p.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Najdulje čekanje na uspostavu veze (uključujući slobodno mjesto u poolu) u sekundama")
+    p.add_argument("--read-timeout", type=float, default=DEFAULT_READ_TIMEOUT, help="Najdulje čekanje na sljedeći dio odgovora u sekundama")
+    p.add_argument("--max-connections", type=int, default=DEFAULT_CONNECTION_LIMIT, help="Najviše otvorenih veza ukupno (0 = bez ograničenja)")
+    p.add_argument("--max-connections-per-host", type=int, default=DEFAULT_CONNECTIONS_PER_HOST, help="Najviše otvorenih veza prema jednom hostu (0 = bez ograničenja)")
+    p.add_argument("--dns-ttl", type=float, default=DEFAULT_DNS_TTL, help="Koliko sekundi se pamte DNS odgovori (0 = bez DNS cachea)")
+    p.add_argument("--keepalive", type=float, default=DEFAULT_KEEPALIVE, help="Koliko sekundi neaktivna veza ostaje otvorena za ponovnu upotrebu")
+    p.add_argument("--no-compression", action="store_true", help="Ne traži gzip/deflate/br kompresiju odgovora")
+    p.add_argument("--cache-dir", help="Direktorij za HTTP cache (pretraga i stranice); uključuje uvjetno ponovno dohvaćanje")
+    p.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL_HOURS, help="Koliko sati se cache unos koristi bez provjere na mreži")
+    p.add_argument("--search-ttl", type=float, default=DEFAULT_SEARCH_TTL_HOURS, help="Koliko sati se rezultati pretrage iz cachea koriste bez ponovnog upita (uz --cache-dir)")
+    p.add_argument("--search-url", help="Adresa DuckDuckGo HTML pretrage (zadano https://duckduckgo.com/html/; npr. lokalna zamjena u benchmarku)")
+    p.add_argument("--offline", action="store_true", help="Koristi samo cache, bez mrežnih zahtjeva (zahtijeva --cache-dir)")
+    p.add_argument("--state-db", help="SQLite stanje između pokretanja: first/last seen po adresi, preskakanje nepromijenjenih stranica i delta datoteka")
+    p.add_argument("--seed-index", help="SQLite indeks prinosa po hostu (stranice, adrese) kroz pokretanja; određuje redoslijed i broj stranica po hostu")
+    p.add_argument("--blocklist", help="Datoteka s dodatnim domenama koje se ne crawlaju (jedna po liniji; uz ugrađeni popis društvenih mreža, portala i registara)")
+    p.add_argument("--allowlist", help="Datoteka s domenama koje se crawlaju i ako su na blocklisti")
+    p.add_argument("--export-seed-index", help="Na kraju zapiši indeks prinosa hostova u ovaj CSV")
+    p.add_argument("--checkpoint", help="Periodično spremaj stanje crawla u ovu JSON datoteku (za --resume)")
+    p.add_argument("--checkpoint-interval", type=float, default=60.0, help="Razmak između checkpointa u sekundama")
+    p.add_argument("--resume", help="Nastavi prekinuto pokretanje iz checkpoint datoteke (ostali argumenti se preuzimaju iz nje)")
+    p.add_argument("--metrics-json", help="Zapiši metrike (vremena i brojače po fazi, hostu i županiji) kao JSON sažetak")
+    p.add_argument("--metrics-prom", help="Zapiši metrike u Prometheus tekstualnom formatu (npr. za node_exporter textfile collector)")
+    p.add_argument("--metrics-interval", type=float, default=30.0, help="Razmak između zapisivanja metrika tijekom rada u sekundama")
+    p.add_argument("--profile", help="Pokreni pod cProfileom i spremi statistiku u ovu datoteku (sažetak u .txt pokraj nje; procesi za parsiranje nisu uključeni)")
+    p.add_argument("--queue", help="SQLite red hostova za distribuirani crawl na više procesa/računala (uz --role)")
+    p.add_argument("--role", choices=("coordinator", "worker"), help="coordinator: pretraga i punjenje reda; worker: crawl hostova uzetih iz reda")
+    p.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}", help="Ime workera u redu (zadano host-pid)")
+    p.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS, help="Trajanje najma hosta; worker ga obnavlja tijekom crawla, a istekli najam preuzima drugi worker")
+    p.add_argument("--merge-outputs", nargs="+", metavar="CSV", help="Spoji CSV-ove (i pripadne audite) workera u --output bez duplikata i izađi")
     p.add_argument("--run-tests", action="store_true", help="Pokreni osnovne testove i izađi")
     p.add_argument("--no-progress", action="store_true", help="Onemogući progress barove")
-    return p.parse_args(argv)
+    args = p.parse_args(argv)
+    if args.offline and not args.cache_dir:
+        p.error("--offline zahtijeva --cache-dir")
+    if bool(args.queue) != bool(args.role) and not args.merge_outputs:
+        p.error("--queue i --role idu zajedno")
+    if args.role and (args.checkpoint or args.resume):
+        p.error("--role ne podržava --checkpoint/--resume; stanje distribuiranog crawla je u redu (--queue)")
+    return args
 
 
 def load_counties(args: argparse.Namespace) -> List[str]:
@@ -54,115 +123,399 @@ def load_counties(args: argparse.Namespace) -> List[str]:
     return list(DEFAULT_COUNTIES)
 
 
-async def run_for_county(
-    county: str,
-    session,
-    limiter,
-    args: argparse.Namespace,
-    pages_pbar=None,
-):
-    # Local imports to avoid requiring aiohttp for --run-tests
-    from tqdm import tqdm
-    from .search import Searcher
+@dataclass
+class RunContext:
+    """Objects shared by every county of one run."""
+
+    session: Any
+    limiter: Any
+    pool: Any
+    pages_pbar: Any = None
+    registry: Any = None
+    parse_executor: Any = None
+    cache: Any = None
+    state: Any = None
+    sink: Any = None
+    checkpoint: Any = None
+    robots: Any = None
+    search_cache: Any = None
+    seed_index: Any = None
+    metrics: Any = None
+    queue: Any = None
+
+
+def build_crawler(ctx: RunContext, args: argparse.Namespace):
     from .extractor import EmailExtractor
-    from .crawl import Crawler
-
-    searcher = Searcher(session, limiter, dry_run=args.dry_run, timeout=args.timeout)
-    extractor = EmailExtractor()
-    crawler = Crawler(
-        session=session,
-        limiter=limiter,
-        extractor=extractor,
+    from .crawl import Crawler, SaturationPolicy
+
+    return Crawler(
+        session=ctx.session,
+        limiter=ctx.limiter,
+        extractor=EmailExtractor(parser=args.parser),
         depth=args.depth,
-        timeout=args.timeout,
+        timeout=ctx.session.timeout,
         dry_run=args.dry_run,
         respect_opt_out=args.respect_opt_out,
         include_role_emails=args.include_role_emails,
+        parse_executor=ctx.parse_executor,
+        saturation=SaturationPolicy(idle_pages=args.stop_after_idle, after_contact_pages=args.stop_after_contact_pages),
+        cache=ctx.cache,
+        state=ctx.state,
+        robots=ctx.robots,
+        sitemaps=args.sitemaps,
+        max_page_bytes=args.max_page_bytes,
+        dedup_content=not args.no_dedup,
+        metrics=ctx.metrics,
+    )
+
+
+def record_host(ctx: RunContext, host: str, records: list, pages: List[dict], fetched: int):
+    """Output a finished host and feed its yield per fetched page (failed fetches
+    included, unlike the audit ``pages``) back to the seed index."""
+    ctx.sink.add(records, pages)
+    if fetched:
+        emails = {r.email.lower() for r in records}
+        ctx.seed_index.record(host, fetched, len(emails), sum(1 for e in emails if not is_role_based(e)))
+
+
+async def run_for_county(county: str, ctx: RunContext, args: argparse.Namespace):
+    # Local imports to avoid requiring aiohttp for --run-tests
+    from tqdm import tqdm
+    from .search import DDG_HTML_URL, Searcher
+    from .checkpoint import CountyProgress
+    from .crawl import HostCrawlState
+    from .scheduler import PageBudget, host_page_cap
+
+    progress = ctx.checkpoint.county(county) if ctx.checkpoint else CountyProgress()
+    if progress.done:
+        logging.info("[%s] Već obrađeno prema checkpointu; preskačem", county)
+        return
+
+    searcher = Searcher(
+        ctx.session,
+        ctx.limiter,
+        dry_run=args.dry_run,
+        timeout=ctx.session.timeout,
+        search_cache=ctx.search_cache,
+        search_url=args.search_url or DDG_HTML_URL,
+        parser=args.parser,
     )
+    crawler = build_crawler(ctx, args)
 
     search_steps_total = len(Searcher.county_queries(county))
     search_pbar = None if args.no_progress else tqdm(total=search_steps_total, desc=f"Search {county}", leave=False)
     on_search_step = (lambda n: search_pbar.update(n)) if search_pbar else None
 
-    logging.info("[%s] Traženje seed URL-ova...", county)
-    seeds = await searcher.discover_seeds(county, max_results=args.max_results_per_county, on_progress=on_search_step)
+    if progress.seeds is None:
+        logging.info("[%s] Traženje seed URL-ova...", county)
+        seeds = await searcher.discover_seeds(county, max_results=args.max_results_per_county, on_progress=on_search_step)
+        progress.seeds = seeds
+        logging.info("[%s] Pronađeno %d seed URL-ova", county, len(seeds))
+    else:
+        seeds = progress.seeds
+        logging.info("[%s] %d seed URL-ova iz checkpointa", county, len(seeds))
     if search_pbar:
         search_pbar.close()
-    logging.info("[%s] Pronađeno %d seed URL-ova", county, len(seeds))
     if args.dry_run:
         for s in seeds:
             logging.info("[dry-run] plan crawl seed: %s", s)
-        return [], []
-
-    records = []
-    audit_pages = []
+        return
 
     by_host: dict[str, List[str]] = {}
     for s in seeds:
-        host = urlparse(s).hostname or s
+        host = site_host(s) or s
         by_host.setdefault(host, []).append(s)
+    index = ctx.seed_index
+    blocked = [h for h in by_host if index.is_blocked(h)]
+    if blocked:
+        logging.info("[%s] Preskačem %d hostova s blockliste: %s", county, len(blocked), ", ".join(blocked))
+
+    # Hosts that produced contacts in earlier runs go first. Every result on a
+    # host joins one crawl; pages are charged to the county budget as they are
+    # fetched, so hosts that stop early leave their share to the ones after them.
+    plan = [(host, by_host[host][:MAX_SEEDS_PER_HOST]) for host in index.order(h for h in by_host if h not in blocked)]
+    if ctx.queue is not None:
+        # Coordinator: workers crawl the hosts and draw on the county budget from the queue
+        ctx.queue.set_budget(county, args.max_pages_per_county)
+        added = sum(ctx.queue.add(county, host, host_seeds, host_page_cap(index.relative_yield(host))) for host, host_seeds in plan)
+        logging.info("[%s] U red dodano %d hostova (%d već u redu)", county, added, len(plan) - added)
+        progress.done = True
+        return
+
+    registry = ctx.registry
 
-    remaining = args.max_pages_per_county
-    for host, host_seeds in by_host.items():
-        if remaining <= 0:
-            break
-        per_host_pages = max(5, min(remaining, 50))
-        logging.info("[%s] Crawl host %s (limit %d)", county, host, per_host_pages)
-        for seed in host_seeds[:2]:
-            recs, pages = await crawler.crawl_host(seed, county, max_pages=per_host_pages, on_page=(lambda n: pages_pbar.update(n) if pages_pbar else None))
-            records.extend(recs)
-            audit_pages.extend(pages)
-            remaining -= per_host_pages
-            if remaining <= 0:
-                break
+    if progress.budget is None:
+        progress.budget = PageBudget(args.max_pages_per_county)
+    budget = progress.budget
+    on_page = (lambda n: ctx.pages_pbar.update(n)) if ctx.pages_pbar else None
 
-    return records, audit_pages
+    async def crawl_one(host: str, host_seeds: List[str]):
+        # Continue an unfinished host from the checkpoint, if any
+        st = progress.active.get(host)
+        if st is None:
+            if budget.exhausted:
+                return host, [], [], 0
+            if registry is not None and not registry.claim(host, county):
+                logging.info("[%s] Host %s već crawla županija %s; preskačem", county, host, registry.owner(host))
+                return host, [], [], 0
+            st = progress.active[host] = HostCrawlState.start(host_seeds[0], host_seeds[1:])
+        else:
+            logging.info("[%s] Nastavak crawla hosta %s iz checkpointa", county, host)
+        limit = host_page_cap(index.relative_yield(host))
+        logging.info("[%s] Crawl host %s (%d seedova, limit %d)", county, host, len(host_seeds), limit)
+        await crawler.crawl_host(st.seed_url, county, max_pages=limit, on_page=on_page, budget=budget, state=st)
+        return host, st.records, st.audit_pages, st.fetched
 
+    def emit(result):
+        host, recs, pages, fetched = result
+        record_host(ctx, host, recs, pages, fetched)
+        progress.hosts_done.add(host)
+        progress.active.pop(host, None)
 
-async def main_async(args: argparse.Namespace):
+    # Each host's results go to the output as soon as it (and every host before it) is done
+    await ctx.pool.run_streaming(
+        [functools.partial(crawl_one, host, host_seeds) for host, host_seeds in plan if host not in progress.hosts_done],
+        emit,
+    )
+    progress.done = True
+
+
+async def run_worker(ctx: RunContext, args: argparse.Namespace, crawler=None):
+    """Lease hosts from ``ctx.queue`` until the coordinator has sealed it and it is drained."""
+    from .crawl import HostCrawlState
+    from .work_queue import LeaseBudget
+
+    queue = ctx.queue
+    worker = args.worker_id
+    crawler = crawler or build_crawler(ctx, args)
+    on_page = (lambda n: ctx.pages_pbar.update(n)) if ctx.pages_pbar else None
+
+    async def crawl_task(task):
+        st = HostCrawlState.start(task.seeds[0], task.seeds[1:])
+        budget = LeaseBudget(queue, task, worker)
+        crawl = asyncio.ensure_future(
+            crawler.crawl_host(st.seed_url, task.county, max_pages=task.max_pages, on_page=on_page, budget=budget, state=st)
+        )
+        # Renew the lease while the host is crawled; a lost lease may already be another worker's
+        while not crawl.done():
+            await asyncio.wait([crawl], timeout=queue.lease_seconds / 3)
+            if not crawl.done() and not await asyncio.to_thread(queue.renew, task.host, worker):
+                logging.warning("[%s] Najam hosta %s je istekao; prekidam crawl", task.county, task.host)
+                crawl.cancel()
+                await asyncio.gather(crawl, return_exceptions=True)
+                return
+        crawl.result()
+        record_host(ctx, task.host, st.records, st.audit_pages, st.fetched)
+        await asyncio.to_thread(queue.complete, task.host, worker, budget.used)
+
+    async def loop():
+        while True:
+            task = await asyncio.to_thread(queue.lease, worker)
+            if task is None:
+                if await asyncio.to_thread(lambda: queue.drained):
+                    return
+                # The coordinator is still adding hosts, or another worker's lease may expire
+                await asyncio.sleep(min(5.0, queue.lease_seconds / 4))
+                continue
+            logging.info("[%s] Crawl host %s (%d seedova, limit %d)", task.county, task.host, len(task.seeds), task.max_pages)
+            await crawl_task(task)
+
+    await asyncio.gather(*(loop() for _ in range(max(1, args.concurrency))))
+    logging.info("Worker %s završio; stanje reda: %s", worker, queue.counts())
+
+
+async def main_async(args: argparse.Namespace, resolver: Any = None):
+    """``resolver`` replaces aiohttp's DNS resolver (benchmarks route every host to a local server)."""
     # Local imports to avoid requiring aiohttp for --run-tests
+    from concurrent.futures import ProcessPoolExecutor
     from tqdm import tqdm
-    import aiohttp
     from .rate_limiter import HostRateLimiter
-    from .output import CSVWriter
+    from .robots import RobotsChecker
+    from .search import SearchCache
+    from .seed_index import SeedIndex, load_domain_list
+    from .output import AuditWriter, CSVWriter, OutputSink, merge_outputs
+    from .http_cache import HttpCache
+    from .state import StateStore
+    from .scheduler import HostPool, HostRegistry
+    from .checkpoint import Checkpoint
+    from .metrics import Metrics
+    from .transport import TransportOptions, create_session
+    from .work_queue import WorkQueue
+
+    if args.merge_outputs:
+        queue = WorkQueue(args.queue) if args.queue else None
+        county_label = (lambda host, fallback: "; ".join(queue.counties_for(host)) or fallback) if queue else None
+        emails, pages = merge_outputs(args.merge_outputs, args.output, gzip_audit=args.audit_gzip, county_label=county_label)
+        logging.info("Spojeno %d jedinstvenih email adresa i %d stranica u %s", emails, pages, args.output)
+        if queue is not None:
+            queue.close()
+        return
+
+    checkpoint = None
+    if args.resume:
+        checkpoint = Checkpoint.load(args.resume)
+        resume_path = args.resume
+        # The interrupted run's options win; defaults fill in options it did not know about
+        args = argparse.Namespace(**{**vars(parse_args([])), **checkpoint.args, "resume": resume_path, "checkpoint": resume_path})
+        logging.info("Nastavak iz checkpointa %s", resume_path)
+    elif args.checkpoint and not args.dry_run:
+        checkpoint = Checkpoint(args.checkpoint, args)
 
     counties = load_counties(args)
     logging.info("Županije: %s", ", ".join(counties))
-    connector = aiohttp.TCPConnector(limit=10)
-    timeout = aiohttp.ClientTimeout(total=args.timeout)
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-        limiter = HostRateLimiter(delay_seconds=DEFAULT_RATE_LIMIT_SECONDS)
 
-        all_records = []
-        all_audit_pages = []
+    state = None
+    if args.state_db and not args.dry_run:
+        state = StateStore(args.state_db, run_id=checkpoint.run_id if checkpoint else None)
+        if checkpoint:
+            checkpoint.run_id = state.run_id
+    writer = CSVWriter(args.output, flush_interval=args.flush_interval)
+    audit_path = CSVWriter.audit_path_from_csv(args.output, gzip_audit=args.audit_gzip)
+    audit = AuditWriter(audit_path, flush_interval=args.flush_interval)
+    metrics = Metrics()
+    sink = OutputSink(writer, audit, on_records=state.record_sightings if state else None, metrics=metrics)
+
+    blocklist = list(DEFAULT_BLOCKED_DOMAINS) + (load_domain_list(args.blocklist) if args.blocklist else [])
+    allowlist = load_domain_list(args.allowlist) if args.allowlist else []
+    seed_index = SeedIndex(args.seed_index, blocklist=blocklist, allowlist=allowlist)
+
+    async with create_session(TransportOptions.from_args(args), resolver=resolver) as session:
+        limiter = HostRateLimiter(delay_seconds=args.rate_limit, max_delay=args.max_host_delay, metrics=metrics)
+        robots = None
+        if not args.ignore_robots and not args.dry_run:
+            robots = RobotsChecker(
+                session,
+                USER_AGENT,
+                session.timeout,
+                limiter=limiter,
+                cache_dir=args.cache_dir,
+                ttl_seconds=DEFAULT_ROBOTS_TTL_HOURS * 3600,
+                offline=args.offline,
+            )
+        ctx = RunContext(
+            session=session,
+            limiter=limiter,
+            pool=HostPool(args.concurrency),
+            parse_executor=ProcessPoolExecutor(max_workers=args.parse_workers) if args.parse_workers > 0 else None,
+            cache=HttpCache(args.cache_dir, ttl_seconds=args.cache_ttl * 3600, offline=args.offline) if args.cache_dir else None,
+            state=state,
+            sink=sink,
+            checkpoint=checkpoint,
+            robots=robots,
+            seed_index=seed_index,
+            search_cache=SearchCache(args.cache_dir, args.search_ttl * 3600, offline=args.offline) if args.cache_dir else None,
+            metrics=metrics,
+            queue=WorkQueue(args.queue, lease_seconds=args.lease_seconds) if args.queue else None,
+        )
+        if not args.dry_run:
+            sink.open(append=bool(args.resume))
+        saver = None
+        if checkpoint is not None:
+            checkpoint.before_save = sink.flush
+            saver = asyncio.create_task(checkpoint.run_periodic(args.checkpoint_interval))
+        metrics_writer = None
+        if args.metrics_json or args.metrics_prom:
+            metrics_writer = asyncio.create_task(metrics.run_periodic(args.metrics_interval, args.metrics_json, args.metrics_prom))
 
         total_pages = len(counties) * args.max_pages_per_county
-        pages_pbar = None if args.no_progress else tqdm(total=total_pages, desc="Crawling pages", leave=True)
+        ctx.pages_pbar = None if args.no_progress else tqdm(total=total_pages, desc="Crawling pages", leave=True)
+        completed = False
         try:
-            for county in counties:
-                recs, audit = await run_for_county(county, session, limiter, args, pages_pbar)
-                all_records.extend(recs)
-                all_audit_pages.extend(audit)
+            if args.role == "worker":
+                await run_worker(ctx, args)
+            elif args.parallel_counties:
+                ctx.registry = (checkpoint.registry if checkpoint else None) or HostRegistry()
+                if checkpoint is not None:
+                    checkpoint.registry = ctx.registry
+                await asyncio.gather(*(run_for_county(county, ctx, args) for county in counties))
+            else:
+                for county in counties:
+                    await run_for_county(county, ctx, args)
+            if args.role == "coordinator" and not args.dry_run:
+                ctx.queue.seal()
+                logging.info("Red %s spreman: %s", args.queue, ctx.queue.counts())
+            completed = True
         finally:
-            if pages_pbar:
-                pages_pbar.close()
+            if saver is not None:
+                saver.cancel()
+            if metrics_writer is not None:
+                metrics_writer.cancel()
+                metrics.write(args.metrics_json, args.metrics_prom)
+            sink.close()
+            if checkpoint is not None:
+                if completed:
+                    checkpoint.remove()
+                else:
+                    checkpoint.save()
+                    logging.warning("Stanje spremljeno u %s; nastavak s --resume %s", checkpoint.path, checkpoint.path)
+            if ctx.pages_pbar:
+                ctx.pages_pbar.close()
+            if ctx.parse_executor is not None:
+                ctx.parse_executor.shutdown(cancel_futures=True)
+            if ctx.cache is not None:
+                ctx.cache.close()
+            if ctx.robots is not None:
+                ctx.robots.close()
+            if ctx.search_cache is not None:
+                ctx.search_cache.close()
+            if ctx.queue is not None:
+                ctx.queue.close()
+
+    if args.export_seed_index:
+        n = seed_index.export(args.export_seed_index)
+        logging.info("Indeks prinosa (%d hostova) zapisan u %s", n, args.export_seed_index)
+    seed_index.close()
 
     if args.dry_run:
         logging.info("Dry-run završen; bez pisanja CSV-a.")
         return
 
-    from .crawl import EmailRecord  # type: ignore
+    registry = ctx.registry
+    first_seen = state.first_seen_map() if state is not None else None
+
+    def compact_record(row: dict) -> dict:
+        # Tag records of shared hosts with every county that surfaced them
+        if registry is not None:
+            row["county"] = registry.county_label(site_host(row["source_url"]), row["county"])
+        if first_seen is not None:
+            row["date_found"] = first_seen.get(row["email"].lower(), row["date_found"])
+        return row
+
+    def compact_page(page: dict) -> dict:
+        page["county"] = registry.county_label(site_host(page["url"]), page["county"])
+        return page
+
+    if registry is not None or first_seen is not None:
+        writer.compact(compact_record)
+    if registry is not None:
+        audit.compact(compact_page)
+
+    if state is not None:
+        changes = state.write_delta(args.output)
+        counts = {k: sum(1 for c in changes if c["change"] == k) for k in ("new", "disappeared", "moved")}
+        logging.info(
+            "Delta: %d novih, %d nestalih, %d premještenih adresa (%s)",
+            counts["new"], counts["disappeared"], counts["moved"], state.delta_path_from_csv(args.output),
+        )
+        state.close()
+
+    logging.info("Zapisano %d jedinstvenih email adresa u %s", writer.count, args.output)
+    logging.info("Sirovi audit (%d stranica) spremljen u %s", audit.count, audit_path)
+
 
-    dedup_map: dict[str, EmailRecord] = {}
-    for r in all_records:
-        dedup_map.setdefault(r.email.lower(), r)
-    deduped = list(dedup_map.values())
+def run_profiled(args: argparse.Namespace):
+    """``main_async`` under cProfile; also dumps the stats when the run is interrupted."""
+    import cProfile
+    import pstats
 
-    writer = CSVWriter(args.output)
-    writer.write(deduped)
-    writer.write_audit(args.output, all_audit_pages)
-    logging.info("Zapisano %d jedinstvenih email adresa u %s", len(deduped), args.output)
-    logging.info("Sirovi audit spremljen u %s", writer.audit_path_from_csv(args.output))
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(asyncio.run, main_async(args))
+    finally:
+        profiler.dump_stats(args.profile)
+        with open(args.profile + ".txt", "w", encoding="utf-8") as f:
+            pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(50)
+        logging.info("Profil spremljen u %s (sažetak u %s.txt)", args.profile, args.profile)
 
 
 def run_tests() -> int:
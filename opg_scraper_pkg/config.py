@@ -10,8 +10,105 @@ DEFAULT_COUNTIES = [
 
 DEFAULT_DEPTH = 2
 DEFAULT_RATE_LIMIT_SECONDS = 1.0
+# Ceiling for the adaptive per-host delay after errors, 429/503 or slow responses
+DEFAULT_MAX_HOST_DELAY = 60.0
 DEFAULT_REQUEST_TIMEOUT = 20
+# Transport: a request may wait this long for a connection and for each read
+# within DEFAULT_REQUEST_TIMEOUT
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 15.0
+# Connection pool of the shared session. The per-host cap only has to cover
+# a page fetch plus robots.txt/sitemap requests; the rate limiter spaces the rest
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_CONNECTIONS_PER_HOST = 2
+DEFAULT_DNS_TTL = 300.0
+# Idle connections are kept this long, so search, robots and page fetches reuse them
+DEFAULT_KEEPALIVE = 30.0
 DEFAULT_MAX_RESULTS_PER_COUNTY = 50
+DEFAULT_CONCURRENCY = 8
+DEFAULT_CACHE_TTL_HOURS = 24.0
+DEFAULT_ROBOTS_TTL_HOURS = 24.0
+DEFAULT_SEARCH_TTL_HOURS = 24.0 * 7
+# Result pages followed per search query (DDG HTML returns roughly 20-30 per page)
+SEARCH_MAX_PAGES = 5
+# County queries in flight at once: the one being merged and the next
+SEARCH_QUERIES_AHEAD = 2
+# Bodies are read up to this many bytes; larger pages are truncated
+DEFAULT_MAX_PAGE_BYTES = 2 * 1024 * 1024
+# HTML parser backend (page.PARSERS): "lxml" builds the tree with lxml directly, "bs4" through BeautifulSoup
+DEFAULT_PARSER = "lxml"
+
+# Per-host page cap: an unseen host gets HOST_PAGE_CAP, hosts scale with their
+# yield in the seed index (never below HOST_PAGE_MIN); pages are charged to the
+# county budget only when fetched
+HOST_PAGE_CAP = 50
+HOST_PAGE_MIN = 5
+# Search results on one host are crawled as one frontier with up to this many seeds
+MAX_SEEDS_PER_HOST = 10
+
+# Distributed crawl (--queue): a worker renews its host lease every third of
+# this; an expired lease is handed to another worker at most MAX_LEASE_ATTEMPTS times
+DEFAULT_LEASE_SECONDS = 300.0
+MAX_LEASE_ATTEMPTS = 3
+# Pages a leased host draws from the county budget per queue write
+LEASE_PAGE_CHUNK = 5
+
+# Frontier score from which a queued link still counts as a likely contact page
+CONTACT_LINK_MIN_SCORE = 2.0
+
+# Anything else (PDF brochures, images, archives) is skipped before the body is read
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Links ending in these are never queued
+BINARY_EXTENSIONS = (
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".odt", ".ods",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".bmp", ".tif", ".tiff", ".ico", ".heic",
+    ".mp3", ".mp4", ".m4v", ".mov", ".avi", ".wmv", ".webm", ".ogg", ".wav",
+    ".zip", ".rar", ".7z", ".gz", ".tar", ".exe", ".dmg", ".apk",
+    ".css", ".js", ".woff", ".woff2", ".ttf", ".eot", ".xml", ".json",
+)
+
+# Limits for sitemap discovery per host (documents, page URLs, inflated bytes per document)
+SITEMAP_MAX_FILES = 5
+SITEMAP_MAX_URLS = 2000
+SITEMAP_MAX_BYTES = 20 * 1024 * 1024
+
+# Search results that are never an OPG's own site (social networks, portals,
+# marketplaces, registries); a host matches a domain or any of its subdomains
+DEFAULT_BLOCKED_DOMAINS = (
+    "facebook.com",
+    "instagram.com",
+    "youtube.com",
+    "twitter.com",
+    "x.com",
+    "linkedin.com",
+    "tiktok.com",
+    "pinterest.com",
+    "wikipedia.org",
+    "google.com",
+    "duckduckgo.com",
+    "index.hr",
+    "jutarnji.hr",
+    "vecernji.hr",
+    "24sata.hr",
+    "net.hr",
+    "tportal.hr",
+    "dnevnik.hr",
+    "hrt.hr",
+    "slobodnadalmacija.hr",
+    "glas-slavonije.hr",
+    "agroklub.com",
+    "njuskalo.hr",
+    "plavi-oglasnik.hr",
+    "oglasnik.hr",
+    "gov.hr",
+    "apprrr.hr",
+    "sudreg.pravosudje.hr",
+    "fininfo.hr",
+    "poslovna.hr",
+    "companywall.hr",
+    "imenik.hr",
+)
 
 ROLE_BASED_PREFIXES = (
     "info@",
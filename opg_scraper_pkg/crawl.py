@@ -2,23 +2,37 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from dataclasses import dataclass
-from typing import Callable, List, Optional, Set, Tuple
-from urllib.parse import urljoin, urlparse
+import time
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import urlparse
 
 import aiohttp
-from bs4 import BeautifulSoup
 
-from .config import USER_AGENT
+from .analysis import PageResult, analyze_page
+from .config import CONTACT_LINK_MIN_SCORE, DEFAULT_MAX_PAGE_BYTES, USER_AGENT
 from .extractor import EmailExtractor
+from .fingerprint import ContentFingerprints
+from .frontier import Frontier
+from .http_cache import HttpCache
+from .metrics import Metrics
+from .page import scan_title
 from .rate_limiter import HostRateLimiter
+from .robots import RobotsChecker
+from .scheduler import PageBudget
+from .sitemap import discover as discover_sitemap
+from .state import StateStore, content_hash
 from .utils import (
     canonicalize_url,
-    contains_opt_out,
-    extract_page_title,
-    guess_name_from_page,
+    decode_html,
+    has_binary_extension,
+    is_html_content_type,
     is_role_based,
+    looks_like_contact_link,
+    rehost,
     same_host,
+    score_link,
     utc_now_iso,
 )
 
@@ -26,6 +40,20 @@ from .utils import (
 ProgressCallback = Optional[Callable[[int], None]]  # receives increment value
 
 
+async def read_capped(resp: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+    """Stream the body, stopping at ``max_bytes`` instead of buffering all of it."""
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in resp.content.iter_chunked(65536):
+        chunk = chunk[: max_bytes - size]
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            logging.debug("Truncated %s at %d bytes", resp.url, max_bytes)
+            break
+    return b"".join(chunks)
+
+
 @dataclass
 class EmailRecord:
     email: str
@@ -37,6 +65,93 @@ class EmailRecord:
     date_found: str
 
 
+@dataclass
+class SaturationPolicy:
+    """When to stop crawling a host before its page limit is reached.
+
+    Both rules only apply once the host has produced a non-role email.
+    ``idle_pages``: stop after this many consecutive pages without a new email
+    (0 disables). ``after_contact_pages``: stop as soon as no queued link scores
+    as a likely contact page any more.
+    """
+
+    idle_pages: int = 0
+    after_contact_pages: bool = False
+    contact_min_score: float = CONTACT_LINK_MIN_SCORE
+
+    def stop_reason(self, found_personal: bool, idle: int, next_score: float) -> str:
+        if not found_personal:
+            return ""
+        if self.idle_pages and idle >= self.idle_pages:
+            return "saturated_idle"
+        if self.after_contact_pages and next_score < self.contact_min_score:
+            return "contact_pages_done"
+        return ""
+
+
+@dataclass
+class HostCrawlState:
+    """Everything ``crawl_host`` needs to continue a crawl, kept outside the
+    coroutine so a checkpoint can serialise it at any point."""
+
+    seed_url: str
+    frontier: Frontier = field(default_factory=Frontier)
+    fetched: int = 0
+    seen_emails: Set[str] = field(default_factory=set)
+    found_personal: bool = False
+    idle: int = 0
+    records: List[EmailRecord] = field(default_factory=list)
+    audit_pages: List[dict] = field(default_factory=list)
+    # Popped from the frontier but not processed yet: (url, depth, source, score)
+    in_flight: Optional[Tuple[str, int, str, float]] = None
+    stop_reason: str = ""
+    # url -> [simhash, address tokens] of every distinct page fetched so far
+    fingerprints: Dict[str, list] = field(default_factory=dict)
+
+    @classmethod
+    def start(cls, seed_url: str, extra_seeds: Sequence[str] = ()) -> "HostCrawlState":
+        """One frontier for every search result on the host, so no page is fetched twice."""
+        state = cls(seed_url=seed_url)
+        for url in (seed_url, *extra_seeds):
+            state.frontier.push(canonicalize_url(url), 0, "search_seed")
+        return state
+
+    def to_dict(self) -> dict:
+        frontier = self.frontier.to_dict()
+        fetched = self.fetched
+        if self.in_flight is not None:
+            # An unfinished page is handed back to the frontier, not lost
+            frontier["queued"].insert(0, list(self.in_flight))
+            fetched -= 1
+        return {
+            "seed_url": self.seed_url,
+            "frontier": frontier,
+            "fetched": fetched,
+            "seen_emails": sorted(self.seen_emails),
+            "found_personal": self.found_personal,
+            "idle": self.idle,
+            "records": [asdict(r) for r in self.records],
+            "audit_pages": self.audit_pages,
+            "stop_reason": self.stop_reason,
+            "fingerprints": self.fingerprints,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HostCrawlState":
+        return cls(
+            seed_url=data["seed_url"],
+            frontier=Frontier.from_dict(data["frontier"]),
+            fetched=data["fetched"],
+            seen_emails=set(data["seen_emails"]),
+            found_personal=data["found_personal"],
+            idle=data["idle"],
+            records=[EmailRecord(**r) for r in data["records"]],
+            audit_pages=list(data["audit_pages"]),
+            stop_reason=data.get("stop_reason", ""),
+            fingerprints=dict(data.get("fingerprints", {})),
+        )
+
+
 class Crawler:
     def __init__(
         self,
@@ -44,10 +159,19 @@ class Crawler:
         limiter: HostRateLimiter,
         extractor: EmailExtractor,
         depth: int,
-        timeout: int,
+        timeout: Union[float, aiohttp.ClientTimeout],
         dry_run: bool,
         respect_opt_out: bool,
         include_role_emails: bool,
+        parse_executor: Optional[Executor] = None,
+        saturation: Optional[SaturationPolicy] = None,
+        cache: Optional[HttpCache] = None,
+        state: Optional[StateStore] = None,
+        robots: Optional[RobotsChecker] = None,
+        sitemaps: bool = False,
+        max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+        dedup_content: bool = True,
+        metrics: Optional[Metrics] = None,
     ):
         self.session = session
         self.limiter = limiter
@@ -57,61 +181,246 @@ class Crawler:
         self.dry_run = dry_run
         self.respect_opt_out = respect_opt_out
         self.include_role_emails = include_role_emails
+        self.parse_executor = parse_executor
+        self.saturation = saturation or SaturationPolicy()
+        self.cache = cache
+        self.state = state
+        self.robots = robots
+        self.sitemaps = sitemaps
+        self.max_page_bytes = max_page_bytes
+        self.dedup_content = dedup_content
+        self.metrics = metrics or Metrics()
 
     async def _fetch_html(self, url: str) -> str:
         if self.dry_run:
             logging.info("[dry-run] GET %s", url)
             return ""
+        metrics = self.metrics
         host = urlparse(url).hostname or ""
-        await self.limiter.throttle(host)
-        backoff = 1.0
-        for _ in range(4):
+        cached = self.cache.get(url) if self.cache else None
+        if self.cache:
+            if self.cache.usable(cached):
+                metrics.inc("opg_fetch_requests_total", host=host, status="cache")
+                return cached.body
+            if self.cache.offline:
+                return ""
+        headers = {"User-Agent": USER_AGENT, **HttpCache.conditional_headers(cached)}
+        for attempt in range(4):
+            if attempt:
+                metrics.inc("opg_fetch_retries_total", host=host)
+            # The limiter owns backoff: failures push this host's next slot out for every coroutine
+            await self.limiter.throttle(host)
+            started = time.monotonic()
+            # Every attempt lands in the latency histogram, so the slow tail of errors is visible too
+            outcome = "cancelled"
             try:
-                async with self.session.get(url, headers={"User-Agent": USER_AGENT}, timeout=self.timeout, allow_redirects=True) as resp:
+                async with self.session.get(url, headers=headers, timeout=self.timeout, allow_redirects=True) as resp:
+                    metrics.inc("opg_fetch_requests_total", host=host, status=resp.status)
                     if resp.status in (429, 503):
-                        await asyncio.sleep(backoff)
-                        backoff *= 2
+                        outcome = "throttled"
+                        self.limiter.record(host, resp.status, retry_after=resp.headers.get("Retry-After"))
                         continue
+                    if resp.status == 304 and cached is not None:
+                        outcome = "not_modified"
+                        self.limiter.record(host, resp.status, time.monotonic() - started)
+                        self.cache.touch(url)
+                        return cached.body
+                    self.limiter.record(host, resp.status, time.monotonic() - started)
                     resp.raise_for_status()
-                    return await resp.text(errors="ignore")
+                    content_type = resp.headers.get("Content-Type", "")
+                    if not is_html_content_type(content_type):
+                        logging.debug("Skipping %s: %s", url, content_type)
+                        metrics.inc("opg_fetch_skipped_total", host=host, reason="content_type")
+                        outcome = "skipped"
+                        return ""
+                    if resp.content_length is not None and resp.content_length > self.max_page_bytes:
+                        logging.debug("Skipping %s: %d bytes", url, resp.content_length)
+                        metrics.inc("opg_fetch_skipped_total", host=host, reason="too_large")
+                        outcome = "skipped"
+                        return ""
+                    raw = await read_capped(resp, self.max_page_bytes)
+                    outcome = "ok"
+                    metrics.inc("opg_fetch_bytes_total", len(raw), host=host)
+                    body = decode_html(raw, resp.charset)
+                    if self.cache:
+                        self.cache.store(url, body, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                    return body
+            except aiohttp.ClientResponseError as e:
+                logging.debug("Fetch error %s: %s", url, e)
+                outcome = "http_error"
+                if e.status < 500:
+                    return ""
             except Exception as e:
                 logging.debug("Fetch error %s: %s", url, e)
-                await asyncio.sleep(backoff)
-                backoff *= 2
+                outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                metrics.inc("opg_fetch_requests_total", host=host, status="error")
+                self.limiter.record(host, None)
+            finally:
+                latency = time.monotonic() - started
+                metrics.observe("opg_fetch_latency_seconds", latency, outcome=outcome)
+                metrics.inc("opg_fetch_seconds_total", latency, host=host)
         return ""
 
-    async def crawl_host(self, seed_url: str, county: str, max_pages: int, on_page: ProgressCallback = None) -> Tuple[List[EmailRecord], List[dict]]:
-        visited: Set[str] = set()
-        queue: List[Tuple[str, int, str]] = [(canonicalize_url(seed_url), 0, "search_seed")]
-        out_records: List[EmailRecord] = []
-        audit_pages: List[dict] = []
+    async def _fetch_chunks(self, url: str) -> AsyncIterator[bytes]:
+        """Raw body in chunks, for documents too large to hold as one string.
 
-        while queue and len(visited) < max_pages:
-            url, depth, source = queue.pop(0)
-            if url in visited:
-                continue
-            visited.add(url)
+        Used for sitemaps only: these fetches (at most the fallback paths plus
+        ``SITEMAP_MAX_FILES`` per host) are not charged to the page budget and
+        bypass the HTTP cache. Consume under ``contextlib.aclosing``."""
+        if self.dry_run:
+            logging.info("[dry-run] GET %s", url)
+            return
+        host = urlparse(url).hostname or ""
+        await self.limiter.throttle(host)
+        started = time.monotonic()
+        try:
+            async with self.session.get(url, headers={"User-Agent": USER_AGENT}, timeout=self.timeout) as resp:
+                self.limiter.record(host, resp.status, time.monotonic() - started, resp.headers.get("Retry-After"))
+                if resp.status != 200:
+                    return
+                async for chunk in resp.content.iter_chunked(65536):
+                    yield chunk
+        except Exception as e:
+            logging.debug("Fetch error %s: %s", url, e)
+            self.limiter.record(host, None)
+
+    async def _seed_from_sitemaps(self, seed_url: str, frontier: Frontier):
+        robots = self.robots
+        urls = await discover_sitemap(
+            seed_url,
+            self._fetch_chunks,
+            robots.sitemaps(seed_url) if robots else (),
+            allowed=lambda url: not has_binary_extension(url) and (robots is None or robots.can_fetch(url)),
+        )
+        # Only likely contact pages: queuing the rest would mark them seen and
+        # discard the anchor-text score they get once BFS reaches them
+        added = sum(frontier.push(url, 1, "sitemap", score) for url, score in urls if score > 0)
+        logging.debug("Sitemap %s: %d URLs queued", seed_url, added)
+
+    async def _analyze(self, html: str, url: str) -> PageResult:
+        if self.parse_executor is None:
+            return analyze_page(html, url, self.extractor)
+        # Keep the event loop free for fetches and limiter timers while a worker parses
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, analyze_page, html, url, self.extractor)
+
+    async def _analyze_incremental(self, html: str, url: str) -> Tuple[PageResult, bool]:
+        """Analyse a page unless the state store has a result for identical content."""
+        if self.state is not None:
+            digest = content_hash(html)
+            cached = self.state.cached_result(url, digest)
+            if cached is not None:
+                return cached, True
+        result = await self._analyze(html, url)
+        self.metrics.observe("opg_parse_seconds", result.parse_seconds)
+        if not result.prefiltered:
+            self.metrics.observe("opg_extract_seconds", result.extract_seconds)
+        if self.state is not None:
+            self.state.save_result(url, digest, result)
+        return result, False
+
+    @staticmethod
+    def _audit_entry(
+        url: str,
+        title: str,
+        county: str,
+        source: str,
+        found_emails: Optional[List[str]] = None,
+        opt_out: bool = False,
+        prefiltered: bool = False,
+        unchanged: bool = False,
+        duplicate_of: str = "",
+    ) -> dict:
+        return {
+            "url": url,
+            "title": title,
+            "county": county,
+            "timestamp": utc_now_iso(),
+            "found_emails": found_emails or [],
+            "opt_out_detected": opt_out,
+            "prefiltered": prefiltered,
+            "unchanged": unchanged,
+            "duplicate_of": duplicate_of,
+            "source": source,
+        }
+
+    async def crawl_host(
+        self,
+        seed_url: str,
+        county: str,
+        max_pages: int,
+        on_page: ProgressCallback = None,
+        budget: Optional[PageBudget] = None,
+        state: Optional[HostCrawlState] = None,
+    ) -> Tuple[List[EmailRecord], List[dict]]:
+        # A state restored from a checkpoint continues where it stopped
+        st = state if state is not None else HostCrawlState.start(seed_url)
+        if st.stop_reason:
+            return st.records, st.audit_pages
+        frontier = st.frontier
+        stop_reason = "frontier_exhausted"
+        metrics = self.metrics
+        host = urlparse(seed_url).hostname or ""
+        fingerprints = ContentFingerprints(known=st.fingerprints)
+        st.fingerprints = fingerprints.known
+        if self.robots is not None:
+            await self.robots.prepare(seed_url)
+            if st.fetched == 0 and not self.robots.can_fetch(seed_url):
+                logging.debug("Crawl %s skipped: disallowed by robots.txt", seed_url)
+                st.stop_reason = "robots_disallowed"
+                return st.records, st.audit_pages
+        if self.sitemaps and st.fetched == 0 and not (self.cache and self.cache.offline):
+            await self._seed_from_sitemaps(seed_url, frontier)
+
+        while frontier:
+            if st.fetched >= max_pages:
+                stop_reason = "max_pages"
+                break
+            if budget is not None and not await budget.acquire():
+                stop_reason = "budget_exhausted"
+                break
+            st.in_flight = frontier.pop_scored()
+            url, depth, source, _ = st.in_flight
+            st.fetched += 1
             if on_page:
                 on_page(1)
 
+            started = time.perf_counter()
             html = await self._fetch_html(url)
+            metrics.inc("opg_stage_seconds_total", time.perf_counter() - started, county=county, host=host, stage="fetch")
             if not html:
+                metrics.inc("opg_pages_total", county=county, host=host, outcome="empty")
+                st.idle += 1
+                st.in_flight = None
+                continue
+            # Print views and other copies: no extraction and no links to follow
+            duplicate_of = fingerprints.duplicate_of(url, html) if self.dedup_content else ""
+            if duplicate_of:
+                metrics.inc("opg_pages_total", county=county, host=host, outcome="duplicate")
+                st.in_flight = None
+                st.idle += 1
+                st.audit_pages.append(self._audit_entry(url, scan_title(html), county, source, duplicate_of=duplicate_of))
                 continue
-            soup = BeautifulSoup(html, "lxml")
-            title = extract_page_title(soup)
-            text = soup.get_text(" ", strip=True)
-            opt_out = contains_opt_out(text)
+            started = time.perf_counter()
+            result, unchanged = await self._analyze_incremental(html, url)
+            metrics.inc("opg_stage_seconds_total", time.perf_counter() - started, county=county, host=host, stage="analyze")
+            outcome = "unchanged" if unchanged else "prefiltered" if result.prefiltered else "parsed"
+            metrics.inc("opg_pages_total", county=county, host=host, outcome=outcome)
+            st.in_flight = None
+            title = result.title
+            opt_out = result.opt_out
 
-            emails = self.extractor.extract(html, url)
+            emails = result.emails
+            kept = len(st.records)
             if emails:
-                name_hint = guess_name_from_page(soup)
+                name_hint = result.name_hint
                 for email, how in emails:
                     if not self.include_role_emails and is_role_based(email):
-                        if not ("opg" in (title or "").lower() or "opg" in text.lower()):
+                        if not result.mentions_opg:
                             continue
                     if self.respect_opt_out and opt_out:
                         continue
-                    out_records.append(
+                    st.records.append(
                         EmailRecord(
                             email=email,
                             name=name_hint,
@@ -123,34 +432,45 @@ class Crawler:
                         )
                     )
 
-            audit_pages.append(
-                {
-                    "url": url,
-                    "title": title,
-                    "county": county,
-                    "timestamp": utc_now_iso(),
-                    "found_emails": [e for e, _ in emails],
-                    "opt_out_detected": opt_out,
-                    "source": source,
-                }
+            if len(st.records) > kept:
+                metrics.inc("opg_emails_total", len(st.records) - kept, county=county, host=host)
+            st.audit_pages.append(
+                self._audit_entry(
+                    url,
+                    title,
+                    county,
+                    source,
+                    found_emails=[e for e, _ in emails],
+                    opt_out=opt_out,
+                    prefiltered=result.prefiltered,
+                    unchanged=unchanged,
+                )
             )
 
+            new_emails = {e.lower() for e, _ in emails} - st.seen_emails
+            st.seen_emails |= new_emails
+            st.idle = 0 if new_emails else st.idle + 1
+            st.found_personal = st.found_personal or any(not is_role_based(e) for e in new_emails)
+
             if depth < self.depth:
-                for a in soup.find_all("a", href=True):
-                    href = a.get("href")
-                    if not href:
-                        continue
-                    nxt = urljoin(url, href)
-                    if not nxt.startswith("http"):
+                for nxt, href, label in result.links:
+                    if not same_host(seed_url, nxt) or has_binary_extension(nxt):
                         continue
-                    if not same_host(seed_url, nxt):
+                    nxt = canonicalize_url(rehost(nxt, seed_url))
+                    # Dropped here so disallowed pages never take a frontier slot or budget
+                    if self.robots is not None and not self.robots.can_fetch(nxt):
                         continue
-                    nxt = canonicalize_url(nxt)
-                    if nxt in visited:
-                        continue
-                    if any(k in href.lower() for k in ("kontakt", "contact", "email", "onama", "o-nama", "about", "opg")):
-                        queue.insert(0, (nxt, depth + 1, "internal_contact_link"))
-                    else:
-                        queue.append((nxt, depth + 1, "internal_link"))
+                    link_source = "internal_contact_link" if looks_like_contact_link(href) else "internal_link"
+                    frontier.push(nxt, depth + 1, link_source, score_link(href, label, depth + 1))
+
+            reason = self.saturation.stop_reason(st.found_personal, st.idle, frontier.peek_score()) if frontier else ""
+            if reason:
+                stop_reason = reason
+                break
 
-        return out_records, audit_pages
+        logging.debug("Crawl %s stopped after %d pages: %s", seed_url, st.fetched, stop_reason)
+        st.stop_reason = stop_reason
+        metrics.inc("opg_host_stops_total", county=county, reason=stop_reason)
+        for page in st.audit_pages:
+            page["stop_reason"] = stop_reason
+        return st.records, st.audit_pages
@@ -2,32 +2,47 @@ from __future__ import annotations
 
 import json
 import re
-from typing import List, Tuple
-
-from bs4 import BeautifulSoup
+from typing import List, Optional, Tuple, Union
 
+from .page import ParsedPage, parse_page
 from .utils import normalize_email, is_valid_email
 
 
 class EmailExtractor:
     MAILTO_RE = re.compile(r"(?i)mailto:([^?\s#]+)")
     EMAIL_CANDIDATE_RE = re.compile(r"(?i)([A-Z0-9._%+\-']{1,64}@[A-Z0-9.-]{1,253}\.[A-Z]{2,63})")
+    # Anything that could turn into an email after parsing: mailto links, JSON-LD,
+    # a literal "x@y." (the dot possibly HTML-escaped) or an HTML-escaped "@"
+    EMAIL_SIGNAL_RE = re.compile(
+        r"(?i)mailto:|ld\+json|[A-Z0-9._%+\-']@[A-Z0-9-]+(?:\.|&#0*46;|&#x0*2e;|&period;)|&#0*64;|&#x0*40;|&commat;"
+    )
+
+    @classmethod
+    def has_email_signal(cls, html: str) -> bool:
+        """Cheap scan of the raw HTML; False means ``extract`` would find nothing."""
+        return cls.EMAIL_SIGNAL_RE.search(html) is not None
+
+    def __init__(self, parser: Optional[str] = None):
+        # Parser backend (page.PARSERS) for raw HTML, here and in analyze_page
+        self.parser = parser
 
-    def extract(self, html: str, base_url: str) -> List[Tuple[str, str]]:
+    def extract(self, page: Union[str, ParsedPage], base_url: str) -> List[Tuple[str, str]]:
+        if not isinstance(page, ParsedPage):
+            if not self.has_email_signal(page):
+                return []
+            page = parse_page(page, base_url, self.parser)
         results: list[tuple[str, str]] = []
-        soup = BeautifulSoup(html, "lxml")
 
-        for a in soup.find_all("a", href=True):
-            href = a.get("href", "")
+        for href, _ in page.anchors:
             m = self.MAILTO_RE.search(href)
             if m:
                 email = normalize_email(m.group(1))
                 if is_valid_email(email):
                     results.append((email, "mailto"))
 
-        for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        for block in page.json_ld:
             try:
-                data = json.loads(script.get_text(strip=True))
+                data = json.loads(block)
                 emails: list[str] = []
                 if isinstance(data, dict):
                     if "email" in data:
@@ -44,8 +59,7 @@ class EmailExtractor:
             except Exception:
                 pass
 
-        text = soup.get_text(" ", strip=True)
-        for m in self.EMAIL_CANDIDATE_RE.finditer(text):
+        for m in self.EMAIL_CANDIDATE_RE.finditer(page.text):
             email = normalize_email(m.group(1))
             if is_valid_email(email):
                 results.append((email, "regex"))
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Dict, Iterable, Optional
+
+from .page import SPACE_RE, TAG_RE
+
+
+INVISIBLE_RE = re.compile(r"(?is)<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->")
+WORD_RE = re.compile(r"\w+")
+EMAIL_TOKEN_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+# Near-duplicate threshold in differing bits of the 64-bit simhash. Short pages
+# (a print view of a 150-word post) drift further than the classic 3 bits;
+# distinct pages of the synthetic sites in benchmarks/ differ in 12 or more.
+DEFAULT_MAX_DISTANCE = 6
+
+
+def visible_text(html: str) -> str:
+    """Rough visible text with regexes only; cheap enough to run before any parse."""
+    return SPACE_RE.sub(" ", TAG_RE.sub(" ", INVISIBLE_RE.sub(" ", html))).strip().lower()
+
+
+def _features(text: str, width: int = 3) -> Iterable[str]:
+    words = WORD_RE.findall(text)
+    if len(words) < width:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + width]) for i in range(len(words) - width + 1)}
+
+
+# Each byte value spread over 8 lanes of 32 bits, so one addition per byte
+# counts eight bit positions at once (instead of testing 64 bits per feature)
+LANE = 32
+_SPREAD = [sum(1 << (bit * LANE) for bit in range(8) if b >> bit & 1) for b in range(256)]
+_LANE_MASK = (1 << LANE) - 1
+
+
+def simhash(text: str) -> int:
+    """64-bit simhash over word 3-shingles; similar texts differ in few bits."""
+    acc = [0] * 8
+    n = 0
+    for feature in _features(text):
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        for j, b in enumerate(digest):
+            acc[j] += _SPREAD[b]
+        n += 1
+    half = n / 2
+    fp = 0
+    for j, lanes in enumerate(acc):
+        for bit in range(8):
+            if (lanes >> (bit * LANE)) & _LANE_MASK > half:
+                fp |= 1 << (j * 8 + bit)
+    return fp
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ContentFingerprints:
+    """Simhashes of one host's pages, to skip print views and other copies.
+
+    A page only counts as a copy if it also carries exactly the same
+    address-like tokens, so a contact page that shares its template with
+    the rest of the site is never skipped.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, known: Optional[Dict[str, list]] = None):
+        self.max_distance = max_distance
+        # url -> [simhash, sorted address tokens joined by ","]
+        self.known: Dict[str, list] = {url: list(v) for url, v in (known or {}).items()}
+
+    def duplicate_of(self, url: str, html: str) -> str:
+        """URL of an earlier near-identical page, or "" after remembering this one."""
+        text = visible_text(html)
+        if not text:
+            return ""
+        fp = simhash(text)
+        emails = ",".join(sorted({e.lower() for e in EMAIL_TOKEN_RE.findall(html)}))
+        for seen_url, (seen_fp, seen_emails) in self.known.items():
+            if seen_emails == emails and hamming(fp, seen_fp) <= self.max_distance:
+                return seen_url
+        self.known[url] = [fp, emails]
+        return ""
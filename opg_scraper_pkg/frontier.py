@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from typing import Callable, List, Set, Tuple
+
+from .utils import url_key
+
+
+class Frontier:
+    """Priority crawl frontier with a seen-set checked at enqueue time.
+
+    Higher scores are popped first; equal scores keep insertion (BFS) order.
+    The seen-set holds ``key(url)``, so URL variants of one page are queued once.
+    """
+
+    def __init__(self, key: Callable[[str], str] = url_key):
+        self._heap: List[Tuple[float, int, str, int, str]] = []
+        self._seen: Set[str] = set()
+        self._seq = itertools.count()
+        self._key = key
+
+    def push(self, url: str, depth: int, source: str, score: float = 0.0) -> bool:
+        k = self._key(url)
+        if k in self._seen:
+            return False
+        self._seen.add(k)
+        heapq.heappush(self._heap, (-score, next(self._seq), url, depth, source))
+        return True
+
+    def pop(self) -> Tuple[str, int, str]:
+        url, depth, source, _ = self.pop_scored()
+        return url, depth, source
+
+    def pop_scored(self) -> Tuple[str, int, str, float]:
+        neg_score, _, url, depth, source = heapq.heappop(self._heap)
+        return url, depth, source, -neg_score
+
+    def peek_score(self) -> float:
+        return -self._heap[0][0] if self._heap else float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, url: str) -> bool:
+        return self._key(url) in self._seen
+
+    @property
+    def seen(self) -> Set[str]:
+        return self._seen
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable snapshot; queued entries keep their pop order."""
+        queued = [[url, depth, source, -neg] for neg, _, url, depth, source in sorted(self._heap)]
+        return {"queued": queued, "seen": sorted(self._seen)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Frontier":
+        frontier = cls()
+        for url, depth, source, score in data.get("queued", []):
+            frontier.push(url, depth, source, score)
+        frontier._seen.update(data.get("seen", []))
+        return frontier
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    etag: str
+    last_modified: str
+    fetched_at: float
+
+
+class HttpCache:
+    """On-disk response cache (SQLite) shared by the searcher and the crawler.
+
+    Entries younger than ``ttl_seconds`` are served without touching the
+    network; older ones are revalidated with ``If-None-Match`` /
+    ``If-Modified-Since``. In ``offline`` mode every cached entry is served and
+    anything else is treated as a failed fetch.
+    """
+
+    FILENAME = "http_cache.sqlite3"
+
+    def __init__(self, cache_dir: str, ttl_seconds: float, offline: bool = False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, self.FILENAME)
+        self.ttl = ttl_seconds
+        self.offline = offline
+        self._db = sqlite3.connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        row = self._db.execute(
+            "SELECT url, body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return self.ttl > 0 and time.time() - entry.fetched_at < self.ttl
+
+    def usable(self, entry: Optional[CachedResponse]) -> bool:
+        """True if ``entry`` can be returned without a request."""
+        return entry is not None and (self.offline or self.is_fresh(entry))
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedResponse]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, body, etag or "", last_modified or "", time.time()),
+        )
+        self._db.commit()
+
+    def touch(self, url: str):
+        """Mark a revalidated (304) entry as fresh again."""
+        self._db.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .utils import utc_now_iso
+
+
+# Upper bounds in seconds; wide enough for both parse times and slow hosts
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+@dataclass
+class Histogram:
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out, total = [], 0
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            out.append((repr(bound), total))
+        out.append(("+Inf", self.count))
+        return out
+
+
+class Metrics:
+    """Counters and histograms of one run, labelled by stage, host and county.
+
+    Names follow Prometheus conventions (``*_total`` counters, ``*_seconds``
+    histograms). ``write`` dumps a JSON summary and/or the Prometheus text
+    format; ``run_periodic`` does so while the run is in progress.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started = time.monotonic()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        series = self._histograms.setdefault(name, {})
+        key = _labels(labels)
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram(self.buckets)
+        hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        """Sum of every series of ``name`` whose labels include ``labels``."""
+        wanted = set(_labels(labels))
+        return sum(v for key, v in self._counters.get(name, {}).items() if wanted <= set(key))
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(_labels(labels))
+
+    def to_dict(self) -> dict:
+        return {
+            "generated_at": utc_now_iso(),
+            "uptime_seconds": round(time.monotonic() - self.started, 3),
+            "counters": {
+                name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            },
+            "histograms": {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": h.count,
+                        "sum": round(h.sum, 6),
+                        "mean": round(h.sum / h.count, 6) if h.count else 0.0,
+                        "buckets": dict(h.cumulative()),
+                    }
+                    for key, h in sorted(series.items())
+                ]
+                for name, series in sorted(self._histograms.items())
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        lines = ["# TYPE opg_uptime_seconds gauge", f"opg_uptime_seconds {time.monotonic() - self.started:.3f}"]
+        for name, series in sorted(self._counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            lines += [f"{name}{_prom_labels(key)} {value:g}" for key, value in sorted(series.items())]
+        for name, series in sorted(self._histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, h in sorted(series.items()):
+                lines += [f"{name}_bucket{_prom_labels(key + (('le', le),))} {n}" for le, n in h.cumulative()]
+                lines.append(f"{name}_sum{_prom_labels(key)} {h.sum:.6f}")
+                lines.append(f"{name}_count{_prom_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Optional[str] = None, prom_path: Optional[str] = None):
+        if json_path:
+            _write_atomic(json_path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+        if prom_path:
+            _write_atomic(prom_path, self.to_prometheus())
+
+    async def run_periodic(self, interval: float, json_path: Optional[str] = None, prom_path: Optional[str] = None):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.write(json_path, prom_path)
+            except OSError as e:
+                logging.warning("Spremanje metrika nije uspjelo: %s", e)
+
+
+def _prom_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in key)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(key, escaped)) + "}"
+
+
+def _write_atomic(path: str, text: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -1,16 +1,31 @@
 from __future__ import annotations
 
 import csv
+import gzip
 import json
 import os
-from typing import List, Set
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, TextIO, Tuple
 
 from .crawl import EmailRecord
+from .metrics import Metrics
+from .utils import site_host
+
+
+RowTransform = Callable[[dict], dict]
+
+
+def _replace_streamed(path: str, transform: RowTransform, read_rows, write_rows):
+    """Rewrite ``path`` row by row through ``transform`` and swap it in atomically."""
+    tmp_path = path + ".tmp"
+    write_rows(tmp_path, (transform(row) for row in read_rows(path)))
+    os.replace(tmp_path, path)
 
 
 class CSVWriter:
-    def __init__(self, output_path: str):
+    def __init__(self, output_path: str, flush_interval: float = 10.0):
         self.output_path = output_path
+        self.flush_interval = flush_interval
         self.fieldnames = [
             "email",
             "name",
@@ -20,35 +35,236 @@ class CSVWriter:
             "discovery_method",
             "date_found",
         ]
+        self._file: Optional[TextIO] = None
+        self._writer: Optional[csv.DictWriter] = None
+        self._seen: Set[str] = set()
+        self._last_flush = 0.0
+
+    @staticmethod
+    def _row(r: EmailRecord) -> dict:
+        return {
+            "email": r.email,
+            "name": r.name,
+            "county": r.county,
+            "source_url": r.source_url,
+            "page_title": r.page_title,
+            "discovery_method": r.discovery_method,
+            "date_found": r.date_found,
+        }
 
     def write(self, records: List[EmailRecord]):
+        self.open()
+        try:
+            self.append(records)
+        finally:
+            self.close()
+
+    # Streaming API: open once, append as hosts finish, close at the end
+
+    def open(self, append: bool = False):
+        """Start a new CSV, or with ``append`` continue an existing one (resume)."""
         os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
-        seen: Set[str] = set()
-        with open(self.output_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            writer.writeheader()
-            for r in records:
-                key = r.email.lower()
-                if key in seen:
-                    continue
-                seen.add(key)
-                writer.writerow({
-                    "email": r.email,
-                    "name": r.name,
-                    "county": r.county,
-                    "source_url": r.source_url,
-                    "page_title": r.page_title,
-                    "discovery_method": r.discovery_method,
-                    "date_found": r.date_found,
-                })
+        self._seen = set()
+        resuming = append and os.path.exists(self.output_path)
+        if resuming:
+            with open(self.output_path, newline="", encoding="utf-8") as f:
+                self._seen = {row["email"].lower() for row in csv.DictReader(f)}
+        self._file = open(self.output_path, "a" if resuming else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        if not resuming:
+            self._writer.writeheader()
+        self._last_flush = time.monotonic()
+
+    def append(self, records: Iterable[EmailRecord]) -> int:
+        written = 0
+        for r in records:
+            key = r.email.lower()
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self._writer.writerow(self._row(r))
+            written += 1
+        self._maybe_flush()
+        return written
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    @property
+    def count(self) -> int:
+        return len(self._seen)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def compact(self, transform: RowTransform):
+        """Final pass over the written CSV, e.g. to apply county tags known only at the end."""
+
+        def read_rows(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                yield from csv.DictReader(f)
+
+        def write_rows(path, rows):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
+
+        _replace_streamed(self.output_path, transform, read_rows, write_rows)
 
     @staticmethod
-    def audit_path_from_csv(csv_path: str) -> str:
+    def audit_path_from_csv(csv_path: str, gzip_audit: bool = False) -> str:
         base, _ = os.path.splitext(csv_path)
-        return base + ".json"
+        return base + (".jsonl.gz" if gzip_audit else ".jsonl")
+
+
+class AuditWriter:
+    """Append-only JSON Lines audit log, one crawled page per line (optionally gzip)."""
 
-    def write_audit(self, csv_path: str, audit_pages: List[dict]):
-        audit_path = self.audit_path_from_csv(csv_path)
-        with open(audit_path, "w", encoding="utf-8") as f:
-            json.dump({"pages": audit_pages}, f, ensure_ascii=False, indent=2)
+    def __init__(self, path: str, flush_interval: float = 10.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.gzip = path.endswith(".gz")
+        self._file: Optional[TextIO] = None
+        self._last_flush = 0.0
+        self.count = 0
 
+    def _open(self, path: str, mode: str) -> TextIO:
+        if self.gzip:
+            return gzip.open(path, mode + "t", encoding="utf-8")
+        return open(path, mode, encoding="utf-8")
+
+    @staticmethod
+    def iter_pages(path: str) -> Iterator[dict]:
+        """Pages of an audit file (plain or ``.gz``), skipping blank lines."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def open(self, append: bool = False):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = self._open(self.path, "a" if append else "w")
+        self._last_flush = time.monotonic()
+
+    def append(self, pages: Iterable[dict]):
+        for page in pages:
+            self._file.write(json.dumps(page, ensure_ascii=False) + "\n")
+            self.count += 1
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def compact(self, transform: RowTransform):
+        def write_rows(path, rows):
+            with self._open(path, "w") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        _replace_streamed(self.path, transform, self.iter_pages, write_rows)
+
+
+class OutputSink:
+    """Streams crawl results to the CSV and audit log as each host finishes."""
+
+    def __init__(
+        self,
+        csv_writer: CSVWriter,
+        audit_writer: AuditWriter,
+        on_records: Optional[Callable[[List[EmailRecord]], None]] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.csv_writer = csv_writer
+        self.audit_writer = audit_writer
+        self.on_records = on_records
+        self.metrics = metrics or Metrics()
+
+    def open(self, append: bool = False):
+        self.csv_writer.open(append=append)
+        self.audit_writer.open(append=append)
+
+    def add(self, records: List[EmailRecord], audit_pages: List[dict]):
+        if self.on_records and records:
+            self.on_records(records)
+        with self.metrics.timer("opg_output_seconds", writer="csv"):
+            written = self.csv_writer.append(records)
+        with self.metrics.timer("opg_output_seconds", writer="audit"):
+            self.audit_writer.append(audit_pages)
+        self.metrics.inc("opg_output_rows_total", written, writer="csv")
+        self.metrics.inc("opg_output_rows_total", len(audit_pages), writer="audit")
+
+    def flush(self):
+        with self.metrics.timer("opg_output_flush_seconds"):
+            self.csv_writer.flush()
+            self.audit_writer.flush()
+
+    def close(self):
+        self.csv_writer.close()
+        self.audit_writer.close()
+
+
+def merge_outputs(
+    csv_paths: Sequence[str],
+    output_path: str,
+    gzip_audit: bool = False,
+    county_label: Optional[Callable[[str, str], str]] = None,
+) -> Tuple[int, int]:
+    """Merge the CSVs and audits of several workers into one of each.
+
+    An email found by more than one worker keeps its earliest ``date_found``;
+    a page crawled twice (a host re-leased after a worker died) keeps its
+    first audit line. ``county_label(host, county)`` can rewrite the county
+    column, e.g. with every county that queued the host. Returns the number
+    of emails and pages written.
+    """
+    rows: Dict[str, dict] = {}
+    for path in csv_paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = row["email"].lower()
+                if key not in rows or row["date_found"] < rows[key]["date_found"]:
+                    rows[key] = row
+    writer = CSVWriter(output_path)
+    audit = AuditWriter(CSVWriter.audit_path_from_csv(output_path, gzip_audit=gzip_audit))
+    writer.open()
+    audit.open()
+    try:
+        for row in rows.values():
+            if county_label is not None:
+                row["county"] = county_label(site_host(row["source_url"]), row["county"])
+            writer.append([EmailRecord(**row)])
+        seen: Set[str] = set()
+        for path in csv_paths:
+            audit_path = next((p for p in (CSVWriter.audit_path_from_csv(path, g) for g in (False, True)) if os.path.exists(p)), None)
+            if audit_path is None:
+                continue
+            for page in AuditWriter.iter_pages(audit_path):
+                if page["url"] in seen:
+                    continue
+                seen.add(page["url"])
+                if county_label is not None:
+                    page["county"] = county_label(site_host(page["url"]), page["county"])
+                audit.append([page])
+    finally:
+        writer.close()
+        audit.close()
+    return writer.count, audit.count
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import html as html_lib
+import re
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple, Type
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from .config import DEFAULT_PARSER
+from .utils import extract_page_title, guess_name_from_page, pick_name
+
+
+TITLE_RE = re.compile(r"(?is)<title[^>]*>(.*?)</title>")
+ANCHOR_RE = re.compile(r"""(?is)<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))[^>]*>(.*?)</a>""")
+TAG_RE = re.compile(r"<[^>]+>")
+SPACE_RE = re.compile(r"\s+")
+
+
+def scan_title(html: str) -> str:
+    """Title via a regex scan, for pages that are never fully parsed."""
+    m = TITLE_RE.search(html)
+    if not m:
+        return ""
+    return SPACE_RE.sub(" ", html_lib.unescape(m.group(1))).strip()[:200]
+
+
+def scan_links(html: str, url: str) -> List[Tuple[str, str, str]]:
+    """Same shape as ``ParsedPage.links`` but found with a lightweight regex."""
+    out: List[Tuple[str, str, str]] = []
+    for m in ANCHOR_RE.finditer(html):
+        href = html_lib.unescape(m.group(1) or m.group(2) or m.group(3) or "").strip()
+        if not href:
+            continue
+        absolute = urljoin(url, href)
+        if absolute.startswith("http"):
+            label = SPACE_RE.sub(" ", html_lib.unescape(TAG_RE.sub(" ", m.group(4)))).strip()
+            out.append((absolute, href, label))
+    return out
+
+
+class ParsedPage:
+    """One parsed HTML document shared by the crawler and the extractor.
+
+    The HTML is parsed at most once; every derived view is computed on first
+    access and cached on the instance. This class builds a BeautifulSoup
+    tree; ``LxmlPage`` gives the same views straight from lxml.
+    """
+
+    parser = "bs4"
+
+    def __init__(self, html: str, url: str):
+        self.html = html
+        self.url = url
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        return BeautifulSoup(self.html, "lxml")
+
+    @property
+    def tree(self):
+        """The backend's parsed document; reading it parses the page."""
+        return self.soup
+
+    @cached_property
+    def title(self) -> str:
+        return extract_page_title(self.soup)
+
+    @cached_property
+    def name_hint(self) -> str:
+        return guess_name_from_page(self.soup, self.title)
+
+    @cached_property
+    def text(self) -> str:
+        return self.soup.get_text(" ", strip=True)
+
+    @cached_property
+    def text_lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def anchors(self) -> List[Tuple[str, str]]:
+        """(href, anchor text) for every ``<a href>`` in document order."""
+        out: List[Tuple[str, str]] = []
+        for a in self.soup.find_all("a", href=True):
+            href = a.get("href")
+            if href:
+                out.append((href, a.get_text(" ", strip=True)))
+        return out
+
+    @cached_property
+    def json_ld(self) -> List[str]:
+        return [s.get_text(strip=True) for s in self.soup.find_all("script", attrs={"type": "application/ld+json"})]
+
+    @cached_property
+    def links(self) -> List[Tuple[str, str, str]]:
+        """(absolute url, raw href, anchor text) for every http(s) anchor."""
+        out: List[Tuple[str, str, str]] = []
+        for href, label in self.anchors:
+            absolute = urljoin(self.url, href)
+            if absolute.startswith("http"):
+                out.append((absolute, href, label))
+        return out
+
+
+# Without huge_tree libxml2 drops everything below nesting depth 255 (page builders nest that deep)
+_LXML_PARSER = etree.HTMLParser(encoding="utf-8", huge_tree=True)
+# Strings BeautifulSoup leaves out of get_text(): script, style and template bodies and comments
+_TEXT_XPATH = etree.XPath("//text()[not(ancestor::script or ancestor::style or ancestor::template)]", smart_strings=False)
+_NODE_TEXT_XPATH = etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]", smart_strings=False)
+_ANCHOR_XPATH = etree.XPath("//a[@href]")
+_JSON_LD_XPATH = etree.XPath("//script[@type='application/ld+json']")
+
+
+def lxml_tree(html: str) -> etree._Element:
+    """Parse with libxml2's HTML parser; never fails, an empty document gives an empty ``<html>``."""
+    # Bytes with an explicit encoding: lxml rejects str input with an XML declaration
+    root = etree.fromstring(html.encode("utf-8", "replace"), _LXML_PARSER) if html.strip() else None
+    return root if root is not None else etree.Element("html")
+
+
+def node_text(node: etree._Element, sep: str = " ") -> str:
+    """``Tag.get_text(sep, strip=True)`` for an lxml element."""
+    if not len(node):
+        # Most anchors and headings hold a single string
+        return (node.text or "").strip()
+    return sep.join(s for s in (s.strip() for s in _NODE_TEXT_XPATH(node)) if s)
+
+
+class LxmlPage(ParsedPage):
+    """``ParsedPage`` built on lxml directly: XPath instead of BeautifulSoup
+    searches, no Python object per node. Several times faster to build; the
+    views match the BeautifulSoup ones."""
+
+    parser = "lxml"
+
+    @cached_property
+    def root(self) -> etree._Element:
+        return lxml_tree(self.html)
+
+    @property
+    def tree(self):
+        return self.root
+
+    def _meta(self, prop: str) -> str:
+        for meta in self.root.iter("meta"):
+            if meta.get("property") == prop:
+                return (meta.get("content") or "").strip()
+        return ""
+
+    @cached_property
+    def title(self) -> str:
+        title = self.root.find(".//title")
+        text = (title.text or "").strip() if title is not None else ""
+        return (text or self._meta("og:title"))[:200]
+
+    @cached_property
+    def name_hint(self) -> str:
+        h1 = self.root.find(".//h1")
+        return pick_name(self.title, node_text(h1, "") if h1 is not None else "", self._meta("og:site_name"))
+
+    @cached_property
+    def text(self) -> str:
+        return " ".join(s for s in (s.strip() for s in _TEXT_XPATH(self.root)) if s)
+
+    @cached_property
+    def anchors(self) -> List[Tuple[str, str]]:
+        return [(a.get("href"), node_text(a)) for a in _ANCHOR_XPATH(self.root) if a.get("href")]
+
+    @cached_property
+    def json_ld(self) -> List[str]:
+        return [(s.text or "").strip() for s in _JSON_LD_XPATH(self.root)]
+
+
+PARSERS: Dict[str, Type[ParsedPage]] = {"bs4": ParsedPage, "lxml": LxmlPage}
+
+
+def parse_page(html: str, url: str, parser: Optional[str] = None) -> ParsedPage:
+    return PARSERS[parser or DEFAULT_PARSER](html, url)
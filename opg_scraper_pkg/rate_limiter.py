@@ -1,24 +1,161 @@
 from __future__ import annotations
 
 import asyncio
+import math
 import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Union
+
+from .metrics import Metrics
+
+
+@dataclass
+class HostState:
+    """Politeness state of one host, owned by the limiter."""
+
+    delay: float
+    crawl_delay: float = 0.0
+    last_start: float = float("-inf")
+    next_allowed: float = 0.0
+    last_used: float = 0.0
+    latency_ewma: Optional[float] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+def parse_retry_after(value: Union[str, float, None], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if value is None or value == "":
+        return None
+    try:
+        seconds = float(value)
+        # "inf" and "nan" parse as floats but are not delta-seconds
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value)).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
 
 
 class HostRateLimiter:
-    def __init__(self, delay_seconds: float):
+    """Per-host throttle that adapts to how each host responds.
+
+    ``delay_seconds`` is the floor: a host is never hit more often than that,
+    nor more often than its robots ``Crawl-delay``. The delay doubles on
+    errors, 429/503 and rising latency, and decays back to the floor on
+    healthy responses; ``Retry-After`` blocks every coroutine using the host
+    until it expires, for at most ``max_delay``. Hosts idle for ``idle_ttl``
+    seconds are forgotten, except for their robots ``Crawl-delay``, which
+    ``RobotsChecker`` sets only once per run.
+    """
+
+    LATENCY_ALPHA = 0.3
+
+    def __init__(
+        self,
+        delay_seconds: float,
+        max_delay: float = 60.0,
+        idle_ttl: float = 600.0,
+        latency_factor: float = 2.0,
+        recovery: float = 0.8,
+        metrics: Optional[Metrics] = None,
+    ):
         self.delay = delay_seconds
-        self._locks: dict[str, asyncio.Lock] = {}
-        self._last: dict[str, float] = {}
+        self.metrics = metrics or Metrics()
+        self.max_delay = max(max_delay, delay_seconds)
+        self.idle_ttl = idle_ttl
+        self.latency_factor = latency_factor
+        self.recovery = recovery
+        self._hosts: Dict[str, HostState] = {}
+        # Kept apart from HostState so evicting an idle host does not drop it
+        self._crawl_delays: Dict[str, float] = {}
+        self._last_evict = time.monotonic()
+
+    def _state(self, host: str) -> HostState:
+        st = self._hosts.get(host)
+        if st is None:
+            crawl_delay = self._crawl_delays.get(host, 0.0)
+            st = self._hosts[host] = HostState(delay=max(self.delay, crawl_delay), crawl_delay=crawl_delay)
+        return st
+
+    def floor(self, host: str) -> float:
+        return max(self.delay, self._crawl_delays.get(host, 0.0))
+
+    def current_delay(self, host: str) -> float:
+        st = self._hosts.get(host)
+        return st.delay if st else self.floor(host)
 
     async def throttle(self, host: str):
-        if host not in self._locks:
-            self._locks[host] = asyncio.Lock()
-        lock = self._locks[host]
-        async with lock:
-            now = time.monotonic()
-            last = self._last.get(host, 0.0)
-            wait = self.delay - (now - last)
-            if wait > 0:
+        st = self._state(host)
+        started = time.monotonic()
+        async with st.lock:
+            while True:
+                now = time.monotonic()
+                wait = max(st.next_allowed, st.last_start + st.delay) - now
+                if wait <= 0:
+                    break
+                # Re-check after sleeping: a Retry-After may have moved next_allowed
                 await asyncio.sleep(wait)
-            self._last[host] = time.monotonic()
+            st.last_start = st.last_used = time.monotonic()
+        waited = st.last_start - started
+        self.metrics.observe("opg_throttle_wait_seconds", waited)
+        self.metrics.inc("opg_throttle_wait_seconds_total", waited, host=host)
+        self._maybe_evict()
+
+    def set_crawl_delay(self, host: str, seconds: Optional[float]):
+        if not seconds:
+            return
+        self._crawl_delays[host] = min(float(seconds), self.max_delay)
+        st = self._state(host)
+        st.crawl_delay = self._crawl_delays[host]
+        st.delay = max(st.delay, st.crawl_delay)
+
+    def record(
+        self,
+        host: str,
+        status: Optional[int],
+        latency: Optional[float] = None,
+        retry_after: Union[str, float, None] = None,
+    ):
+        """Feed the outcome of a request back; ``status`` is None for network errors."""
+        st = self._state(host)
+        now = time.monotonic()
+        st.last_used = now
+        floor = max(self.delay, st.crawl_delay)
+        if status is None or status in (429, 503) or status >= 500:
+            st.delay = min(self.max_delay, max(floor, st.delay * 2))
+            pause = parse_retry_after(retry_after)
+            pause = st.delay if pause is None else min(pause, self.max_delay)
+            st.next_allowed = max(st.next_allowed, now + pause)
+            return
+        if latency is not None:
+            rising = st.latency_ewma is not None and latency > self.latency_factor * st.latency_ewma
+            st.latency_ewma = latency if st.latency_ewma is None else (
+                self.LATENCY_ALPHA * latency + (1 - self.LATENCY_ALPHA) * st.latency_ewma
+            )
+            if rising:
+                st.delay = min(self.max_delay, st.delay * 1.5)
+                return
+        st.delay = max(floor, st.delay * self.recovery)
+
+    def _maybe_evict(self):
+        now = time.monotonic()
+        if now - self._last_evict >= self.idle_ttl / 4:
+            self.evict_idle(now)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        idle = [
+            h for h, st in self._hosts.items()
+            if now - st.last_used > self.idle_ttl and now >= st.next_allowed and not st.lock.locked()
+        ]
+        for h in idle:
+            del self._hosts[h]
+        self._last_evict = now
+        return len(idle)
 
+    def __len__(self) -> int:
+        return len(self._hosts)
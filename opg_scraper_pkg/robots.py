@@ -1,47 +1,165 @@
 from __future__ import annotations
 
-import aiohttp
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from urllib import robotparser
 from urllib.parse import urlparse
-import logging
+
+import aiohttp
+
+from .rate_limiter import HostRateLimiter
 
 
 class RobotsChecker:
-    def __init__(self, session: aiohttp.ClientSession, user_agent: str, timeout: int):
+    """robots.txt gate shared by every crawl of a run.
+
+    Rules are fetched once per host: concurrent first requests await the same
+    in-flight fetch. With ``cache_dir`` the robots.txt bodies are kept in
+    SQLite and reused for ``ttl_seconds`` across runs. ``Crawl-delay`` (or
+    ``Request-rate``) is handed to the rate limiter as that host's floor.
+
+    As in RFC 9309, a 4xx robots.txt (other than 429) allows everything, while
+    a 5xx, a 429 or an unreachable host disallows everything; the latter is
+    kept for this run only and never written to the cache.
+    """
+
+    FILENAME = "robots_cache.sqlite3"
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        user_agent: str,
+        timeout: Union[float, aiohttp.ClientTimeout],
+        limiter: Optional[HostRateLimiter] = None,
+        cache_dir: Optional[str] = None,
+        ttl_seconds: float = 0,
+        offline: bool = False,
+    ):
         self.session = session
         self.user_agent = user_agent
         self.timeout = timeout
+        self.limiter = limiter
+        self.ttl = ttl_seconds
+        self.offline = offline
         self._cache: dict[str, robotparser.RobotFileParser] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._db = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(cache_dir, self.FILENAME))
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS robots (host TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._db.commit()
 
-    async def _fetch_robots(self, base_url: str) -> robotparser.RobotFileParser:
-        parsed = urlparse(base_url)
-        host = parsed.hostname
+    @staticmethod
+    def _robots_url(url: str) -> Tuple[str, str]:
+        parsed = urlparse(url)
+        host = parsed.hostname or ""
         scheme = parsed.scheme or "http"
-        robots_url = f"{scheme}://{host}/robots.txt" if host else ""
-        rp = robotparser.RobotFileParser()
-        if not robots_url:
-            rp.parse([])
-            return rp
+        netloc = parsed.netloc.rsplit("@", 1)[-1] or host
+        return host, (f"{scheme}://{netloc}/robots.txt" if host else "")
+
+    def _stored(self, host: str) -> Optional[Tuple[str, float]]:
+        if self._db is None:
+            return None
+        return self._db.execute("SELECT body, fetched_at FROM robots WHERE host = ?", (host,)).fetchone()
+
+    def _store(self, host: str, body: str):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO robots (host, body, fetched_at) VALUES (?, ?, ?)", (host, body, time.time())
+        )
+        self._db.commit()
+
+    async def _download(self, host: str, robots_url: str) -> Tuple[Optional[int], str]:
+        """(status, body); status is None when the host could not be reached."""
+        if self.limiter is not None:
+            await self.limiter.throttle(host)
         try:
             async with self.session.get(robots_url, headers={"User-Agent": self.user_agent}, timeout=self.timeout) as resp:
-                if resp.status == 200:
-                    text = await resp.text(errors="ignore")
-                    rp.parse(text.splitlines())
-                else:
-                    rp.parse([])
+                if self.limiter is not None:
+                    self.limiter.record(host, resp.status, retry_after=resp.headers.get("Retry-After"))
+                return resp.status, (await resp.text(errors="ignore") if 200 <= resp.status < 300 else "")
         except Exception as e:
             logging.debug("robots.txt fetch error for %s: %s", robots_url, e)
+        return None, ""
+
+    async def _fetch_robots(self, base_url: str) -> robotparser.RobotFileParser:
+        host, robots_url = self._robots_url(base_url)
+        rp = robotparser.RobotFileParser()
+        if not robots_url:
             rp.parse([])
+            return rp
+        stored = self._stored(host)
+        if stored is not None and (self.offline or time.time() - stored[1] < self.ttl):
+            body = stored[0]
+        elif self.offline:
+            body = ""
+        else:
+            status, body = await self._download(host, robots_url)
+            if status is None or status == 429 or status >= 500:
+                logging.info("robots.txt za %s nije dostupan (%s); host se u ovom pokretanju ne crawla", host, status or "greška veze")
+                rp.disallow_all = True
+                return rp
+            self._store(host, body)
+        rp.parse(body.splitlines())
         return rp
 
+    def _apply_crawl_delay(self, host: str, rp: robotparser.RobotFileParser):
+        if self.limiter is None:
+            return
+        delay = rp.crawl_delay(self.user_agent)
+        rate = rp.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            delay = max(float(delay or 0), rate.seconds / rate.requests)
+        if delay:
+            self.limiter.set_crawl_delay(host, float(delay))
+
+    async def _load(self, url: str, host: str) -> robotparser.RobotFileParser:
+        rp = await self._fetch_robots(url)
+        self._cache[host] = rp
+        self._apply_crawl_delay(host, rp)
+        return rp
+
+    async def prepare(self, url: str) -> robotparser.RobotFileParser:
+        """Load the rules for ``url``'s host, sharing one fetch between concurrent callers."""
+        host = urlparse(url).hostname or ""
+        if host in self._cache:
+            return self._cache[host]
+        fut = self._inflight.get(host)
+        if fut is None:
+            fut = self._inflight[host] = asyncio.ensure_future(self._load(url, host))
+            fut.add_done_callback(lambda _: self._inflight.pop(host, None))
+        # Shield so one cancelled caller does not cancel the fetch the others wait on
+        return await asyncio.shield(fut)
+
+    def sitemaps(self, url: str) -> List[str]:
+        """``Sitemap:`` lines of the already loaded rules for ``url``'s host."""
+        rp = self._cache.get(urlparse(url).hostname or "")
+        return list((rp.site_maps() if rp else None) or [])
+
+    def can_fetch(self, url: str) -> bool:
+        """Check against already loaded rules; a host not ``prepare``d yet is disallowed."""
+        try:
+            rp = self._cache.get(urlparse(url).hostname or "")
+        except ValueError:
+            return False
+        return rp is not None and rp.can_fetch(self.user_agent, url)
+
     async def allowed(self, url: str) -> bool:
         try:
-            host = urlparse(url).hostname
-            if not host:
-                return True
-            if host not in self._cache:
-                self._cache[host] = await self._fetch_robots(url)
-            return self._cache[host].can_fetch(self.user_agent, url)
-        except Exception:
-            return True
+            await self.prepare(url)
+        except Exception as e:
+            logging.debug("robots.txt check failed for %s: %s", url, e)
+            return False
+        return self.can_fetch(url)
 
+    def close(self):
+        if self._db is not None:
+            self._db.close()
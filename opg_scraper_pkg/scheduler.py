@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Sequence, TypeVar
+
+from .config import HOST_PAGE_CAP, HOST_PAGE_MIN
+
+
+T = TypeVar("T")
+
+
+class PageBudget:
+    """Page budget shared by all host crawls of one county.
+
+    Every coroutine takes pages from the same counter; since the event loop only
+    switches tasks on ``await``, ``take`` is atomic without an explicit lock.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.remaining = total
+
+    def take(self, n: int = 1) -> bool:
+        if self.remaining < n:
+            return False
+        self.remaining -= n
+        return True
+
+    async def acquire(self, n: int = 1) -> bool:
+        """``take`` as the crawler calls it; ``LeaseBudget`` needs to await its queue."""
+        return self.take(n)
+
+    @property
+    def used(self) -> int:
+        return self.total - self.remaining
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining <= 0
+
+
+def host_page_cap(relative_yield: float, base: int = HOST_PAGE_CAP, minimum: int = HOST_PAGE_MIN) -> int:
+    """Most pages one host may take from the county budget, weighted by its
+    expected yield (1.0 = unseen host), at most twice ``base``. Nothing is reserved up front: a host
+    that stops early leaves its unused pages in the shared budget."""
+    return max(minimum, min(base * 2, round(base * relative_yield)))
+
+
+class HostPool:
+    """Bounded pool that runs independent host crawl jobs concurrently.
+
+    Results are handed on in job order, so the output does not depend on
+    which host finishes first.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self._sem = asyncio.Semaphore(self.concurrency)
+
+    async def _run_one(self, job: Callable[[], Awaitable[T]]) -> T:
+        async with self._sem:
+            return await job()
+
+    async def run_streaming(self, jobs: Sequence[Callable[[], Awaitable[T]]], on_result: Callable[[T], None]):
+        """Hand each result to ``on_result`` as soon as it and every earlier job are done.
+
+        Results that finish ahead of a slower earlier job are held until it
+        completes, so while one host is slow, up to every later host's
+        results (records and audit pages) wait in memory behind it.
+        """
+        pending: Dict[int, T] = {}
+        next_index = 0
+
+        async def run_indexed(i: int, job: Callable[[], Awaitable[T]]):
+            nonlocal next_index
+            pending[i] = await self._run_one(job)
+            while next_index in pending:
+                on_result(pending.pop(next_index))
+                next_index += 1
+
+        await asyncio.gather(*(run_indexed(i, j) for i, j in enumerate(jobs)))
+
+
+class HostRegistry:
+    """Global per-host crawl registry shared by counties processed together.
+
+    The first county that claims a host crawls it; later counties only record
+    that they surfaced it, so its records can be tagged with all of them.
+    """
+
+    def __init__(self):
+        self._owner: dict[str, str] = {}
+        self._counties: dict[str, List[str]] = {}
+
+    def claim(self, host: str, county: str) -> bool:
+        counties = self._counties.setdefault(host, [])
+        if county not in counties:
+            counties.append(county)
+        if host in self._owner:
+            return self._owner[host] == county
+        self._owner[host] = county
+        return True
+
+    def owner(self, host: str) -> str:
+        return self._owner.get(host, "")
+
+    def counties_for(self, host: str) -> List[str]:
+        return list(self._counties.get(host, []))
+
+    def county_label(self, host: str, fallback: str) -> str:
+        counties = self._counties.get(host)
+        return "; ".join(counties) if counties else fallback
+
+    def to_dict(self) -> dict:
+        return {"owner": dict(self._owner), "counties": {h: list(c) for h, c in self._counties.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HostRegistry":
+        registry = cls()
+        registry._owner = dict(data.get("owner", {}))
+        registry._counties = {h: list(c) for h, c in data.get("counties", {}).items()}
+        return registry
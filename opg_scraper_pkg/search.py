@@ -1,26 +1,146 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import Callable, List, Optional
-from urllib.parse import quote_plus, urlparse
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlencode, urlparse
 
 import aiohttp
 from bs4 import BeautifulSoup
+from lxml import etree
 
-from .config import USER_AGENT
+from .config import DEFAULT_PARSER, SEARCH_MAX_PAGES, SEARCH_QUERIES_AHEAD, USER_AGENT
+from .page import lxml_tree
 from .rate_limiter import HostRateLimiter
-from .utils import canonicalize_url
+from .utils import canonicalize_url, url_key
 
 
 ProgressCallback = Optional[Callable[[int], None]]  # receives increment value
 
+DDG_HTML_URL = "https://duckduckgo.com/html/"
+DDG_LOCALE = "hr-hr"
+
+
+class SearchCache:
+    """Parsed result pages keyed by engine (the search endpoint URL), query,
+    locale and page number.
+
+    Lives next to the HTTP cache as its own SQLite file; search pages are
+    kept only here, not in the HTTP cache. Entries are served for
+    ``ttl_seconds`` (any age in ``offline`` mode); empty pages are not stored,
+    since they usually mean the engine throttled the request.
+    """
+
+    FILENAME = "search_cache.sqlite3"
+
+    def __init__(self, cache_dir: str, ttl_seconds: float, offline: bool = False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.ttl = ttl_seconds
+        self.offline = offline
+        self._db = sqlite3.connect(os.path.join(cache_dir, self.FILENAME))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "engine TEXT NOT NULL, query TEXT NOT NULL, locale TEXT NOT NULL, page INTEGER NOT NULL, "
+            "urls TEXT NOT NULL, next_params TEXT, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (engine, query, locale, page))"
+        )
+        self._db.commit()
+
+    def get(self, engine: str, query: str, locale: str, page: int) -> Optional[Tuple[List[str], Optional[Dict[str, str]]]]:
+        row = self._db.execute(
+            "SELECT urls, next_params, fetched_at FROM results WHERE engine = ? AND query = ? AND locale = ? AND page = ?",
+            (engine, query, locale, page),
+        ).fetchone()
+        if row is None or not (self.offline or time.time() - row[2] < self.ttl):
+            return None
+        return json.loads(row[0]), json.loads(row[1]) if row[1] else None
+
+    def store(self, engine: str, query: str, locale: str, page: int, urls: List[str], next_params: Optional[Dict[str, str]]):
+        if not urls:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (engine, query, locale, page, urls, next_params, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (engine, query, locale, page, json.dumps(urls), json.dumps(next_params) if next_params else None, time.time()),
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_RESULT_LINKS_XPATH = etree.XPath(f"//a[{_has_class('result__a')}]")
+_ALL_LINKS_XPATH = etree.XPath("//a[@href]")
+_NEXT_FORMS_XPATH = etree.XPath(f"//*[{_has_class('nav-link')}]//form")
+
+
+def parse_ddg_results(html: str, parser: Optional[str] = None) -> Tuple[List[str], Optional[Dict[str, str]]]:
+    """Result URLs of a DDG HTML page and the form fields of its "Next" button."""
+    if (parser or DEFAULT_PARSER) == "lxml":
+        return _parse_ddg_results_lxml(html)
+    soup = BeautifulSoup(html, "lxml")
+    results: list[str] = []
+    for a in soup.select("a.result__a"):
+        href = a.get("href")
+        if href and href.startswith("http"):
+            results.append(canonicalize_url(href))
+    if not results:
+        for a in soup.select("a[href]"):
+            href = a.get("href")
+            if href and href.startswith("http"):
+                results.append(canonicalize_url(href))
+    next_params = None
+    for form in soup.select(".nav-link form"):
+        submit = form.find("input", attrs={"type": "submit"})
+        if submit is not None and "next" in (submit.get("value") or "").lower():
+            next_params = {i["name"]: i.get("value", "") for i in form.find_all("input", attrs={"type": "hidden"}) if i.get("name")}
+    return results, next_params
+
+
+def _parse_ddg_results_lxml(html: str) -> Tuple[List[str], Optional[Dict[str, str]]]:
+    root = lxml_tree(html)
+    results = [canonicalize_url(a.get("href")) for a in _RESULT_LINKS_XPATH(root) if (a.get("href") or "").startswith("http")]
+    if not results:
+        results = [canonicalize_url(a.get("href")) for a in _ALL_LINKS_XPATH(root) if a.get("href").startswith("http")]
+    next_params = None
+    for form in _NEXT_FORMS_XPATH(root):
+        inputs = list(form.iter("input"))
+        submit = next((i for i in inputs if i.get("type") == "submit"), None)
+        if submit is not None and "next" in (submit.get("value") or "").lower():
+            next_params = {i.get("name"): i.get("value", "") for i in inputs if i.get("type") == "hidden" and i.get("name")}
+    return results, next_params
+
 
 class Searcher:
-    def __init__(self, session: aiohttp.ClientSession, limiter: HostRateLimiter, dry_run: bool, timeout: int):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        limiter: HostRateLimiter,
+        dry_run: bool,
+        timeout: Union[float, aiohttp.ClientTimeout],
+        search_cache: Optional[SearchCache] = None,
+        max_pages: int = SEARCH_MAX_PAGES,
+        search_url: str = DDG_HTML_URL,
+        parser: Optional[str] = None,
+        queries_ahead: int = SEARCH_QUERIES_AHEAD,
+    ):
         self.session = session
         self.limiter = limiter
         self.dry_run = dry_run
         self.timeout = timeout
+        self.search_cache = search_cache
+        self.max_pages = max_pages
+        self.search_url = search_url
+        self.parser = parser
+        self.queries_ahead = max(1, queries_ahead)
 
     @staticmethod
     def county_queries(county: str) -> List[str]:
@@ -36,51 +156,83 @@ class Searcher:
         if self.dry_run:
             logging.info("[dry-run] GET %s", url)
             return ""
+        headers = {"User-Agent": USER_AGENT}
         host = urlparse(url).hostname or ""
         await self.limiter.throttle(host)
+        started = time.monotonic()
         try:
-            async with self.session.get(url, headers={"User-Agent": USER_AGENT}, timeout=self.timeout, allow_redirects=True) as resp:
+            async with self.session.get(url, headers=headers, timeout=self.timeout, allow_redirects=True) as resp:
+                self.limiter.record(host, resp.status, time.monotonic() - started, resp.headers.get("Retry-After"))
                 if resp.status == 429:
                     return ""
                 resp.raise_for_status()
                 return await resp.text(errors="ignore")
+        except aiohttp.ClientResponseError as e:
+            logging.debug("Fetch error %s: %s", url, e)
+            return ""
         except Exception as e:
             logging.debug("Fetch error %s: %s", url, e)
+            self.limiter.record(host, None)
             return ""
 
-    async def search_duckduckgo(self, query: str, max_results: int = 20) -> List[str]:
-        url = f"https://duckduckgo.com/html/?q={quote_plus(query)}&kl=hr-hr"
-        html = await self._fetch_text(url)
+    async def _ddg_page(self, query: str, page: int, params: Dict[str, str]) -> Tuple[List[str], Optional[Dict[str, str]]]:
+        if self.search_cache is not None:
+            hit = self.search_cache.get(self.search_url, query, DDG_LOCALE, page)
+            if hit is not None:
+                return hit
+            if self.search_cache.offline:
+                return [], None
+        html = await self._fetch_text(f"{self.search_url}?{urlencode(params)}")
         if not html:
-            return []
-        soup = BeautifulSoup(html, "lxml")
+            return [], None
+        results, next_params = parse_ddg_results(html, self.parser)
+        if self.search_cache is not None:
+            self.search_cache.store(self.search_url, query, DDG_LOCALE, page, results, next_params)
+        return results, next_params
+
+    async def search_duckduckgo(self, query: str, max_results: int = 20) -> List[str]:
         results: list[str] = []
-        for a in soup.select("a.result__a"):
-            href = a.get("href")
-            if href and href.startswith("http"):
-                results.append(canonicalize_url(href))
-            if len(results) >= max_results:
+        params: Optional[Dict[str, str]] = {"q": query, "kl": DDG_LOCALE}
+        page = 0
+        # Follow DDG's "Next" form until enough results or no further page
+        while params is not None and page < self.max_pages and len(results) < max_results:
+            page_results, next_params = await self._ddg_page(query, page, params)
+            if not page_results:
                 break
-        if not results:
-            for a in soup.select("a[href]"):
-                href = a.get("href")
-                if href and href.startswith("http"):
-                    results.append(canonicalize_url(href))
-                if len(results) >= max_results:
-                    break
-        return results
+            results.extend(page_results)
+            params = {**next_params, "kl": DDG_LOCALE} if next_params else None
+            page += 1
+        return results[:max_results]
 
     # Removed other engines by request; use only DuckDuckGo
 
     async def discover_seeds(self, county: str, max_results: int, on_progress: ProgressCallback = None) -> List[str]:
+        """County queries run ``queries_ahead`` at a time, in order: the next
+        query's pages are fetched while the current one is merged, but later
+        queries only start when one finishes, so stopping at ``max_results``
+        saves their requests to the engine. Cached queries return immediately."""
         seeds: list[str] = []
-        for q in self.county_queries(county):
-            res = await self.search_duckduckgo(q, max_results=max_results)
-            for url in res:
-                if url not in seeds:
-                    seeds.append(url)
-            if on_progress:
-                on_progress(1)
-            if len(seeds) >= max_results:
-                break
+        keys: set[str] = set()
+        # asyncio.Semaphore wakes waiters in FIFO order, so queries start in query order
+        slots = asyncio.Semaphore(self.queries_ahead)
+
+        async def run(query: str) -> List[str]:
+            async with slots:
+                return await self.search_duckduckgo(query, max_results=max_results)
+
+        tasks = [asyncio.ensure_future(run(q)) for q in self.county_queries(county)]
+        try:
+            for task in tasks:
+                for url in await task:
+                    if url_key(url) not in keys:
+                        keys.add(url_key(url))
+                        seeds.append(url)
+                if on_progress:
+                    on_progress(1)
+                if len(seeds) >= max_results:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         return seeds[:max_results]
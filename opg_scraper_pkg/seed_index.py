@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import csv
+import os
+import sqlite3
+from typing import Iterable, List, Optional
+
+from .config import DEFAULT_BLOCKED_DOMAINS
+from .utils import utc_now_iso
+
+
+def load_domain_list(path: str) -> List[str]:
+    """One domain per line; blank lines and ``#`` comments are ignored."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.split("#", 1)[0].strip().lower() for line in f if line.split("#", 1)[0].strip()]
+
+
+def _matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class SeedIndex:
+    """Per-host crawl yield across runs (SQLite), used to order and size host crawls.
+
+    Hosts are keyed by ``site_host``. The expected yield is a smoothed
+    emails-per-page rate: an unseen host scores ``PRIOR_EMAILS / PRIOR_PAGES``,
+    hosts that produced addresses score higher and hosts crawled without
+    result drift towards zero. Blocked domains are never crawled unless
+    allowlisted.
+    """
+
+    PRIOR_EMAILS = 1.0
+    PRIOR_PAGES = 10.0
+    EXPORT_FIELDS = ["host", "runs", "pages", "emails", "personal_emails", "expected_yield", "blocked", "last_seen"]
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        blocklist: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+        allowlist: Iterable[str] = (),
+    ):
+        """Without ``path`` the index lives in memory for this run only."""
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.blocklist = tuple(d.lower() for d in blocklist)
+        self.allowlist = tuple(d.lower() for d in allowlist)
+        self._db = sqlite3.connect(path or ":memory:")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hosts ("
+            "host TEXT PRIMARY KEY, runs INTEGER NOT NULL, pages INTEGER NOT NULL, emails INTEGER NOT NULL, "
+            "personal_emails INTEGER NOT NULL, last_seen TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def is_blocked(self, host: str) -> bool:
+        return not _matches(host, self.allowlist) and _matches(host, self.blocklist)
+
+    def record(self, host: str, pages: int, emails: int, personal_emails: int):
+        self._db.execute(
+            "INSERT INTO hosts (host, runs, pages, emails, personal_emails, last_seen) VALUES (?, 1, ?, ?, ?, ?) "
+            "ON CONFLICT (host) DO UPDATE SET runs = runs + 1, pages = pages + excluded.pages, "
+            "emails = emails + excluded.emails, personal_emails = personal_emails + excluded.personal_emails, "
+            "last_seen = excluded.last_seen",
+            (host, pages, emails, personal_emails, utc_now_iso()),
+        )
+        self._db.commit()
+
+    def expected_yield(self, host: str) -> float:
+        row = self._db.execute("SELECT pages, emails FROM hosts WHERE host = ?", (host,)).fetchone()
+        pages, emails = row if row else (0, 0)
+        return (emails + self.PRIOR_EMAILS) / (pages + self.PRIOR_PAGES)
+
+    def relative_yield(self, host: str) -> float:
+        """Expected yield against an unseen host (1.0)."""
+        return self.expected_yield(host) * self.PRIOR_PAGES / self.PRIOR_EMAILS
+
+    def order(self, hosts: Iterable[str]) -> List[str]:
+        """Hosts by expected yield, best first; ties keep search order."""
+        return sorted(hosts, key=lambda h: -self.expected_yield(h))
+
+    def export(self, path: str) -> int:
+        rows = self._db.execute(
+            "SELECT host, runs, pages, emails, personal_emails, last_seen FROM hosts ORDER BY host"
+        ).fetchall()
+        out = [
+            {
+                "host": host,
+                "runs": runs,
+                "pages": pages,
+                "emails": emails,
+                "personal_emails": personal,
+                "expected_yield": round(self.expected_yield(host), 4),
+                "blocked": self.is_blocked(host),
+                "last_seen": last_seen,
+            }
+            for host, runs, pages, emails, personal, last_seen in rows
+        ]
+        out.sort(key=lambda r: -r["expected_yield"])
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.EXPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(out)
+        return len(out)
+
+    def close(self):
+        self._db.close()
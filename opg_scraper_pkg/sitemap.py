@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import logging
+import zlib
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Iterable, List, Tuple
+from urllib.parse import urljoin, urlparse
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from .config import SITEMAP_MAX_BYTES, SITEMAP_MAX_FILES, SITEMAP_MAX_URLS
+from .utils import canonicalize_url, rehost, same_host, score_link
+
+
+# Tried in order when robots.txt lists no sitemap (plain, Yoast/Rank Math, WordPress core)
+DEFAULT_SITEMAP_PATHS = ("/sitemap.xml", "/sitemap_index.xml", "/wp-sitemap.xml")
+
+ChunkFetcher = Callable[[str], AsyncIterator[bytes]]
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """Incremental parser for ``<urlset>`` and ``<sitemapindex>`` documents.
+
+    Chunks are fed as they arrive (gzip is detected from the magic bytes and
+    inflated on the fly) and finished elements are cleared, so memory stays
+    flat however large the sitemap is. ``feed`` returns the ``("url", loc)``
+    and ``("sitemap", loc)`` entries completed by that chunk.
+    """
+
+    def __init__(self, max_bytes: int = SITEMAP_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+        self._xml = XMLPullParser(events=("start", "end"))
+        self._inflate = None
+        self._started = False
+        self._stack: List = []
+        self._loc = ""
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, str]]:
+        if not self._started:
+            self._started = True
+            if chunk[:2] == b"\x1f\x8b":
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflate is not None:
+            # Bounded inflate: a gzip bomb can never expand past max_bytes
+            chunk = self._inflate.decompress(chunk, max(0, self.max_bytes - self.size) + 1)
+        if self.size + len(chunk) > self.max_bytes:
+            chunk = chunk[: self.max_bytes - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._xml.feed(chunk)
+        return self._drain()
+
+    def _drain(self) -> List[Tuple[str, str]]:
+        out: List[Tuple[str, str]] = []
+        for event, elem in self._xml.read_events():
+            if event == "start":
+                self._stack.append(elem)
+                continue
+            name = _local(elem.tag)
+            if name == "loc":
+                self._loc = (elem.text or "").strip()
+            elif name in ("url", "sitemap"):
+                if self._loc:
+                    out.append((name, self._loc))
+                self._loc = ""
+            self._stack.pop()
+            if self._stack:
+                # Drop finished children; the root would otherwise keep every <url>
+                self._stack[-1].remove(elem)
+        return out
+
+
+def parse_sitemap(data: bytes, chunk_size: int = 65536) -> List[Tuple[str, str]]:
+    parser = SitemapParser()
+    out: List[Tuple[str, str]] = []
+    for i in range(0, len(data), chunk_size):
+        out.extend(parser.feed(data[i : i + chunk_size]))
+    return out
+
+
+def score_sitemap_url(url: str) -> float:
+    """Contact likelihood from the path only (the host would match "opg" everywhere)."""
+    p = urlparse(url)
+    return score_link(p.path + (f"?{p.query}" if p.query else ""), depth=1)
+
+
+async def discover(
+    seed_url: str,
+    fetch_chunks: ChunkFetcher,
+    sitemap_urls: Iterable[str] = (),
+    max_files: int = SITEMAP_MAX_FILES,
+    max_urls: int = SITEMAP_MAX_URLS,
+    allowed: Callable[[str], bool] = lambda url: True,
+) -> List[Tuple[str, float]]:
+    """Page URLs of ``seed_url``'s host from its sitemaps, best contact candidates first.
+
+    ``sitemap_urls`` are the sitemaps listed in robots.txt; without them the
+    usual locations are tried until one yields entries. Sitemap indexes are
+    followed breadth-first up to ``max_files`` documents.
+    """
+    queue = [rehost(u, seed_url) for u in sitemap_urls if same_host(seed_url, u)]
+    fallback = not queue
+    if fallback:
+        queue = [urljoin(seed_url, p) for p in DEFAULT_SITEMAP_PATHS]
+    seen_files = set()
+    found = {}
+    files = 0
+    while queue and files < max_files and len(found) < max_urls:
+        sm_url = queue.pop(0)
+        if sm_url in seen_files:
+            continue
+        seen_files.add(sm_url)
+        files += 1
+        parser = SitemapParser()
+        entries = 0
+        try:
+            # aclosing: breaking out early releases the response now, not at GC
+            async with aclosing(fetch_chunks(sm_url)) as chunks:
+                async for chunk in chunks:
+                    for kind, loc in parser.feed(chunk):
+                        entries += 1
+                        if not same_host(seed_url, loc):
+                            continue
+                        loc = rehost(loc, seed_url)
+                        if kind == "sitemap":
+                            queue.append(loc)
+                            continue
+                        loc = canonicalize_url(loc)
+                        if loc not in found and len(found) < max_urls and allowed(loc):
+                            found[loc] = score_sitemap_url(loc)
+                    if parser.truncated or len(found) >= max_urls:
+                        break
+        except ParseError as e:
+            logging.debug("Sitemap parse error %s: %s", sm_url, e)
+        if fallback and entries:
+            # The first well-known location that answered is the site's sitemap
+            queue = [u for u in queue if u not in (urljoin(seed_url, p) for p in DEFAULT_SITEMAP_PATHS)]
+            fallback = False
+    return sorted(found.items(), key=lambda kv: -kv[1])
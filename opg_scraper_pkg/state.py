@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import asdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from .analysis import PageResult
+from .utils import utc_now_iso
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha1(html.encode("utf-8", "ignore")).hexdigest()
+
+
+class StateStore:
+    """Persistent memory between runs for incremental re-crawls (SQLite).
+
+    ``sightings`` holds one row per (email, source_url) with first/last seen
+    timestamps, the last run that saw it and the run before that; ``pages`` holds the content hash
+    and analysis result of every crawled page so unchanged pages are not
+    parsed again.
+    """
+
+    def __init__(self, path: str, run_id: Optional[int] = None):
+        """Start a new run, or continue run ``run_id`` when resuming from a checkpoint."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, started_at TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS sightings (
+                email TEXT NOT NULL,
+                source_url TEXT NOT NULL,
+                county TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                last_run INTEGER NOT NULL,
+                prev_run INTEGER,
+                PRIMARY KEY (email, source_url)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+        if run_id is None:
+            row = self._db.execute("SELECT MAX(id) FROM runs").fetchone()
+        else:
+            row = self._db.execute("SELECT MAX(id) FROM runs WHERE id < ?", (run_id,)).fetchone()
+        self.previous_run: Optional[int] = row[0]
+        if run_id is None:
+            run_id = self._db.execute("INSERT INTO runs (started_at) VALUES (?)", (utc_now_iso(),)).lastrowid
+            self._db.commit()
+        self.run_id = run_id
+
+    # Pages
+
+    def cached_result(self, url: str, digest: str) -> Optional[PageResult]:
+        row = self._db.execute("SELECT content_hash, result FROM pages WHERE url = ?", (url,)).fetchone()
+        if not row or row[0] != digest:
+            return None
+        data = json.loads(row[1])
+        data["emails"] = [tuple(e) for e in data.get("emails", [])]
+        data["links"] = [tuple(link) for link in data.get("links", [])]
+        return PageResult(**data)
+
+    def save_result(self, url: str, digest: str, result: PageResult):
+        self._db.execute(
+            "INSERT OR REPLACE INTO pages (url, content_hash, result, last_seen) VALUES (?, ?, ?, ?)",
+            (url, digest, json.dumps(asdict(result), ensure_ascii=False), utc_now_iso()),
+        )
+        self._db.commit()
+
+    # Emails
+
+    def record_sightings(self, records: Iterable):
+        """Store (email, source_url) sightings of this run; may be called once per host."""
+        now = utc_now_iso()
+        for r in records:
+            self._db.execute(
+                "INSERT INTO sightings (email, source_url, county, first_seen, last_seen, last_run) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (email, source_url) DO UPDATE SET last_seen = excluded.last_seen, county = excluded.county, "
+                "prev_run = CASE WHEN sightings.last_run = excluded.last_run THEN sightings.prev_run ELSE sightings.last_run END, "
+                "last_run = excluded.last_run",
+                (r.email.lower(), r.source_url, r.county, r.date_found or now, now, self.run_id),
+            )
+        self._db.commit()
+
+    def first_seen_map(self) -> Dict[str, str]:
+        """First-seen timestamp per lowercase email, over all runs."""
+        rows = self._db.execute("SELECT email, MIN(first_seen) FROM sightings GROUP BY email").fetchall()
+        return {email: first for email, first in rows}
+
+    def _sources(self, query: str, params: tuple) -> Dict[str, Set[str]]:
+        out: Dict[str, Set[str]] = {}
+        for email, url in self._db.execute("SELECT email, source_url FROM sightings WHERE " + query, params):
+            out.setdefault(email, set()).add(url)
+        return out
+
+    def delta(self) -> List[dict]:
+        """Differences between the previous run and this one: new, disappeared and moved emails."""
+        current = self._sources("last_run = ?", (self.run_id,))
+        previous: Dict[str, Set[str]] = {}
+        if self.previous_run is not None:
+            previous = self._sources(
+                "last_run = ? OR (last_run = ? AND prev_run = ?)", (self.previous_run, self.run_id, self.previous_run)
+            )
+        county = {e: c for e, c in self._db.execute("SELECT email, county FROM sightings ORDER BY last_seen")}
+
+        def row(change: str, email: str) -> dict:
+            return {
+                "change": change,
+                "email": email,
+                "county": county.get(email, ""),
+                "source_url": " ".join(sorted(current.get(email, ()))),
+                "previous_source_url": " ".join(sorted(previous.get(email, ()))),
+            }
+
+        changes = [row("new", e) for e in sorted(current.keys() - previous.keys())]
+        changes += [row("disappeared", e) for e in sorted(previous.keys() - current.keys())]
+        changes += [row("moved", e) for e in sorted(current.keys() & previous.keys()) if current[e] != previous[e]]
+        return changes
+
+    @staticmethod
+    def delta_path_from_csv(csv_path: str) -> str:
+        base, _ = os.path.splitext(csv_path)
+        return base + ".delta.csv"
+
+    def write_delta(self, csv_path: str) -> List[dict]:
+        changes = self.delta()
+        with open(self.delta_path_from_csv(csv_path), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["change", "email", "county", "source_url", "previous_source_url"])
+            writer.writeheader()
+            writer.writerows(changes)
+        return changes
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+
+import aiohttp
+
+from .config import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_CONNECTIONS_PER_HOST,
+    DEFAULT_DNS_TTL,
+    DEFAULT_KEEPALIVE,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    USER_AGENT,
+)
+
+
+@dataclass
+class TransportOptions:
+    """Connection pool, DNS cache, timeouts and compression of the shared session.
+
+    0 disables a limit or a timeout; ``dns_ttl`` 0 turns the DNS cache off.
+    With ``compression`` aiohttp offers gzip and deflate, plus br when the
+    Brotli package is installed, and decodes the body before it is read;
+    without it only uncompressed bodies are accepted.
+    """
+
+    limit: int = DEFAULT_CONNECTION_LIMIT
+    limit_per_host: int = DEFAULT_CONNECTIONS_PER_HOST
+    dns_ttl: float = DEFAULT_DNS_TTL
+    keepalive: float = DEFAULT_KEEPALIVE
+    total_timeout: float = DEFAULT_REQUEST_TIMEOUT
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    compression: bool = True
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "TransportOptions":
+        return cls(
+            limit=args.max_connections,
+            limit_per_host=args.max_connections_per_host,
+            dns_ttl=args.dns_ttl,
+            keepalive=args.keepalive,
+            total_timeout=args.timeout,
+            connect_timeout=args.connect_timeout,
+            read_timeout=args.read_timeout,
+            compression=not args.no_compression,
+        )
+
+    def client_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=self.total_timeout or None,
+            connect=self.connect_timeout or None,
+            sock_read=self.read_timeout or None,
+        )
+
+
+def create_session(options: TransportOptions, **connector_kw) -> aiohttp.ClientSession:
+    """One session for search, robots.txt, sitemaps and pages, so every phase
+    shares the pool and reuses open (TLS) connections. ``connector_kw`` goes to
+    ``TCPConnector`` (e.g. a resolver)."""
+    connector = aiohttp.TCPConnector(
+        limit=options.limit,
+        limit_per_host=options.limit_per_host,
+        use_dns_cache=options.dns_ttl > 0,
+        ttl_dns_cache=options.dns_ttl or None,
+        keepalive_timeout=options.keepalive,
+        **connector_kw,
+    )
+    headers = {"User-Agent": USER_AGENT}
+    if not options.compression:
+        headers["Accept-Encoding"] = "identity"
+    return aiohttp.ClientSession(connector=connector, timeout=options.client_timeout(), headers=headers)
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import codecs
 import re
 from datetime import datetime, timezone
 from typing import Optional
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
 
-from .config import ROLE_BASED_PREFIXES, OPT_OUT_KEYWORDS
+from .config import BINARY_EXTENSIONS, HTML_CONTENT_TYPES, ROLE_BASED_PREFIXES, OPT_OUT_KEYWORDS
 
 
 def utc_now_iso() -> str:
@@ -20,43 +21,167 @@ def normalize_email(email: str) -> str:
     return e.lower()
 
 
+EMAIL_RE = re.compile(r"(?i)^[A-Z0-9._%+\-']{1,64}@[A-Z0-9.-]{1,253}\.[A-Z]{2,63}$")
+# Local parts of ROLE_BASED_PREFIXES ("info@" -> "info") for a single set lookup
+ROLE_BASED_LOCALS = frozenset(p.rstrip("@") for p in ROLE_BASED_PREFIXES)
+# Lowercased and deduplicated once. A plain substring scan per keyword beats a
+# combined alternation (or trie-shaped) regex on page-sized text in CPython;
+# see benchmarks/bench_utils.py.
+OPT_OUT_KEYWORDS_LOWER = tuple(dict.fromkeys(k.lower() for k in OPT_OUT_KEYWORDS))
+OPG_IN_TITLE_RE = re.compile(r"\bOPG\s+[^|\-–—]+", re.IGNORECASE)
+OPG_WORD_RE = re.compile(r"\bOPG\b", re.IGNORECASE)
+
+
 def is_valid_email(email: str) -> bool:
-    EMAIL_RE = re.compile(r"(?i)^[A-Z0-9._%+\-']{1,64}@[A-Z0-9.-]{1,253}\.[A-Z]{2,63}$")
-    return bool(EMAIL_RE.match(email))
+    return EMAIL_RE.match(email) is not None
 
 
 def is_role_based(email: str) -> bool:
-    el = email.lower()
-    return any(el.startswith(p) for p in ROLE_BASED_PREFIXES)
+    local, at, _ = email.partition("@")
+    return bool(at) and local.lower() in ROLE_BASED_LOCALS
+
+
+def site_host(url: str) -> str:
+    """Lowercased hostname without ``www.``, so both spellings are one site."""
+    try:
+        host = urlparse(url).hostname or ""
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
 
 
 def same_host(u1: str, u2: str) -> bool:
     try:
-        p1 = urlparse(u1)
-        p2 = urlparse(u2)
-        return p1.hostname == p2.hostname
+        h1 = site_host(u1)
+        return bool(h1) and h1 == site_host(u2)
     except Exception:
         return False
 
 
+def rehost(url: str, seed_url: str) -> str:
+    """``url`` moved onto ``seed_url``'s netloc, so a ``www.`` link of the same
+    site is checked against the seed's robots.txt and shares its rate limit."""
+    p, seed = urlparse(url), urlparse(seed_url)
+    return url if p.netloc == seed.netloc else urlunparse(p._replace(netloc=seed.netloc))
+
+
+TRACKING_PARAMS = frozenset(
+    ("fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl")
+)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
 def canonicalize_url(url: str) -> str:
+    """Fetchable canonical form: lowercase scheme/host, no default port, fragment
+    or tracking parameters, remaining query parameters sorted."""
     p = urlparse(url)
-    scheme = p.scheme or "http"
-    netloc = p.netloc
+    scheme = (p.scheme or "http").lower()
+    host = (p.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = p.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    if p.username:
+        netloc = f"{p.username}{':' + p.password if p.password else ''}@{netloc}"
     path = p.path or "/"
-    query = f"?{p.query}" if p.query else ""
+    query = ""
+    if p.query:
+        params = [
+            kv for kv in p.query.split("&")
+            if kv and not kv.lower().startswith("utm_") and kv.split("=", 1)[0].lower() not in TRACKING_PARAMS
+        ]
+        query = "?" + "&".join(sorted(params)) if params else ""
     return f"{scheme}://{netloc}{path}{query}"
 
 
+def url_key(url: str) -> str:
+    """Dedup key: the canonical URL minus what rarely changes the page
+    (http vs https, ``www.``, a trailing slash). Not meant to be fetched."""
+    canon = canonicalize_url(url)
+    rest = canon.split("://", 1)[1]
+    if rest.startswith("www."):
+        rest = rest[4:]
+    path_end = rest.find("?")
+    path, query = (rest, "") if path_end < 0 else (rest[:path_end], rest[path_end:])
+    if path.endswith("/") and path.count("/") > 1:
+        path = path.rstrip("/")
+    return path + query
+
+
+def has_binary_extension(url: str) -> bool:
+    return urlparse(url).path.lower().endswith(BINARY_EXTENSIONS)
+
+
+def is_html_content_type(content_type: str) -> bool:
+    """A missing Content-Type is given the benefit of the doubt."""
+    ct = content_type.split(";", 1)[0].strip().lower()
+    return not ct or ct in HTML_CONTENT_TYPES
+
+
+META_CHARSET_RE = re.compile(rb"""(?i)<meta[^>]+charset\s*=\s*["']?([a-z0-9_\-:.]+)""")
+
+
+def decode_html(raw: bytes, charset: Optional[str] = None) -> str:
+    """Declared charset, then a BOM or ``<meta charset>`` near the top, then UTF-8 with a cp1250 fallback."""
+    if not charset:
+        if raw.startswith(b"\xef\xbb\xbf"):
+            charset = "utf-8-sig"
+        else:
+            m = META_CHARSET_RE.search(raw, 0, 4096)
+            charset = m.group(1).decode("ascii") if m else None
+    if charset:
+        try:
+            return raw.decode(charset, errors="replace")
+        except LookupError:
+            pass
+    try:
+        # final=False drops a character cut in half by --max-page-bytes instead of failing the page
+        return codecs.getincrementaldecoder("utf-8")().decode(raw, final=False)
+    except UnicodeDecodeError:
+        # Older Croatian sites are commonly windows-1250
+        return raw.decode("cp1250", errors="replace")
+
+
 def looks_like_contact_link(href: str) -> bool:
     key_parts = ("kontakt", "contact", "email", "o-nama", "onama", "about", "opg", "gospodarstvo")
     l = href.lower()
     return any(k in l for k in key_parts)
 
 
-def contains_opt_out(text: str) -> bool:
-    t = text.lower()
-    return any(k in t for k in OPT_OUT_KEYWORDS)
+LINK_SCORE_KEYWORDS = (
+    ("kontakt", 4.0),
+    ("contact", 4.0),
+    ("email", 3.0),
+    ("e-mail", 3.0),
+    ("o-nama", 2.0),
+    ("onama", 2.0),
+    ("o nama", 2.0),
+    ("about", 2.0),
+    ("impressum", 2.0),
+    ("opg", 1.0),
+    ("gospodarstvo", 1.0),
+)
+
+
+def score_link(href: str, anchor_text: str = "", depth: int = 0) -> float:
+    """Crawl priority of a link: contact-looking URLs and anchors first, shallow before deep."""
+    h = href.lower()
+    t = anchor_text.lower()
+    score = 0.0
+    for key, weight in LINK_SCORE_KEYWORDS:
+        if key in h:
+            score += weight
+        elif t and key in t:
+            score += weight / 2
+    return score - 0.5 * depth
+
+
+def contains_opt_out(text: str, already_lower: bool = False) -> bool:
+    t = text if already_lower else text.lower()
+    return any(k in t for k in OPT_OUT_KEYWORDS_LOWER)
 
 
 def extract_page_title(soup) -> str:
@@ -68,20 +193,25 @@ def extract_page_title(soup) -> str:
     return title[:200]
 
 
-def guess_name_from_page(soup) -> str:
-    import re as _re
-    title = extract_page_title(soup)
+def guess_name_from_page(soup, title: Optional[str] = None) -> str:
+    """``title`` may be passed when the caller already extracted it."""
+    if title is None:
+        title = extract_page_title(soup)
+    h1 = soup.find("h1")
+    og = soup.find("meta", attrs={"property": "og:site_name"})
+    return pick_name(title, h1.get_text(strip=True) if h1 else "", (og.get("content") or "").strip() if og else "")
+
+
+def pick_name(title: str, h1: str, site_name: str) -> str:
+    """Name of the OPG from page parts, shared by the parser backends: an
+    "OPG ..." in the title, an OPG-like ``<h1>``, ``og:site_name``, the title."""
     if title:
-        m = _re.search(r"\bOPG\s+[^|\-–—]+", title, _re.IGNORECASE)
+        m = OPG_IN_TITLE_RE.search(title)
         if m:
             return m.group(0).strip()
-    h1 = soup.find("h1")
-    if h1 and h1.get_text(strip=True):
-        text = h1.get_text(strip=True)
-        if _re.search(r"\bOPG\b", text, _re.IGNORECASE):
-            return text[:200]
-    og = soup.find("meta", attrs={"property": "og:site_name"})
-    if og and og.get("content"):
-        return og.get("content").strip()[:200]
+    if h1 and OPG_WORD_RE.search(h1):
+        return h1[:200]
+    if site_name:
+        return site_name[:200]
     return title or ""
 
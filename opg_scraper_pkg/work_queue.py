@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .config import DEFAULT_LEASE_SECONDS, LEASE_PAGE_CHUNK, MAX_LEASE_ATTEMPTS
+
+
+def _serialized(method):
+    # Workers call the queue from asyncio.to_thread; one connection, one call at a time
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+@dataclass
+class HostTask:
+    host: str
+    county: str
+    seeds: List[str]
+    max_pages: int
+
+
+class WorkQueue:
+    """Hosts to crawl, leased to one worker at a time (SQLite).
+
+    The coordinator adds every host once, with its seeds and page cap, and
+    sets each county's page budget. A worker leases a host for
+    ``lease_seconds``, renews the lease while crawling, draws pages from the
+    county budget as it fetches them (``LeaseBudget``) and completes the lease
+    with the pages it used; anything drawn but unused goes back to the
+    county. A lease that is not renewed (the worker died) expires, its pages
+    are refunded and the host is handed to the next worker that asks, at
+    most ``max_attempts`` times.
+
+    One host never has two live leases, so per-host politeness holds across
+    workers. Without ``path`` the queue lives in memory, which is enough for
+    several workers in one process and for tests.
+
+    Calls are blocking SQLite writes; async callers run them with
+    ``asyncio.to_thread`` so a contended file never stalls the event loop (and
+    with it the lease renewals). The busy timeout stays well under the renewal
+    interval of ``lease_seconds / 3``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = MAX_LEASE_ATTEMPTS,
+        clock: Callable[[], float] = time.time,
+    ):
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._lock = threading.RLock()
+        # Autocommit; leases take the write lock with BEGIN IMMEDIATE so
+        # concurrent workers never pick the same row
+        self._db = sqlite3.connect(
+            path or ":memory:", timeout=min(30.0, lease_seconds / 10), isolation_level=None, check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "host TEXT PRIMARY KEY, county TEXT NOT NULL, counties TEXT NOT NULL, seeds TEXT NOT NULL, "
+            "max_pages INTEGER NOT NULL, status TEXT NOT NULL DEFAULT 'pending', worker TEXT, "
+            "reserved INTEGER NOT NULL DEFAULT 0, used INTEGER NOT NULL DEFAULT 0, "
+            "lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS budgets (county TEXT PRIMARY KEY, remaining INTEGER NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    # Coordinator
+
+    @_serialized
+    def set_budget(self, county: str, pages: int):
+        """First call wins, so a restarted coordinator does not refill a budget."""
+        self._db.execute("INSERT OR IGNORE INTO budgets (county, remaining) VALUES (?, ?)", (county, pages))
+
+    @_serialized
+    def add(self, county: str, host: str, seeds: List[str], max_pages: int) -> bool:
+        """Queue ``host``; a host already queued by another county only records that county too."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT counties FROM tasks WHERE host = ?", (host,)).fetchone()
+            if row is None:
+                self._db.execute(
+                    "INSERT INTO tasks (host, county, counties, seeds, max_pages) VALUES (?, ?, ?, ?, ?)",
+                    (host, county, json.dumps([county]), json.dumps(seeds), max_pages),
+                )
+            elif county not in json.loads(row[0]):
+                self._db.execute("UPDATE tasks SET counties = ? WHERE host = ?", (json.dumps(json.loads(row[0]) + [county]), host))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return row is None
+
+    @_serialized
+    def seal(self):
+        """No more hosts will be added; idle workers may exit once the queue drains."""
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('sealed', '1')")
+
+    @property
+    @_serialized
+    def sealed(self) -> bool:
+        return self._db.execute("SELECT 1 FROM meta WHERE key = 'sealed'").fetchone() is not None
+
+    # Workers
+
+    @_serialized
+    def lease(self, worker: str) -> Optional[HostTask]:
+        now = self.clock()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = self._db.execute(
+                    "SELECT host, county, seeds, max_pages, status, reserved, attempts FROM tasks "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) ORDER BY rowid LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                host, county, seeds, max_pages, status, reserved, attempts = row
+                if status == "leased":
+                    # The previous worker died: its pages go back before the host is retried
+                    self._refund(county, reserved)
+                    if attempts >= self.max_attempts:
+                        self._db.execute("UPDATE tasks SET status = 'failed', reserved = 0 WHERE host = ?", (host,))
+                        continue
+                remaining = self.remaining_budget(county)
+                if remaining is not None and remaining <= 0:
+                    self._db.execute("UPDATE tasks SET status = 'skipped', reserved = 0 WHERE host = ?", (host,))
+                    continue
+                self._db.execute(
+                    "UPDATE tasks SET status = 'leased', worker = ?, reserved = 0, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE host = ?",
+                    (worker, now + self.lease_seconds, host),
+                )
+                self._db.execute("COMMIT")
+                return HostTask(host=host, county=county, seeds=json.loads(seeds), max_pages=max_pages)
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def _refund(self, county: str, pages: int):
+        self._db.execute("UPDATE budgets SET remaining = remaining + ? WHERE county = ?", (pages, county))
+
+    @_serialized
+    def take_pages(self, host: str, worker: str, n: int) -> int:
+        """Up to ``n`` pages from the county budget for a live lease; 0 when none are left."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT county FROM tasks WHERE host = ? AND worker = ? AND status = 'leased'", (host, worker)
+            ).fetchone()
+            granted = 0
+            if row is not None:
+                remaining = self.remaining_budget(row[0])
+                granted = n if remaining is None else max(0, min(n, remaining))
+                self._refund(row[0], -granted)
+                self._db.execute("UPDATE tasks SET reserved = reserved + ? WHERE host = ?", (granted, host))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return granted
+
+    @_serialized
+    def renew(self, host: str, worker: str) -> bool:
+        """Extend a live lease; False means it expired and may belong to another worker now."""
+        cur = self._db.execute(
+            "UPDATE tasks SET lease_expires = ? WHERE host = ? AND worker = ? AND status = 'leased' AND lease_expires >= ?",
+            (self.clock() + self.lease_seconds, host, worker, self.clock()),
+        )
+        return cur.rowcount == 1
+
+    @_serialized
+    def complete(self, host: str, worker: str, used: int) -> bool:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT county, reserved FROM tasks WHERE host = ? AND worker = ? AND status = 'leased'", (host, worker)
+            ).fetchone()
+            if row is not None:
+                self._refund(row[0], row[1] - min(used, row[1]))
+                self._db.execute("UPDATE tasks SET status = 'done', reserved = 0, used = ? WHERE host = ?", (used, host))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    # Status
+
+    @_serialized
+    def counts(self) -> Dict[str, int]:
+        return dict(self._db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+    @property
+    @_serialized
+    def drained(self) -> bool:
+        """Sealed and nothing left to lease now or after a lease expires."""
+        counts = self.counts()
+        return self.sealed and not counts.get("pending") and not counts.get("leased")
+
+    @_serialized
+    def remaining_budget(self, county: str) -> Optional[int]:
+        row = self._db.execute("SELECT remaining FROM budgets WHERE county = ?", (county,)).fetchone()
+        return row[0] if row else None
+
+    @_serialized
+    def counties_for(self, host: str) -> List[str]:
+        row = self._db.execute("SELECT counties FROM tasks WHERE host = ?", (host,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    @_serialized
+    def close(self):
+        self._db.close()
+
+
+class LeaseBudget:
+    """``PageBudget`` stand-in for a leased host: pages come from the queue's
+    county budget as they are fetched, ``chunk`` at a time to save queue
+    writes. A host that stops early holds its unused pages (fewer than
+    ``chunk``) until it completes, so other hosts of the county may stop on an
+    empty budget meanwhile."""
+
+    def __init__(self, queue: WorkQueue, task: HostTask, worker: str, chunk: int = LEASE_PAGE_CHUNK):
+        self.queue = queue
+        self.task = task
+        self.worker = worker
+        self.chunk = chunk
+        self.granted = 0
+        self.used = 0
+
+    async def acquire(self, n: int = 1) -> bool:
+        # The queue write runs in a thread so a busy SQLite file never blocks the event loop
+        if self.granted - self.used < n:
+            self.granted += await asyncio.to_thread(self.queue.take_pages, self.task.host, self.worker, max(n, self.chunk))
+        if self.granted - self.used < n:
+            return False
+        self.used += n
+        return True
@@ -0,0 +1,27 @@
+"""Fixtures shared by the test modules: a small OPG site and the benchmarks' in-memory crawler to serve it."""
+
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from sites import MemoryCrawler  # noqa: E402
+
+
+def page(body: str) -> str:
+    return f"<html><head><title>OPG Test</title></head><body>{body}</body></html>"
+
+
+SITE = {
+    "https://opg-test.hr/": page(
+        "<a href='/kontakt'>Kontakt</a>" + "".join(f"<a href='/p{i}'>Proizvod {i}</a>" for i in range(10))
+    ),
+    "https://opg-test.hr/kontakt": page("<a href='mailto:ana@opg-test.hr'>Ana</a><a href='/'>Početna</a>"),
+    **{f"https://opg-test.hr/p{i}": page(f"<p>Proizvod {i}</p>") for i in range(10)},
+}
+
+
+def memory_crawler(pages: Dict[str, str], files: Optional[Dict[str, bytes]] = None, **kw) -> MemoryCrawler:
+    """``MemoryCrawler`` two levels deep and without role addresses, as the tests expect."""
+    return MemoryCrawler(pages, files, depth=kw.pop("depth", 2), include_role_emails=False, **kw)
@@ -0,0 +1,31 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from opg_scraper_pkg.analysis import analyze_page
+
+
+HTML = (
+    "<html><head><title>OPG Kovač – Kontakt</title></head><body>"
+    "<p>Pišite na info@opg-kovac.hr</p><p>Molimo bez marketinga.</p>"
+    "<a href='/proizvodi'>Proizvodi</a></body></html>"
+)
+
+
+class TestAnalyzePage(unittest.TestCase):
+    def test_compact_result(self):
+        res = analyze_page(HTML, "https://opg-kovac.hr/kontakt")
+        self.assertEqual(res.title, "OPG Kovač – Kontakt")
+        self.assertEqual(res.emails, [("info@opg-kovac.hr", "regex")])
+        self.assertTrue(res.opt_out)
+        self.assertTrue(res.mentions_opg)
+        self.assertEqual(res.links, [("https://opg-kovac.hr/proizvodi", "/proizvodi", "Proizvodi")])
+
+    def test_process_pool_matches_inline(self):
+        url = "https://opg-kovac.hr/kontakt"
+        with ProcessPoolExecutor(max_workers=1) as ex:
+            remote = ex.submit(analyze_page, HTML, url).result()
+        self.assertEqual(remote, analyze_page(HTML, url))
+
+
+if __name__ == "__main__":
+    unittest.main()
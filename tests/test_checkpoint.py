@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+from opg_scraper_pkg.checkpoint import Checkpoint
+from opg_scraper_pkg.crawl import HostCrawlState
+from opg_scraper_pkg.scheduler import HostRegistry, PageBudget
+
+from helpers import SITE, MemoryCrawler, memory_crawler
+
+
+class InterruptingCrawler(MemoryCrawler):
+    def __init__(self, pages, stop_after, **kw):
+        super().__init__(pages, depth=2, include_role_emails=False, **kw)
+        self.stop_after = stop_after
+
+    async def _fetch_html(self, url: str) -> str:
+        if len(self.fetched) == self.stop_after:
+            raise asyncio.CancelledError()
+        return await super()._fetch_html(url)
+
+
+class TestResume(unittest.TestCase):
+    def test_resume_continues_without_refetch(self):
+        seed = "https://opg-test.hr/"
+        full = memory_crawler(SITE)
+        full_records, full_audit = asyncio.run(full.crawl_host(seed, "Međimurska", max_pages=50))
+
+        state = HostCrawlState.start(seed)
+        budget = PageBudget(50)
+        first = InterruptingCrawler(SITE, stop_after=4)
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(first.crawl_host(seed, "Međimurska", max_pages=50, budget=budget, state=state))
+
+        # Round-trip through JSON exactly as a checkpoint file would
+        restored = HostCrawlState.from_dict(json.loads(json.dumps(state.to_dict())))
+        self.assertEqual(restored.fetched, 4)
+        second = memory_crawler(SITE)
+        records, audit = asyncio.run(second.crawl_host(seed, "Međimurska", max_pages=50, state=restored))
+
+        self.assertEqual(first.fetched + second.fetched, full.fetched)
+        self.assertEqual([r.email for r in records], [r.email for r in full_records])
+        self.assertEqual([p["url"] for p in audit], [p["url"] for p in full_audit])
+
+
+class TestCheckpointFile(unittest.TestCase):
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.checkpoint.json")
+            cp = Checkpoint(path, Namespace(counties=["Međimurska"], max_pages_per_county=100))
+            cp.run_id = 3
+            cp.registry = HostRegistry()
+            cp.registry.claim("opg-test.hr", "Međimurska")
+            progress = cp.county("Međimurska")
+            progress.seeds = ["https://opg-test.hr/", "https://drugi.hr/"]
+            progress.budget = PageBudget(100)
+            progress.budget.take(7)
+            progress.hosts_done.add("drugi.hr")
+            state = HostCrawlState.start("https://opg-test.hr/")
+            state.in_flight = state.frontier.pop_scored()
+            state.fetched = 1
+            progress.active["opg-test.hr"] = state
+            cp.save()
+
+            loaded = Checkpoint.load(path)
+            self.assertEqual(loaded.args["max_pages_per_county"], 100)
+            self.assertEqual(loaded.run_id, 3)
+            restored = loaded.county("Međimurska")
+            self.assertEqual(restored.seeds, progress.seeds)
+            self.assertEqual(restored.hosts_done, {"drugi.hr"})
+            # The in-flight page is handed back to the budget and the frontier
+            self.assertEqual(restored.budget.remaining, 94)
+            host = restored.active["opg-test.hr"]
+            self.assertEqual(host.fetched, 0)
+            self.assertEqual(host.frontier.pop()[0], "https://opg-test.hr/")
+            self.assertFalse(loaded.registry.claim("opg-test.hr", "Varaždinska"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+from opg_scraper_pkg.crawl import HostCrawlState, SaturationPolicy
+
+from helpers import SITE, memory_crawler, page
+
+
+class TestCrawlHost(unittest.TestCase):
+    def crawl(self, **kw):
+        crawler = memory_crawler(SITE, **kw)
+        records, audit = asyncio.run(crawler.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        return crawler, records, audit
+
+    def test_contact_page_first(self):
+        crawler, records, audit = self.crawl()
+        self.assertEqual(crawler.fetched[:2], ["https://opg-test.hr/", "https://opg-test.hr/kontakt"])
+        self.assertEqual([r.email for r in records], ["ana@opg-test.hr"])
+        self.assertEqual(len(crawler.fetched), len(SITE))
+        self.assertTrue(all(p["stop_reason"] == "frontier_exhausted" for p in audit))
+
+    def test_stop_after_idle(self):
+        crawler, records, audit = self.crawl(saturation=SaturationPolicy(idle_pages=3))
+        self.assertEqual(len(crawler.fetched), 5)
+        self.assertEqual(audit[0]["stop_reason"], "saturated_idle")
+
+    def test_stop_after_contact_pages(self):
+        crawler, records, audit = self.crawl(saturation=SaturationPolicy(after_contact_pages=True))
+        self.assertEqual(len(crawler.fetched), 2)
+        self.assertEqual(audit[-1]["stop_reason"], "contact_pages_done")
+        self.assertEqual(len(records), 1)
+
+    def test_seeds_of_one_host_share_a_frontier(self):
+        crawler = memory_crawler(SITE)
+        state = HostCrawlState.start("https://opg-test.hr/p3", ["https://opg-test.hr/", "https://opg-test.hr/p3"])
+        records, _ = asyncio.run(crawler.crawl_host(state.seed_url, "Međimurska", max_pages=50, state=state))
+        self.assertEqual(crawler.fetched[:2], ["https://opg-test.hr/p3", "https://opg-test.hr/"])
+        self.assertEqual(sorted(crawler.fetched), sorted(SITE))
+        self.assertEqual([r.email for r in records], ["ana@opg-test.hr"])
+
+    def test_binary_links_not_queued(self):
+        site = {
+            "https://opg-test.hr/": page("<a href='/brosura.pdf'>Katalog</a><a href='/slike/sir.JPG'>Sir</a><a href='/kontakt'>Kontakt</a>"),
+            "https://opg-test.hr/kontakt": SITE["https://opg-test.hr/kontakt"],
+        }
+        crawler = memory_crawler(site)
+        asyncio.run(crawler.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertEqual(crawler.fetched, ["https://opg-test.hr/", "https://opg-test.hr/kontakt"])
+
+    def test_print_views_skipped(self):
+        text = " ".join(f"Sir iz vlastite mliječne proizvodnje, zreo {i} mjeseci u podrumu" for i in range(30))
+        site = {
+            "https://opg-test.hr/": page("<a href='/sir'>Sir</a><a href='/sir?print=1'>Ispis</a>"),
+            "https://opg-test.hr/sir": page(f"<p>{text}</p><a href='/sir?print=1'>Ispis</a>"),
+            "https://opg-test.hr/sir?print=1": page(f"<p>{text}</p><a href='/print-only'>Dalje</a>"),
+        }
+        crawler = memory_crawler(site)
+        _, audit = asyncio.run(crawler.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertEqual(audit[-1]["duplicate_of"], "https://opg-test.hr/sir")
+        self.assertNotIn("https://opg-test.hr/print-only", crawler.fetched)
+
+        crawler = memory_crawler(site, dedup_content=False)
+        asyncio.run(crawler.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertIn("https://opg-test.hr/print-only", crawler.fetched)
+
+
+if __name__ == "__main__":
+    unittest.main()
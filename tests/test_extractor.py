@@ -1,6 +1,7 @@
 import unittest
 
 from opg_scraper_pkg.extractor import EmailExtractor
+from opg_scraper_pkg.page import PARSERS
 
 
 class TestExtractor(unittest.TestCase):
@@ -13,13 +14,33 @@ class TestExtractor(unittest.TestCase):
             "<script type='application/ld+json'>{\"email\": \"prodaja@opg-juric.hr\"}</script>"
             "</body></html>"
         )
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                found = EmailExtractor(parser).extract(html, "https://opg-juric.hr/kontakt")
+                emails = sorted([e for e, _ in found])
+                self.assertIn("kontakt@opg-juric.hr", emails)
+                self.assertIn("opg.juric@example.hr", emails)
+                self.assertIn("prodaja@opg-juric.hr", emails)
+                self.assertIn("INFO@example.hr", emails)  # role-based filtering happens in crawler
+
+    def test_prefilter_skips_pages_without_signal(self):
         ex = EmailExtractor()
-        found = ex.extract(html, "https://opg-juric.hr/kontakt")
-        emails = sorted([e for e, _ in found])
-        self.assertIn("kontakt@opg-juric.hr", emails)
-        self.assertIn("opg.juric@example.hr", emails)
-        self.assertIn("prodaja@opg-juric.hr", emails)
-        self.assertIn("INFO@example.hr", emails)  # role-based filtering happens in crawler
+        plain = "<html><style>@media print { a { color: red } }</style><body><a href='/kontakt'>Kontakt</a></body></html>"
+        self.assertFalse(ex.has_email_signal(plain))
+        self.assertEqual(ex.extract(plain, "https://opg.hr/"), [])
+        self.assertTrue(ex.has_email_signal("<p>pišite na ana&#64;opg.hr</p>"))
+        self.assertEqual(ex.extract("<p>pišite na ana&#64;opg.hr</p>", "https://opg.hr/"), [("ana@opg.hr", "regex")])
+        for escaped in ("ana@opg&#46;hr", "ana@opg&#x2E;hr", "ana@opg&period;hr"):
+            self.assertEqual(ex.extract(f"<p>pišite na {escaped}</p>", "https://opg.hr/"), [("ana@opg.hr", "regex")])
+
+    def test_script_and_comment_text_is_not_scanned(self):
+        html = (
+            "<p>Pišite: ana@opg-ana.hr</p><script>var x = 'tracker@ads.example.com';</script>"
+            "<!-- stari@opg-ana.hr --><style>/* dev@opg-ana.hr */</style>"
+        )
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                self.assertEqual(EmailExtractor(parser).extract(html, "https://opg-ana.hr/"), [("ana@opg-ana.hr", "regex")])
 
 
 if __name__ == "__main__":
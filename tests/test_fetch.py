@@ -0,0 +1,73 @@
+import unittest
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from opg_scraper_pkg.crawl import Crawler
+from opg_scraper_pkg.extractor import EmailExtractor
+from opg_scraper_pkg.metrics import Metrics
+from opg_scraper_pkg.rate_limiter import HostRateLimiter
+
+
+def respond(**kw):
+    async def handler(request):
+        return web.Response(**kw)
+
+    return handler
+
+
+class TestFetchHtml(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def streamed(request):
+            resp = web.StreamResponse(headers={"Content-Type": "text/html"})
+            await resp.prepare(request)
+            for _ in range(100):
+                await resp.write(b"<p>" + b"x" * 1000 + b"</p>")
+            return resp
+
+        app = web.Application()
+        app.router.add_get("/pdf", respond(body=b"%PDF-1.4", content_type="application/pdf"))
+        app.router.add_get("/big", respond(text="<p>" + "x" * 5000 + "</p>", content_type="text/html"))
+        app.router.add_get("/stream", streamed)
+        cp1250 = "<p>OPG Čakovec</p>".encode("cp1250")
+        app.router.add_get("/busy", respond(status=503))
+        app.router.add_get("/cp1250", respond(body=cp1250, headers={"Content-Type": "text/html; charset=windows-1250"}))
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = aiohttp.ClientSession()
+        self.metrics = Metrics()
+        self.crawler = Crawler(
+            self.session, HostRateLimiter(0), EmailExtractor(), 1, 5, False, False, False, max_page_bytes=4096, metrics=self.metrics
+        )
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.server.close()
+
+    async def fetch(self, path: str) -> str:
+        return await self.crawler._fetch_html(str(self.server.make_url(path)))
+
+    async def test_gating_cap_and_charset(self):
+        self.assertEqual(await self.fetch("/pdf"), "")
+        self.assertEqual(await self.fetch("/big"), "")
+        self.assertEqual(len(await self.fetch("/stream")), 4096)
+        self.assertEqual(await self.fetch("/cp1250"), "<p>OPG Čakovec</p>")
+
+    async def test_metrics(self):
+        self.crawler.limiter.max_delay = 0
+        await self.fetch("/busy")
+        await self.fetch("/stream")
+        await self.fetch("/pdf")
+        m = self.metrics
+        self.assertEqual(m.counter("opg_fetch_requests_total", status="503"), 4)
+        self.assertEqual(m.counter("opg_fetch_retries_total"), 3)
+        self.assertEqual(m.counter("opg_fetch_bytes_total"), 4096)
+        self.assertEqual(m.counter("opg_fetch_skipped_total", reason="content_type"), 1)
+        self.assertEqual(m.histogram("opg_fetch_latency_seconds", outcome="ok").count, 1)
+        self.assertEqual(m.histogram("opg_fetch_latency_seconds", outcome="throttled").count, 4)
+        self.assertEqual(m.histogram("opg_fetch_latency_seconds", outcome="skipped").count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from opg_scraper_pkg.fingerprint import ContentFingerprints, hamming, simhash, visible_text
+
+
+ARTICLE = " ".join(
+    f"Obiteljsko gospodarstvo uzgaja jabuke kruške i šljive na {i} hektara uz rijeku Muru" for i in range(40)
+)
+
+
+def layout(body: str, nav: bool = True) -> str:
+    menu = "<nav><a href='/'>Početna</a><a href='/kontakt'>Kontakt</a></nav>" if nav else ""
+    return f"<html><head><style>p {{color: red}}</style></head><body>{menu}<p>{body}</p><script>var x = 1;</script></body></html>"
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_visible_text(self):
+        self.assertEqual(visible_text(layout("Med i <b>sir</b>", nav=False)), "med i sir")
+
+    def test_print_view_is_near_duplicate(self):
+        full = simhash(visible_text(layout(ARTICLE)))
+        printed = simhash(visible_text(layout(ARTICLE, nav=False)))
+        news = " ".join(f"Na sajmu u Čakovcu {i}. svibnja predstavili smo domaći med i sir" for i in range(40))
+        other = simhash(visible_text(layout(news)))
+        self.assertLessEqual(hamming(full, printed), 6)
+        self.assertGreater(hamming(full, other), 6)
+
+    def test_duplicate_requires_same_addresses(self):
+        fps = ContentFingerprints()
+        self.assertEqual(fps.duplicate_of("https://opg.hr/a", layout(ARTICLE)), "")
+        self.assertEqual(fps.duplicate_of("https://opg.hr/a?print=1", layout(ARTICLE, nav=False)), "https://opg.hr/a")
+        self.assertEqual(fps.duplicate_of("https://opg.hr/kontakt", layout(ARTICLE + " ana@opg.hr")), "")
+        self.assertEqual(len(fps.known), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
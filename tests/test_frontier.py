@@ -0,0 +1,42 @@
+import unittest
+
+from opg_scraper_pkg.frontier import Frontier
+from opg_scraper_pkg.utils import score_link
+
+
+class TestFrontier(unittest.TestCase):
+    def test_priority_then_fifo(self):
+        f = Frontier()
+        f.push("https://a.hr/p1", 1, "internal_link", 0.0)
+        f.push("https://a.hr/p2", 1, "internal_link", 0.0)
+        f.push("https://a.hr/kontakt", 1, "internal_contact_link", 3.5)
+        self.assertEqual(f.pop()[0], "https://a.hr/kontakt")
+        self.assertEqual(f.pop()[0], "https://a.hr/p1")
+        self.assertEqual(f.pop()[0], "https://a.hr/p2")
+        self.assertEqual(len(f), 0)
+
+    def test_dedup_at_enqueue(self):
+        f = Frontier()
+        self.assertTrue(f.push("https://a.hr/", 0, "search_seed"))
+        self.assertFalse(f.push("https://a.hr/", 1, "internal_link", 10.0))
+        f.pop()
+        self.assertFalse(f.push("https://a.hr/", 1, "internal_link"))
+        self.assertIn("https://a.hr/", f)
+
+    def test_url_variants_queued_once(self):
+        f = Frontier()
+        self.assertTrue(f.push("https://www.a.hr/kontakt/?b=2&a=1", 1, "internal_link"))
+        for variant in ("http://a.hr/kontakt?a=1&b=2&utm_source=fb", "https://A.hr:443/kontakt?fbclid=x&a=1&b=2#top"):
+            self.assertFalse(f.push(variant, 1, "internal_link"))
+        self.assertTrue(f.push("https://a.hr/kontakt?a=2&b=2", 1, "internal_link"))
+
+
+class TestScoreLink(unittest.TestCase):
+    def test_contact_first_shallow_first(self):
+        self.assertGreater(score_link("/kontakt", "", 1), score_link("/proizvodi", "", 1))
+        self.assertGreater(score_link("/?page_id=7", "Kontakt", 1), score_link("/?page_id=8", "Galerija", 1))
+        self.assertGreater(score_link("/kontakt", "", 1), score_link("/kontakt", "", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from opg_scraper_pkg.crawl import Crawler
+from opg_scraper_pkg.extractor import EmailExtractor
+from opg_scraper_pkg.http_cache import HttpCache
+from opg_scraper_pkg.rate_limiter import HostRateLimiter
+
+
+class TestHttpCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+
+        async def handler(request):
+            self.requests.append(dict(request.headers))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304)
+            return web.Response(text="<p>OPG</p>", content_type="text/html", headers={"ETag": '"v1"'})
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = aiohttp.ClientSession()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.server.close()
+        self.tmp.cleanup()
+
+    def crawler(self, cache):
+        return Crawler(self.session, HostRateLimiter(0), EmailExtractor(), 1, 5, False, False, False, cache=cache)
+
+    async def test_fresh_revalidate_offline(self):
+        url = str(self.server.make_url("/"))
+
+        cache = HttpCache(self.tmp.name, ttl_seconds=3600)
+        self.assertEqual(await self.crawler(cache)._fetch_html(url), "<p>OPG</p>")
+        self.assertEqual(await self.crawler(cache)._fetch_html(url), "<p>OPG</p>")
+        self.assertEqual(len(self.requests), 1)
+        cache.close()
+
+        stale = HttpCache(self.tmp.name, ttl_seconds=0)
+        self.assertEqual(await self.crawler(stale)._fetch_html(url), "<p>OPG</p>")
+        self.assertEqual(self.requests[-1].get("If-None-Match"), '"v1"')
+        self.assertEqual(len(self.requests), 2)
+        stale.close()
+
+        offline = HttpCache(self.tmp.name, ttl_seconds=0, offline=True)
+        self.assertEqual(await self.crawler(offline)._fetch_html(url), "<p>OPG</p>")
+        self.assertEqual(await self.crawler(offline)._fetch_html(url + "missing"), "")
+        self.assertEqual(len(self.requests), 2)
+        offline.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
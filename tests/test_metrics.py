@@ -0,0 +1,57 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from helpers import SITE, memory_crawler
+
+from opg_scraper_pkg.metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counters_and_histograms(self):
+        m = Metrics(buckets=(0.1, 1.0))
+        m.inc("opg_pages_total", county="A", host="x.hr")
+        m.inc("opg_pages_total", 2, county="A", host="y.hr")
+        m.inc("opg_pages_total", county="B", host="x.hr")
+        for v in (0.05, 0.5, 5.0):
+            m.observe("opg_fetch_latency_seconds", v)
+        self.assertEqual(m.counter("opg_pages_total"), 4)
+        self.assertEqual(m.counter("opg_pages_total", county="A"), 3)
+        self.assertEqual(m.counter("opg_pages_total", host="x.hr"), 2)
+        self.assertEqual(m.histogram("opg_fetch_latency_seconds").cumulative(), [("0.1", 1), ("1.0", 2), ("+Inf", 3)])
+
+        prom = m.to_prometheus()
+        self.assertIn("# TYPE opg_pages_total counter", prom)
+        self.assertIn('opg_pages_total{county="A",host="y.hr"} 2', prom)
+        self.assertIn('opg_fetch_latency_seconds_bucket{le="+Inf"} 3', prom)
+        self.assertIn("opg_fetch_latency_seconds_count 3", prom)
+
+    def test_write(self):
+        m = Metrics()
+        m.inc("opg_output_rows_total", 3, writer="csv")
+        with m.timer("opg_output_seconds", writer="csv"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path, prom_path = os.path.join(tmp, "m.json"), os.path.join(tmp, "m.prom")
+            m.write(json_path, prom_path)
+            with open(json_path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.assertEqual(data["counters"]["opg_output_rows_total"], [{"labels": {"writer": "csv"}, "value": 3.0}])
+            self.assertEqual(data["histograms"]["opg_output_seconds"][0]["count"], 1)
+            self.assertTrue(os.path.exists(prom_path))
+
+    def test_crawl_breakdown(self):
+        m = Metrics()
+        crawler = memory_crawler(SITE, metrics=m)
+        asyncio.run(crawler.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertEqual(m.counter("opg_pages_total", county="Međimurska", host="opg-test.hr"), len(SITE))
+        self.assertEqual(m.counter("opg_pages_total", outcome="parsed"), 1)
+        self.assertEqual(m.counter("opg_emails_total", county="Međimurska"), 1)
+        self.assertEqual(m.histogram("opg_extract_seconds").count, 1)
+        self.assertEqual(m.histogram("opg_parse_seconds").count, len(SITE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from opg_scraper_pkg.crawl import EmailRecord
+from opg_scraper_pkg.output import AuditWriter, CSVWriter, merge_outputs
+
+
+def rec(email, county="Međimurska", date_found="2026-01-01T00:00:00+00:00"):
+    return EmailRecord(email, "OPG", county, "https://opg.hr/kontakt", "Kontakt", "mailto", date_found)
+
+
+class TestStreamingOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, "out.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_csv_dedup_and_compact(self):
+        writer = CSVWriter(self.csv_path, flush_interval=0)
+        writer.open()
+        writer.append([rec("Ana@opg.hr"), rec("ivo@opg.hr")])
+        writer.append([rec("ana@opg.hr", "Varaždinska")])
+        writer.close()
+        self.assertEqual(writer.count, 2)
+
+        writer.compact(lambda row: {**row, "county": row["county"].upper()})
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r["email"] for r in rows], ["Ana@opg.hr", "ivo@opg.hr"])
+        self.assertEqual(rows[0]["county"], "MEĐIMURSKA")
+        self.assertFalse(os.path.exists(self.csv_path + ".tmp"))
+
+    def test_gzip_jsonl_audit(self):
+        path = CSVWriter.audit_path_from_csv(self.csv_path, gzip_audit=True)
+        self.assertTrue(path.endswith("out.jsonl.gz"))
+        audit = AuditWriter(path, flush_interval=0)
+        audit.open()
+        audit.append([{"url": "https://opg.hr/", "county": "Međimurska"}])
+        audit.append([{"url": "https://opg.hr/kontakt", "county": "Međimurska"}])
+        audit.close()
+        audit.compact(lambda page: {**page, "county": "Međimurska; Varaždinska"})
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            pages = [json.loads(line) for line in f]
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(pages[1], {"url": "https://opg.hr/kontakt", "county": "Međimurska; Varaždinska"})
+
+    def test_merge_worker_outputs(self):
+        paths = []
+        for worker, (records, urls) in enumerate(
+            [
+                ([rec("ana@opg.hr", date_found="2026-01-02T00:00:00+00:00")], ["https://opg.hr/", "https://opg.hr/kontakt"]),
+                ([rec("Ana@opg.hr"), rec("ivo@opg.hr")], ["https://opg.hr/kontakt", "https://opg.hr/o-nama"]),
+            ]
+        ):
+            path = os.path.join(self.tmp.name, f"w{worker}.csv")
+            writer = CSVWriter(path)
+            writer.write(records)
+            audit = AuditWriter(CSVWriter.audit_path_from_csv(path, gzip_audit=worker == 1))
+            audit.open()
+            audit.append([{"url": u, "county": "Međimurska"} for u in urls])
+            audit.close()
+            paths.append(path)
+
+        emails, pages = merge_outputs(paths, self.csv_path, county_label=lambda host, county: f"{county}; Varaždinska")
+        self.assertEqual((emails, pages), (2, 3))
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(r["email"], r["date_found"][:10]) for r in rows], [("Ana@opg.hr", "2026-01-01"), ("ivo@opg.hr", "2026-01-01")])
+        self.assertEqual(rows[0]["county"], "Međimurska; Varaždinska")
+        with open(CSVWriter.audit_path_from_csv(self.csv_path), encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["url"] for line in f], ["https://opg.hr/", "https://opg.hr/kontakt", "https://opg.hr/o-nama"])
+
+
+if __name__ == "__main__":
+    unittest.main()
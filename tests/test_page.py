@@ -0,0 +1,63 @@
+import unittest
+
+from opg_scraper_pkg.extractor import EmailExtractor
+from opg_scraper_pkg.page import PARSERS, LxmlPage, ParsedPage, parse_page, scan_links, scan_title
+
+
+HTML = (
+    "<html><head><title>OPG Horvat | Kontakt</title></head>"
+    "<body><h1>OPG Horvat</h1>"
+    "<a href='/o-nama'>O nama</a>"
+    "<a href='mailto:opg.horvat@example.hr'>Pišite nam</a>"
+    "<a href='javascript:void(0)'>x</a>"
+    "</body></html>"
+)
+
+# Markup where a naive tree walk differs from BeautifulSoup's get_text and searches
+EDGE_CASES = [
+    "",
+    "<?xml version='1.0' encoding='iso-8859-2'?><html><head><title>Kuća</title></head><body>Ž</body></html>",
+    "<a href=''>prazno</a><a href='/x'>A <b>b</b><script>var q = 1</script> c</a><!-- komentar -->"
+    "<template>t</template><h1> OPG  <i>Ana</i></h1>",
+    "<title></title><meta property='og:title' content=' OG naslov '><meta property='og:site_name'><p>a&nbsp;b &amp; c</p>",
+    "<a href='mailto:a@opg.hr'>x</a><script type='application/ld+json'> {\"email\": \"b@opg.hr\"} </script><noscript>ns</noscript>",
+    "<div>" * 300 + "sadržaj" + "</div>" * 300 + "<footer><a href='mailto:ana@opg-ana.hr'>Pišite nam</a></footer>",
+]
+
+
+class TestParsedPage(unittest.TestCase):
+    def test_cached_views(self):
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                page = parse_page(HTML, "https://opg-horvat.hr/kontakt", parser)
+                self.assertIs(page.tree, page.tree)
+                self.assertEqual(page.title, "OPG Horvat | Kontakt")
+                self.assertEqual(page.name_hint, "OPG Horvat")
+                self.assertIn("pišite nam", page.text_lower)
+                self.assertEqual(page.links[0], ("https://opg-horvat.hr/o-nama", "/o-nama", "O nama"))
+                self.assertEqual(len(page.links), 1)
+
+    def test_backends_agree(self):
+        for i, html in enumerate(EDGE_CASES):
+            soup, lxml = ParsedPage(html, "https://opg.hr/"), LxmlPage(html, "https://opg.hr/")
+            for view in ("title", "name_hint", "text", "anchors", "json_ld", "links"):
+                with self.subTest(case=i, view=view):
+                    self.assertEqual(getattr(lxml, view), getattr(soup, view))
+
+    def test_extractor_reuses_page(self):
+        page = ParsedPage(HTML, "https://opg-horvat.hr/kontakt")
+        soup = page.soup
+        found = EmailExtractor().extract(page, page.url)
+        self.assertEqual(found, [("opg.horvat@example.hr", "mailto")])
+        self.assertIs(page.soup, soup)
+
+    def test_regex_scan_matches_parser(self):
+        url = "https://opg-horvat.hr/kontakt"
+        for parser in PARSERS:
+            page = parse_page(HTML, url, parser)
+            self.assertEqual(scan_links(HTML, url), page.links)
+            self.assertEqual(scan_title(HTML), page.title)
+
+
+if __name__ == "__main__":
+    unittest.main()
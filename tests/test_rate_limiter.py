@@ -0,0 +1,79 @@
+import asyncio
+import time
+import unittest
+
+from opg_scraper_pkg.rate_limiter import HostRateLimiter, parse_retry_after
+
+
+class TestHostRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_backoff_and_recovery_stay_above_floor(self):
+        limiter = HostRateLimiter(0.1, max_delay=1.0)
+        limiter.record("a.hr", 503)
+        limiter.record("a.hr", None)
+        self.assertAlmostEqual(limiter.current_delay("a.hr"), 0.4)
+        for _ in range(20):
+            limiter.record("a.hr", 200, 0.05)
+        self.assertAlmostEqual(limiter.current_delay("a.hr"), 0.1)
+        for _ in range(10):
+            limiter.record("a.hr", 500)
+        self.assertEqual(limiter.current_delay("a.hr"), 1.0)
+        self.assertEqual(limiter.current_delay("b.hr"), 0.1)
+
+    async def test_rising_latency_slows_down(self):
+        limiter = HostRateLimiter(0.1)
+        limiter.record("a.hr", 200, 0.1)
+        limiter.record("a.hr", 200, 1.0)
+        self.assertAlmostEqual(limiter.current_delay("a.hr"), 0.15)
+
+    async def test_retry_after_blocks_host(self):
+        limiter = HostRateLimiter(0.0)
+        await limiter.throttle("a.hr")
+        limiter.record("a.hr", 429, retry_after="0.2")
+        started = time.monotonic()
+        await limiter.throttle("a.hr")
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+        started = time.monotonic()
+        await limiter.throttle("b.hr")
+        self.assertLess(time.monotonic() - started, 0.05)
+
+    async def test_retry_after_capped_at_max_delay(self):
+        limiter = HostRateLimiter(0.0, max_delay=0.2)
+        for retry_after in ("86400", "inf"):
+            limiter.record("a.hr", 429, retry_after=retry_after)
+            await asyncio.wait_for(limiter.throttle("a.hr"), 1)
+
+    async def test_crawl_delay_raises_floor(self):
+        limiter = HostRateLimiter(0.0)
+        limiter.set_crawl_delay("a.hr", 0.5)
+        for _ in range(5):
+            limiter.record("a.hr", 200, 0.01)
+        self.assertEqual(limiter.floor("a.hr"), 0.5)
+        self.assertEqual(limiter.current_delay("a.hr"), 0.5)
+
+    async def test_evicts_idle_hosts(self):
+        limiter = HostRateLimiter(0.0, idle_ttl=10)
+        await limiter.throttle("a.hr")
+        await limiter.throttle("b.hr")
+        self.assertEqual(limiter.evict_idle(time.monotonic() + 5), 0)
+        self.assertEqual(limiter.evict_idle(time.monotonic() + 11), 2)
+        self.assertEqual(len(limiter), 0)
+
+    async def test_crawl_delay_survives_eviction(self):
+        limiter = HostRateLimiter(0.0, idle_ttl=10)
+        limiter.set_crawl_delay("a.hr", 0.5)
+        self.assertEqual(limiter.evict_idle(time.monotonic() + 11), 1)
+        self.assertEqual(limiter.floor("a.hr"), 0.5)
+        self.assertEqual(limiter.current_delay("a.hr"), 0.5)
+        limiter.record("a.hr", 200, 0.01)
+        self.assertEqual(limiter.current_delay("a.hr"), 0.5)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after("inf"))
+        self.assertIsNone(parse_retry_after("nan"))
+        self.assertAlmostEqual(parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=40), 60.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,29 @@
+import asyncio
+import tempfile
 import unittest
 from urllib import robotparser
 
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
 from opg_scraper_pkg.config import USER_AGENT
+from opg_scraper_pkg.rate_limiter import HostRateLimiter
+from opg_scraper_pkg.robots import RobotsChecker
+
+from helpers import SITE, memory_crawler, page
+
+
+ROBOTS_TXT = "User-agent: *\nDisallow: /private\nDisallow: /p1\nCrawl-delay: 2\n"
+
+
+class StaticRobots(RobotsChecker):
+    def __init__(self, body: str):
+        super().__init__(None, USER_AGENT, 1)
+        self.body = body
+
+    async def _download(self, host: str, robots_url: str):
+        return 200, self.body
 
 
 class TestRobots(unittest.TestCase):
@@ -16,7 +38,84 @@ class TestRobots(unittest.TestCase):
         self.assertTrue(rp.can_fetch(USER_AGENT, "https://example.com/"))
         self.assertFalse(rp.can_fetch(USER_AGENT, "https://example.com/private/secret.html"))
 
+    def test_disallowed_links_never_enqueued(self):
+        crawler = memory_crawler(SITE, robots=StaticRobots(ROBOTS_TXT))
+        asyncio.run(crawler.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertNotIn("https://opg-test.hr/p1", crawler.fetched)
+        self.assertEqual(len(crawler.fetched), len(SITE) - 1)
+
+        # A www. link is the same site and obeys the seed host's rules
+        www_site = {
+            "https://opg-test.hr/": page("<a href='https://www.opg-test.hr/private'>Privatno</a><a href='https://www.opg-test.hr/kontakt'>Kontakt</a>"),
+            "https://opg-test.hr/kontakt": page("<a href='mailto:ana@opg-test.hr'>Ana</a>"),
+            "https://opg-test.hr/private": page("<a href='mailto:tajna@opg-test.hr'>Tajna</a>"),
+        }
+        www = memory_crawler(www_site, robots=StaticRobots(ROBOTS_TXT))
+        asyncio.run(www.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertEqual(www.fetched, ["https://opg-test.hr/", "https://opg-test.hr/kontakt"])
+
+        blocked = memory_crawler(SITE, robots=StaticRobots("User-agent: *\nDisallow: /\n"))
+        records, audit = asyncio.run(blocked.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertEqual((blocked.fetched, records, audit), ([], [], []))
+
+
+class TestRobotsFetch(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hits = 0
+
+        self.status = 200
+
+        async def handler(request):
+            self.hits += 1
+            await asyncio.sleep(0.05)
+            return web.Response(text=ROBOTS_TXT, status=self.status)
+
+        app = web.Application()
+        app.router.add_get("/robots.txt", handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = aiohttp.ClientSession()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.server.close()
+        self.tmp.cleanup()
+
+    async def test_shared_fetch_disk_cache_and_crawl_delay(self):
+        base = str(self.server.make_url("/"))
+        limiter = HostRateLimiter(0)
+        robots = RobotsChecker(self.session, USER_AGENT, 5, limiter=limiter, cache_dir=self.tmp.name, ttl_seconds=3600)
+        allowed = await asyncio.gather(*(robots.allowed(base + p) for p in ("a", "b", "private/x", "c")))
+        self.assertEqual(allowed, [True, True, False, True])
+        self.assertEqual(self.hits, 1)
+        self.assertEqual(limiter.floor(self.server.host), 2.0)
+        robots.close()
+
+        reloaded = RobotsChecker(self.session, USER_AGENT, 5, cache_dir=self.tmp.name, ttl_seconds=3600)
+        self.assertFalse(await reloaded.allowed(base + "private/y"))
+        self.assertEqual(self.hits, 1)
+        reloaded.close()
+
+    async def test_unavailable_robots_disallow_without_caching(self):
+        base = str(self.server.make_url("/"))
+        for status in (503, 429):
+            self.status = status
+            robots = RobotsChecker(self.session, USER_AGENT, 5, cache_dir=self.tmp.name, ttl_seconds=3600)
+            self.assertFalse(await robots.allowed(base + "a"))
+            self.assertIsNone(robots._stored(self.server.host))
+            robots.close()
+
+        unreachable = RobotsChecker(self.session, USER_AGENT, 5)
+        self.assertFalse(unreachable.can_fetch(base + "a"))
+        self.assertFalse(await unreachable.allowed("http://127.0.0.1:9/a"))
+
+        self.status = 404
+        robots = RobotsChecker(self.session, USER_AGENT, 5, cache_dir=self.tmp.name, ttl_seconds=3600)
+        self.assertTrue(await robots.allowed(base + "private/x"))
+        self.assertEqual(robots._stored(self.server.host)[0], "")
+        robots.close()
+
 
 if __name__ == "__main__":
     unittest.main()
-
@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+
+from opg_scraper_pkg.scheduler import HostPool, HostRegistry, PageBudget, host_page_cap
+
+
+class TestPageBudget(unittest.TestCase):
+    def test_take(self):
+        budget = PageBudget(3)
+        self.assertTrue(budget.take())
+        self.assertTrue(budget.take(2))
+        self.assertFalse(budget.take())
+        self.assertTrue(budget.exhausted)
+        self.assertEqual((budget.remaining, budget.used), (0, 3))
+
+    def test_host_page_cap(self):
+        self.assertEqual(host_page_cap(1.0), 50)
+        self.assertEqual(host_page_cap(1.5), 75)
+        self.assertEqual(host_page_cap(10.0), 100)
+        self.assertEqual(host_page_cap(0.01), 5)
+
+
+class TestHostPool(unittest.IsolatedAsyncioTestCase):
+    async def test_bounded_and_ordered(self):
+        pool = HostPool(2)
+        running = 0
+        peak = 0
+
+        async def job(i: int) -> int:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * (5 - i))
+            running -= 1
+            return i
+
+        streamed = []
+        await pool.run_streaming([lambda i=i: job(i) for i in range(5)], streamed.append)
+        self.assertEqual(streamed, [0, 1, 2, 3, 4])
+        self.assertLessEqual(peak, 2)
+
+
+class TestHostRegistry(unittest.TestCase):
+    def test_first_claim_owns_host(self):
+        reg = HostRegistry()
+        self.assertTrue(reg.claim("opg-dir.hr", "Međimurska"))
+        self.assertFalse(reg.claim("opg-dir.hr", "Varaždinska"))
+        self.assertTrue(reg.claim("opg-dir.hr", "Međimurska"))
+        self.assertEqual(reg.owner("opg-dir.hr"), "Međimurska")
+        self.assertEqual(reg.county_label("opg-dir.hr", ""), "Međimurska; Varaždinska")
+        self.assertEqual(reg.county_label("other.hr", "Krapinsko-Zagorska"), "Krapinsko-Zagorska")
+        restored = HostRegistry.from_dict(reg.to_dict())
+        self.assertFalse(restored.claim("opg-dir.hr", "Varaždinska"))
+        self.assertEqual(restored.county_label("opg-dir.hr", ""), "Međimurska; Varaždinska")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from opg_scraper_pkg.page import PARSERS
+from opg_scraper_pkg.rate_limiter import HostRateLimiter
+from opg_scraper_pkg.search import Searcher, SearchCache, parse_ddg_results
+
+
+def ddg_page(query: str, offset: int, per_page: int = 3, pages: int = 2) -> str:
+    links = "".join(
+        f"<a class='result__a' href='https://opg-{query.replace(' ', '-')}-{offset + i}.hr/'>OPG</a>" for i in range(per_page)
+    )
+    nav = ""
+    if offset // per_page + 1 < pages:
+        nav = (
+            "<div class='nav-link'><form action='/html/' method='post'>"
+            f"<input type='submit' value='Next'><input type='hidden' name='q' value='{query}'>"
+            f"<input type='hidden' name='s' value='{offset + per_page}'></form></div>"
+        )
+    return f"<html><body>{links}{nav}</body></html>"
+
+
+class TestParse(unittest.TestCase):
+    def test_results_and_next_form(self):
+        for parser in PARSERS:
+            with self.subTest(parser=parser):
+                urls, nxt = parse_ddg_results(ddg_page("opg", 0), parser)
+                self.assertEqual(urls, [f"https://opg-opg-{i}.hr/" for i in range(3)])
+                self.assertEqual(nxt, {"q": "opg", "s": "3"})
+                self.assertIsNone(parse_ddg_results(ddg_page("opg", 3), parser)[1])
+                fallback = "<a href='/pomoc'>x</a><a href='https://opg-ana.hr/'>OPG Ana</a>"
+                self.assertEqual(parse_ddg_results(fallback, parser), (["https://opg-ana.hr/"], None))
+
+
+class TestSearcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.queries = []
+
+        async def handler(request):
+            q = request.query["q"]
+            self.queries.append((q, request.query.get("s", "0")))
+            return web.Response(text=ddg_page(q, int(request.query.get("s", "0"))), content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/html/", handler)
+        app.router.add_get("/lite/", handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = aiohttp.ClientSession()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.server.close()
+        self.tmp.cleanup()
+
+    def searcher(self, cache: SearchCache, path: str = "/html/") -> Searcher:
+        url = str(self.server.make_url(path))
+        return Searcher(self.session, HostRateLimiter(0), dry_run=False, timeout=5, search_cache=cache, search_url=url)
+
+    async def test_paginated_pipelined_and_cached(self):
+        cache = SearchCache(self.tmp.name, ttl_seconds=3600)
+        seeds = await self.searcher(cache).discover_seeds("Međimurska", max_results=30)
+        self.assertEqual(len(seeds), 30)
+        self.assertEqual(len(self.queries), 10)
+        self.assertEqual(seeds[0], "https://opg-opg-međimurska-0.hr/")
+        cache.close()
+
+        sent = len(self.queries)
+        cache = SearchCache(self.tmp.name, ttl_seconds=3600)
+        self.assertEqual(await self.searcher(cache).discover_seeds("Međimurska", max_results=30), seeds)
+        self.assertEqual(len(self.queries), sent)
+        # Results are cached per endpoint: another search URL asks its own engine
+        await self.searcher(cache, "/lite/").discover_seeds("Međimurska", max_results=30)
+        self.assertEqual(len(self.queries), 2 * sent)
+        cache.close()
+
+    async def test_stops_at_max_results(self):
+        seeds = await self.searcher(None).discover_seeds("Međimurska", max_results=4)
+        self.assertEqual(len(seeds), 4)
+        # The first query fills the seeds; only the one running ahead of it reached the engine too
+        self.assertEqual(len({q for q, _ in self.queries}), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
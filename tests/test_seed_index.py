@@ -0,0 +1,68 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from opg_scraper_pkg.cli import RunContext, record_host
+from opg_scraper_pkg.crawl import EmailRecord
+from opg_scraper_pkg.seed_index import SeedIndex, load_domain_list
+
+
+class TestSeedIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "seeds.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_block_and_allow(self):
+        index = SeedIndex(allowlist=["opg.facebook.com"])
+        self.assertTrue(index.is_blocked("facebook.com"))
+        self.assertTrue(index.is_blocked("m.facebook.com"))
+        self.assertFalse(index.is_blocked("opg.facebook.com"))
+        self.assertFalse(index.is_blocked("notfacebook.com"))
+        index.close()
+
+    def test_yield_persists_and_orders_hosts(self):
+        index = SeedIndex(self.path)
+        index.record("dobar.hr", pages=10, emails=3, personal_emails=2)
+        index.record("prazan.hr", pages=50, emails=0, personal_emails=0)
+        index.close()
+
+        index = SeedIndex(self.path)
+        self.assertEqual(index.order(["prazan.hr", "novi.hr", "dobar.hr"]), ["dobar.hr", "novi.hr", "prazan.hr"])
+        self.assertEqual(index.relative_yield("novi.hr"), 1.0)
+        self.assertGreater(index.relative_yield("dobar.hr"), 1.0)
+        self.assertLess(index.relative_yield("prazan.hr"), 0.2)
+
+        out = os.path.join(self.tmp.name, "seeds.csv")
+        self.assertEqual(index.export(out), 2)
+        with open(out, encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r["host"] for r in rows], ["dobar.hr", "prazan.hr"])
+        self.assertEqual(rows[0]["emails"], "3")
+        index.close()
+
+    def test_record_host_counts_failed_fetches(self):
+        class Sink:
+            def add(self, records, pages):
+                pass
+
+        ctx = RunContext(session=None, limiter=None, pool=None, sink=Sink(), seed_index=SeedIndex())
+        record = EmailRecord("ana@opg.hr", "", "Međimurska", "https://opg.hr/kontakt", "", "mailto", "")
+        # One page made it into the audit, four more fetches failed
+        record_host(ctx, "opg.hr", [record], [{"url": "https://opg.hr/kontakt"}], fetched=5)
+        self.assertEqual(ctx.seed_index.expected_yield("opg.hr"), 2 / 15)
+        record_host(ctx, "prazan.hr", [], [], fetched=0)
+        self.assertEqual(ctx.seed_index.export(os.path.join(self.tmp.name, "seeds.csv")), 1)
+
+    def test_load_domain_list(self):
+        path = os.path.join(self.tmp.name, "block.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# portali\nPrimjer.HR\n\nshop.hr  # trgovina\n")
+        self.assertEqual(load_domain_list(path), ["primjer.hr", "shop.hr"])
+
+
+if __name__ == "__main__":
+    unittest.main()
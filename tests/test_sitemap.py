@@ -0,0 +1,87 @@
+import asyncio
+import gzip
+import unittest
+
+from opg_scraper_pkg.sitemap import SitemapParser, discover, parse_sitemap
+
+from helpers import SITE, memory_crawler, page
+
+
+def urlset(*locs: str) -> bytes:
+    body = "".join(f"<url><loc>{loc}</loc><lastmod>2024-01-01</lastmod></url>" for loc in locs)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</urlset>'.encode()
+
+
+def index(*locs: str) -> bytes:
+    body = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</sitemapindex>'.encode()
+
+
+def serve(files, closed=None):
+    async def fetch_chunks(url):
+        data = files.get(url, b"")
+        try:
+            for i in range(0, len(data), 7):
+                yield data[i : i + 7]
+        finally:
+            if closed is not None:
+                closed.append(url)
+
+    return fetch_chunks
+
+
+class TestSitemapParser(unittest.TestCase):
+    def test_plain_gzip_and_index(self):
+        data = urlset("https://opg.hr/a", "https://opg.hr/kontakt")
+        self.assertEqual(parse_sitemap(data, chunk_size=5), [("url", "https://opg.hr/a"), ("url", "https://opg.hr/kontakt")])
+        self.assertEqual(parse_sitemap(gzip.compress(data), chunk_size=5), parse_sitemap(data))
+        self.assertEqual(parse_sitemap(index("https://opg.hr/s1.xml")), [("sitemap", "https://opg.hr/s1.xml")])
+
+    def test_size_cap(self):
+        parser = SitemapParser(max_bytes=300)
+        entries = parser.feed(gzip.compress(urlset(*(f"https://opg.hr/p{i}" for i in range(500)))))
+        self.assertTrue(parser.truncated)
+        self.assertLess(len(entries), 10)
+
+
+class TestDiscover(unittest.TestCase):
+    def test_index_contact_first_and_foreign_hosts_dropped(self):
+        files = {
+            "https://opg.hr/sitemap_index.xml": index("https://opg.hr/pages.xml.gz", "https://cdn.example/x.xml"),
+            "https://opg.hr/pages.xml.gz": gzip.compress(
+                urlset("https://opg.hr/proizvodi/sir", "https://opg.hr/kontakt/", "https://drugi.hr/kontakt")
+            ),
+        }
+        urls = asyncio.run(discover("https://opg.hr/", serve(files)))
+        self.assertEqual([u for u, _ in urls], ["https://opg.hr/kontakt/", "https://opg.hr/proizvodi/sir"])
+
+    def test_robots_listed_sitemap_and_limits(self):
+        files = {"https://opg.hr/custom.xml": urlset(*(f"https://opg.hr/p{i}" for i in range(50)))}
+        closed = []
+
+        async def run():
+            urls = await discover("https://opg.hr/", serve(files, closed), ["https://opg.hr/custom.xml"], max_urls=10)
+            # Stopping at max_urls closes the fetch right away, not when the generator is collected
+            self.assertEqual(closed, ["https://opg.hr/custom.xml"])
+            return urls
+
+        self.assertEqual(len(asyncio.run(run())), 10)
+
+
+class TestCrawlWithSitemap(unittest.TestCase):
+    def test_contact_page_reached_directly(self):
+        site = {
+            "https://opg-test.hr/": page("<a href='/o-gospodarstvu'>Dalje</a>"),
+            "https://opg-test.hr/o-gospodarstvu": page("<a href='/kontakt'>Kontakt</a>"),
+            "https://opg-test.hr/kontakt": SITE["https://opg-test.hr/kontakt"],
+        }
+        files = {"https://opg-test.hr/sitemap.xml": urlset("https://opg-test.hr/kontakt")}
+        crawler = memory_crawler(site, files, sitemaps=True)
+        records, audit = asyncio.run(crawler.crawl_host("https://opg-test.hr/", "Međimurska", max_pages=50))
+        self.assertEqual(crawler.fetched[:2], ["https://opg-test.hr/sitemap.xml", "https://opg-test.hr/kontakt"])
+        self.assertEqual(audit[0]["source"], "sitemap")
+        self.assertEqual([r.email for r in records], ["ana@opg-test.hr"])
+
+
+if __name__ == "__main__":
+    unittest.main()
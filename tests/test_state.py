@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from opg_scraper_pkg.analysis import PageResult
+from opg_scraper_pkg.crawl import EmailRecord
+from opg_scraper_pkg.state import StateStore, content_hash
+
+
+def rec(email, url, date="2026-01-01T00:00:00+00:00"):
+    return EmailRecord(email, "", "Međimurska", url, "", "regex", date)
+
+
+class TestStateStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_page_result_roundtrip(self):
+        store = StateStore(self.path)
+        result = PageResult(url="https://a.hr/", title="OPG", emails=[("ana@a.hr", "mailto")], links=[("https://a.hr/k", "/k", "Kontakt")])
+        digest = content_hash("<html>v1</html>")
+        store.save_result(result.url, digest, result)
+        self.assertEqual(store.cached_result(result.url, digest), result)
+        self.assertIsNone(store.cached_result(result.url, content_hash("<html>v2</html>")))
+        store.close()
+
+    def test_delta_between_runs(self):
+        first = StateStore(self.path)
+        first.record_sightings([rec("ana@a.hr", "https://a.hr/kontakt"), rec("ivo@b.hr", "https://b.hr/"), rec("eva@c.hr", "https://c.hr/")])
+        self.assertEqual({c["change"] for c in first.delta()}, {"new"})
+        first.close()
+
+        second = StateStore(self.path)
+        second.record_sightings([
+            rec("ana@a.hr", "https://a.hr/kontakt", "2026-02-01T00:00:00+00:00"),
+            rec("ivo@b.hr", "https://b.hr/o-nama"),
+            rec("novi@d.hr", "https://d.hr/"),
+        ])
+        self.assertEqual(second.first_seen_map()["ana@a.hr"], "2026-01-01T00:00:00+00:00")
+        changes = {c["email"]: c for c in second.delta()}
+        self.assertEqual(set(changes), {"ivo@b.hr", "eva@c.hr", "novi@d.hr"})
+        self.assertEqual(changes["novi@d.hr"]["change"], "new")
+        self.assertEqual(changes["eva@c.hr"]["change"], "disappeared")
+        self.assertEqual(changes["ivo@b.hr"]["change"], "moved")
+        self.assertEqual(changes["ivo@b.hr"]["previous_source_url"], "https://b.hr/")
+        second.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from opg_scraper_pkg.cli import parse_args
+from opg_scraper_pkg.transport import TransportOptions, create_session
+
+
+class TestTransport(unittest.IsolatedAsyncioTestCase):
+    def test_options_from_args(self):
+        options = TransportOptions.from_args(parse_args(["--max-connections-per-host", "4", "--read-timeout", "0", "--no-compression"]))
+        self.assertEqual(options.limit_per_host, 4)
+        self.assertFalse(options.compression)
+        timeout = options.client_timeout()
+        self.assertEqual((timeout.total, timeout.connect, timeout.sock_read), (20, 10.0, None))
+
+    async def test_session_negotiates_compression(self):
+        async def handler(request):
+            resp = web.Response(text="<p>OPG</p>" * 200, content_type="text/html", headers={"X-Accept": request.headers.get("Accept-Encoding", "")})
+            resp.enable_compression()
+            return resp
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            for compression, accepted in ((True, "gzip"), (False, "identity")):
+                async with create_session(TransportOptions(limit_per_host=1, compression=compression)) as session:
+                    self.assertEqual(session.connector.limit_per_host, 1)
+                    async with session.get(server.make_url("/")) as resp:
+                        self.assertIn(accepted, resp.headers["X-Accept"])
+                        self.assertEqual("Content-Encoding" in resp.headers, compression)
+                        self.assertEqual(await resp.text(), "<p>OPG</p>" * 200)
+        finally:
+            await server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
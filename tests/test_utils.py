@@ -0,0 +1,78 @@
+import unittest
+
+from bs4 import BeautifulSoup
+
+from opg_scraper_pkg.utils import (
+    canonicalize_url,
+    contains_opt_out,
+    decode_html,
+    guess_name_from_page,
+    has_binary_extension,
+    is_html_content_type,
+    is_role_based,
+    is_valid_email,
+    rehost,
+    same_host,
+    url_key,
+)
+
+
+class TestHotPathHelpers(unittest.TestCase):
+    def test_is_role_based(self):
+        self.assertTrue(is_role_based("INFO@opg.hr"))
+        self.assertTrue(is_role_based("kontakt@opg.hr"))
+        self.assertFalse(is_role_based("info.ana@opg.hr"))
+        self.assertFalse(is_role_based("ana@info.hr"))
+        self.assertFalse(is_role_based("info"))
+
+    def test_is_valid_email(self):
+        self.assertTrue(is_valid_email("opg.juric@example.hr"))
+        self.assertFalse(is_valid_email("opg.juric@example"))
+
+    def test_contains_opt_out(self):
+        self.assertTrue(contains_opt_out("Molimo, NE ŠALJITE SPAM na ovu adresu"))
+        self.assertTrue(contains_opt_out("zaštita podataka", already_lower=True))
+        self.assertFalse(contains_opt_out("Domaći med i jabuke"))
+
+    def test_guess_name_reuses_title(self):
+        soup = BeautifulSoup("<html><head><title>Naslov</title></head><body><h1>OPG Perić</h1></body></html>", "lxml")
+        self.assertEqual(guess_name_from_page(soup), "OPG Perić")
+        self.assertEqual(guess_name_from_page(soup, "OPG Kovač | Početna"), "OPG Kovač")
+
+
+class TestFetchHelpers(unittest.TestCase):
+    def test_content_type_and_extensions(self):
+        self.assertTrue(is_html_content_type("text/html; charset=UTF-8"))
+        self.assertTrue(is_html_content_type(""))
+        self.assertFalse(is_html_content_type("application/pdf"))
+        self.assertTrue(has_binary_extension("https://opg.hr/Brosura.PDF?v=2"))
+        self.assertFalse(has_binary_extension("https://opg.hr/kontakt.html"))
+
+    def test_decode_html(self):
+        self.assertEqual(decode_html("Čakovec".encode("cp1250"), "windows-1250"), "Čakovec")
+        self.assertEqual(decode_html("<meta charset='windows-1250'>Šibenik".encode("cp1250"))[-7:], "Šibenik")
+        self.assertEqual(decode_html("Županija".encode("cp1250")), "Županija")
+        self.assertEqual(decode_html("Županija".encode("utf-8"), "no-such-charset"), "Županija")
+        # Body truncated inside a multi-byte character is still UTF-8
+        self.assertEqual(decode_html("<p>ana@opg.hr Čakovec Č".encode("utf-8")[:-1]), "<p>ana@opg.hr Čakovec ")
+
+
+class TestCanonicalization(unittest.TestCase):
+    def test_canonicalize_url(self):
+        self.assertEqual(
+            canonicalize_url("HTTPS://WWW.Opg-X.hr:443/kontakt/?utm_source=fb&b=2&a=1&fbclid=z#karta"),
+            "https://www.opg-x.hr/kontakt/?a=1&b=2",
+        )
+        self.assertEqual(canonicalize_url("http://opg-x.hr:8080"), "http://opg-x.hr:8080/")
+
+    def test_url_key_and_same_host(self):
+        self.assertEqual(url_key("http://www.opg-x.hr/kontakt/"), url_key("https://opg-x.hr/kontakt"))
+        self.assertNotEqual(url_key("https://opg-x.hr/kontakt"), url_key("https://opg-x.hr/kontakt?lang=en"))
+        self.assertTrue(same_host("https://www.opg-x.hr/a", "http://OPG-X.hr/"))
+        self.assertFalse(same_host("https://opg-x.hr/", "https://shop.opg-x.hr/"))
+        self.assertEqual(rehost("https://www.opg-x.hr/kontakt?a=1", "https://opg-x.hr/"), "https://opg-x.hr/kontakt?a=1")
+        self.assertEqual(rehost("http://opg-x.hr/a", "https://opg-x.hr/"), "http://opg-x.hr/a")
+
+
+if __name__ == "__main__":
+    unittest.main()
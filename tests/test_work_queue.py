@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import unittest
+
+from helpers import SITE, memory_crawler
+
+from opg_scraper_pkg.cli import RunContext, run_worker
+from opg_scraper_pkg.seed_index import SeedIndex
+from opg_scraper_pkg.work_queue import LeaseBudget, WorkQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def acquired(budget: LeaseBudget, n: int) -> int:
+    async def run():
+        return sum([await budget.acquire() for _ in range(n)])
+
+    return asyncio.run(run())
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.queue = WorkQueue(lease_seconds=60, max_attempts=2, clock=self.clock)
+        self.queue.set_budget("Međimurska", 25)
+        for host in ("a.hr", "b.hr"):
+            self.queue.add("Međimurska", host, [f"https://{host}/"], 50)
+
+    def test_budget_is_drawn_and_refunded(self):
+        q = self.queue
+        self.assertFalse(q.add("Varaždinska", "a.hr", ["https://a.hr/kontakt"], 50))
+        self.assertEqual(q.counties_for("a.hr"), ["Međimurska", "Varaždinska"])
+
+        a, b = q.lease("w1"), q.lease("w2")
+        self.assertEqual((a.host, b.host), ("a.hr", "b.hr"))
+        self.assertIsNone(q.lease("w3"))
+        budget_a, budget_b = LeaseBudget(q, a, "w1", chunk=10), LeaseBudget(q, b, "w2")
+        self.assertEqual(acquired(budget_a, 12), 12)
+        self.assertEqual(q.remaining_budget("Međimurska"), 5)
+        self.assertEqual(acquired(budget_b, 30), 5)
+        self.assertEqual(q.remaining_budget("Međimurska"), 0)
+        # Unused pages of a's second chunk go back to the county
+        self.assertTrue(q.complete("a.hr", "w1", budget_a.used))
+        self.assertEqual(q.remaining_budget("Međimurska"), 8)
+        self.assertFalse(q.complete("a.hr", "w1", 0))
+
+    def test_expired_lease_is_reclaimed_then_fails(self):
+        q = self.queue
+        a = q.lease("w1")
+        acquired(LeaseBudget(q, a, "w1"), 1)
+        self.clock.now += 30
+        self.assertTrue(q.renew("a.hr", "w1"))
+        self.clock.now += 61
+        self.assertFalse(q.renew("a.hr", "w1"))
+        # w1 died: its pages are refunded and a.hr goes to the next worker
+        again = q.lease("w2")
+        self.assertEqual(again.host, "a.hr")
+        self.assertEqual(q.remaining_budget("Međimurska"), 25)
+        self.assertEqual(q.take_pages("a.hr", "w1", 10), 0)
+        self.clock.now += 61
+        self.assertEqual(q.lease("w3").host, "b.hr")
+        self.assertEqual(q.counts(), {"failed": 1, "leased": 1})
+
+    def test_shared_file_between_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue.sqlite3")
+            coordinator = WorkQueue(path)
+            for i in range(10):
+                coordinator.add("Međimurska", f"h{i}.hr", [f"https://h{i}.hr/"], 50)
+            coordinator.seal()
+            workers = [WorkQueue(path), WorkQueue(path)]
+            leased = []
+            while True:
+                tasks = [w.lease(f"w{i}") for i, w in enumerate(workers)]
+                if not any(tasks):
+                    break
+                for i, task in enumerate(tasks):
+                    if task:
+                        leased.append(task.host)
+                        workers[i].complete(task.host, f"w{i}", 1)
+            self.assertEqual(sorted(leased), sorted(f"h{i}.hr" for i in range(10)))
+            self.assertTrue(workers[0].drained)
+            for q in (coordinator, *workers):
+                q.close()
+
+
+class Sink:
+    def __init__(self):
+        self.records, self.pages = [], []
+
+    def add(self, records, pages):
+        self.records += records
+        self.pages += pages
+
+
+class TestRunWorker(unittest.IsolatedAsyncioTestCase):
+    async def test_each_host_crawled_by_one_worker(self):
+        other = {url.replace("opg-test.hr", "opg-drugi.hr"): html.replace("opg-test.hr", "opg-drugi.hr") for url, html in SITE.items()}
+        queue = WorkQueue(lease_seconds=2)
+        queue.set_budget("Međimurska", 20)
+        queue.add("Međimurska", "opg-test.hr", ["https://opg-test.hr/"], 50)
+        queue.add("Međimurska", "opg-drugi.hr", ["https://opg-drugi.hr/"], 50)
+        queue.seal()
+        crawlers, sinks = [], []
+        jobs = []
+        for worker in ("w1", "w2"):
+            crawler, sink = memory_crawler({**SITE, **other}), Sink()
+            ctx = RunContext(session=None, limiter=None, pool=None, sink=sink, seed_index=SeedIndex(), queue=queue)
+            jobs.append(run_worker(ctx, argparse.Namespace(worker_id=worker, concurrency=1), crawler))
+            crawlers.append(crawler)
+            sinks.append(sink)
+        await asyncio.gather(*jobs)
+
+        fetched = [url for c in crawlers for url in c.fetched]
+        self.assertEqual(len(fetched), len(set(fetched)))
+        self.assertEqual(queue.counts(), {"done": 2})
+        # Pages are drawn in chunks: whatever a host held but did not fetch is refunded
+        self.assertLessEqual(len(fetched), 20)
+        self.assertEqual(queue.remaining_budget("Međimurska"), 20 - len(fetched))
+        self.assertEqual(sorted(r.email for s in sinks for r in s.records), ["ana@opg-drugi.hr", "ana@opg-test.hr"])
+
+
+if __name__ == "__main__":
+    unittest.main()